@@ -0,0 +1,241 @@
+"""
+Micro-benchmarks of the QR code rendering pipeline and the redirect path.
+"""
+
+import sys
+import time
+from typing import Annotated
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from admin import PROJECT_ROOT
+
+app = typer.Typer(
+    help=__doc__,
+    no_args_is_help=True,
+    add_completion=False,
+    rich_markup_mode='markdown',
+)
+
+
+def _time_per_call(fn, repeat: int) -> float:
+    """Return the best-of-three mean time of ``fn()``, in milliseconds."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1000
+
+
+@app.command(name='png')
+def benchmark_png(
+    content: Annotated[str, typer.Option(help='Content to encode')] = 'https://example.com/',
+    error: Annotated[str, typer.Option(help='Error correction level')] = 'M',
+    scales: Annotated[str, typer.Option(help='Comma-separated scales')] = '1,2,5,10,20,30,40,50',
+    border: Annotated[int, typer.Option(help='Quiet zone size, in modules')] = 4,
+    repeat: Annotated[int, typer.Option(help='Renders per measurement')] = 20,
+    compresslevel: Annotated[int, typer.Option(help='zlib level of the numpy writer')] = 9,
+    one_bit: Annotated[bool, typer.Option(help='1-bit output of the numpy writer')] = True,
+):
+    """
+    Compare the segno and numpy PNG writers across scales (encoding excluded).
+
+    Example:
+        benchmark png --scales 1,10,50 --repeat 50
+    """
+    sys.path.insert(0, str(PROJECT_ROOT.resolve()))
+
+    from src.qr_code.common.png import PngOptions
+    from src.qr_code.common.rendering import RenderSpec, encode, rasterize
+
+    matrix = encode(content, error)
+    options = PngOptions(compresslevel=compresslevel, one_bit=one_bit)
+
+    table = Table(title=f'PNG rasterization, {matrix.width}x{matrix.height} modules')
+    for column in ('Scale', 'Pixels', 'segno ms', 'numpy ms', 'Speed-up', 'segno B', 'numpy B'):
+        table.add_column(column, justify='right')
+
+    for scale in (int(s) for s in scales.split(',')):
+        spec = RenderSpec(content, error, scale, border, '#000000', '#ffffff', 'png')
+        fast = RenderSpec(content, error, scale, border, '#000000', '#ffffff', 'png', options)
+        segno_ms = _time_per_call(lambda: rasterize(matrix, spec), repeat)
+        numpy_ms = _time_per_call(lambda: rasterize(matrix, fast), repeat)
+        side = (matrix.width + 2 * border) * scale
+        table.add_row(
+            str(scale),
+            f'{side}x{side}',
+            f'{segno_ms:.2f}',
+            f'{numpy_ms:.2f}',
+            f'{segno_ms / numpy_ms:.1f}x',
+            str(len(rasterize(matrix, spec))),
+            str(len(rasterize(matrix, fast))),
+        )
+
+    Console().print(table)
+
+
+@app.command(name='svg')
+def benchmark_svg(
+    content: Annotated[str, typer.Option(help='Content to encode')] = 'https://example.com/',
+    error: Annotated[str, typer.Option(help='Error correction level')] = 'M',
+    scale: Annotated[int, typer.Option(help='Scale')] = 10,
+    repeat: Annotated[int, typer.Option(help='Renders per measurement')] = 200,
+):
+    """
+    Compare segno's and the compact SVG writer: size raw, gzip and Brotli, and latency.
+
+    Example:
+        benchmark svg --content "$(python -c 'print(\"x\" * 500)')"
+    """
+    sys.path.insert(0, str(PROJECT_ROOT.resolve()))
+
+    from src.qr_code.common.compression import compress
+    from src.qr_code.common.rendering import RenderSpec, encode, rasterize
+
+    matrix = encode(content, error)
+
+    table = Table(title=f'SVG output, {matrix.width}x{matrix.height} modules, scale {scale}')
+    for column in ('Writer', 'Render ms', 'Raw B', 'gzip B', 'gzip ms', 'br B', 'br ms'):
+        table.add_column(column, justify='right')
+
+    for name, compact in (('segno', False), ('compact', True)):
+        spec = RenderSpec(
+            content, error, scale, 4, '#000000', '#ffffff', 'svg', compact_svg=compact
+        )
+        image = rasterize(matrix, spec)
+        table.add_row(
+            name,
+            f'{_time_per_call(lambda: rasterize(matrix, spec), repeat):.3f}',
+            str(len(image)),
+            str(len(compress(image, 'gzip'))),
+            f'{_time_per_call(lambda: compress(image, "gzip"), repeat):.3f}',
+            str(len(compress(image, 'br'))),
+            f'{_time_per_call(lambda: compress(image, "br"), repeat):.3f}',
+        )
+
+    Console().print(table)
+
+
+@app.command(name='redirect')
+def benchmark_redirect(
+    requests: Annotated[int, typer.Option(help='Requests per measurement')] = 5000,
+    concurrency: Annotated[int, typer.Option(help='Requests in flight at a time')] = 50,
+):
+    """
+    Compare short code redirects through Django and through the ASGI fast path.
+
+    Requests are made in-process against the ASGI applications (no network, no server), on a
+    throw-away SQLite database, with scans buffered as in production. Measures the cost of the
+    request path itself: the code is in the redirect cache after the warm-up.
+
+    Example:
+        benchmark redirect --requests 20000 --concurrency 100
+    """
+    import asyncio
+    import os
+    import tempfile
+    from pathlib import Path
+
+    sys.path.insert(0, str(PROJECT_ROOT.resolve()))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    os.environ['QR_CODE_SCAN_FLUSH_INTERVAL'] = '60'
+
+    import django
+    from django.conf import settings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.DATABASES['default']['NAME'] = Path(tmp) / 'benchmark.sqlite3'
+        django.setup()
+
+        from django.core.asgi import get_asgi_application
+        from django.core.management import call_command
+
+        from src.qr_code.asgi import RedirectFastPath
+        from src.qr_code.models import QRCode, User
+        from src.qr_code.services.scan_counter import get_scan_counter
+
+        call_command('migrate', verbosity=0)
+        user = User.objects.create_user(username='benchmark', email='benchmark@example.com')
+        qrcode = QRCode.objects.create(
+            created_by=user,
+            qr_type='url',
+            content='https://example.com/',
+            original_url='https://example.com/',
+            use_url_shortening=True,
+        )
+        django_app = get_asgi_application()
+        apps = {'Django': django_app, 'Fast path': RedirectFastPath(django_app)}
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': f'/api/go/{qrcode.short_code}',
+            'raw_path': f'/api/go/{qrcode.short_code}'.encode(),
+            'root_path': '',
+            'query_string': b'',
+            'headers': [(b'host', b'localhost'), (b'user-agent', b'benchmark')],
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+        }
+
+        async def request(application) -> int:
+            sent = False
+            status = 0
+
+            async def receive():
+                nonlocal sent
+                if sent:
+                    # Nothing more to read and no disconnect: wait until cancelled
+                    await asyncio.Event().wait()
+                sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                nonlocal status
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+
+            await application(scope, receive, send)
+            return status
+
+        async def measure(application, count: int) -> tuple[float, int]:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def limited() -> int:
+                async with semaphore:
+                    return await request(application)
+
+            start = time.perf_counter()
+            statuses = await asyncio.gather(*(limited() for _ in range(count)))
+            return time.perf_counter() - start, sum(status != 302 for status in statuses)
+
+        async def run() -> dict[str, tuple[float, int]]:
+            results = {}
+            for name, application in apps.items():
+                await measure(application, min(requests, 200))
+                results[name] = await measure(application, requests)
+            return results
+
+        results = asyncio.run(run())
+        get_scan_counter().stop()
+
+    table = Table(title=f'Redirects, {requests} requests, concurrency {concurrency}')
+    for column in ('Path', 'Requests/s', 'Mean ms', 'Errors', 'Speed-up'):
+        table.add_column(column, justify='right')
+    baseline = results['Django'][0]
+    for name, (seconds, errors) in results.items():
+        table.add_row(
+            name,
+            f'{requests / seconds:.0f}',
+            f'{seconds / requests * 1000:.3f}',
+            str(errors),
+            f'{baseline / seconds:.1f}x',
+        )
+
+    Console().print(table)
@@ -155,9 +155,14 @@ def qrcode_list(
     set_environment(environment.value)
 
     try:
-        response = requests.get(f'{API_BASE_URL}/api/qrcodes/', headers=get_headers())
-        response.raise_for_status()
-        qrcodes = response.json()
+        # Follow the cursor-paginated `Link: rel="next"` headers
+        qrcodes = []
+        url: str | None = f'{API_BASE_URL}/api/qrcodes/'
+        while url:
+            response = requests.get(url, headers=get_headers())
+            response.raise_for_status()
+            qrcodes.extend(response.json())
+            url = response.links.get('next', {}).get('url')
 
         if not qrcodes:
             logger.info('No QR codes found.')
@@ -10,7 +10,27 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+# Wrapped below; RedirectFastPath can only be imported once Django is set up
+application: 'ASGIHandler | RedirectFastPath' = get_asgi_application()
+
+# Answer short code redirects ahead of the middleware stack and the API router.
+from django.conf import settings  # noqa: E402
+
+from src.qr_code.asgi import RedirectFastPath  # noqa: E402
+
+if settings.QR_CODE_REDIRECT_FAST_PATH:
+    application = RedirectFastPath(application)
+
+# Start render pool workers now rather than on the first request (no-op if disabled).
+from src.qr_code.services.render_pool import start_render_pool  # noqa: E402
+
+start_render_pool()
+
+# Build the short code filter in the background now (no-op if disabled).
+from src.qr_code.services.short_code_filter import get_short_code_filter  # noqa: E402
+
+get_short_code_filter().start()
@@ -181,6 +181,115 @@ LOGIN_URL = '/login/'
 BASE_URL = os.getenv('BASE_URL', 'http://localhost:8010')
 QR_CODE_REDIRECT_PATH = '/go/'
 
+# Redirect cache (`/go/<short_code>`): entries kept in each process and their TTL in seconds, and
+# the TTL in the shared Django cache (CACHES). Other processes see updates of a code once their
+# local entry expires, so keep QR_CODE_REDIRECT_CACHE_TTL short. `0` disables a level. The shared
+# level and the redirect index need a CACHES backend shared by all workers, not the default
+# per-process LocMemCache (checks E030/W030).
+QR_CODE_REDIRECT_CACHE_SIZE = int(os.getenv('QR_CODE_REDIRECT_CACHE_SIZE', '10000'))
+QR_CODE_REDIRECT_CACHE_TTL = int(os.getenv('QR_CODE_REDIRECT_CACHE_TTL', '5'))
+QR_CODE_REDIRECT_SHARED_CACHE_TTL = int(os.getenv('QR_CODE_REDIRECT_SHARED_CACHE_TTL', '300'))
+
+# Serve `/api/go/<short_code>` from a minimal ASGI app mounted ahead of Django (config/asgi.py),
+# skipping the middleware stack. Other requests go to Django as usual.
+QR_CODE_REDIRECT_FAST_PATH = os.getenv('QR_CODE_REDIRECT_FAST_PATH', 'True').lower() in [
+    'true',
+    '1',
+]
+
+# Compiled redirect index (`manage.py compile_redirect_index`), memory-mapped by every worker and
+# read before the database. Indexes older than the maximum age (seconds) are ignored. An empty
+# path disables the index.
+QR_CODE_REDIRECT_INDEX_PATH = os.getenv('QR_CODE_REDIRECT_INDEX_PATH', '')
+QR_CODE_REDIRECT_INDEX_MAX_AGE = int(os.getenv('QR_CODE_REDIRECT_INDEX_MAX_AGE', '3600'))
+
+# Scan counting: seconds between batched writes of buffered scan counts, and buffered scans that
+# trigger an early write. Buffers are flushed on shutdown. `0` writes every scan immediately.
+QR_CODE_SCAN_FLUSH_INTERVAL = int(os.getenv('QR_CODE_SCAN_FLUSH_INTERVAL', '5'))
+QR_CODE_SCAN_MAX_PENDING = int(os.getenv('QR_CODE_SCAN_MAX_PENDING', '1000'))
+# Days raw scan events are kept by `manage.py prune_scan_events`; hourly and daily rollups are kept
+QR_CODE_SCAN_EVENT_RETENTION_DAYS = int(os.getenv('QR_CODE_SCAN_EVENT_RETENTION_DAYS', '90'))
+# Repeated hits of a code by the same client (address and user agent) within this many seconds
+# are redirected without recording a scan, as are HEAD requests and link previewers. `0` disables
+# duplicate detection. Behind reverse proxies, set the number of trusted proxies in front of the
+# app, so the client address is read from `X-Forwarded-For` rather than being the proxy's.
+QR_CODE_SCAN_DUPLICATE_WINDOW = int(os.getenv('QR_CODE_SCAN_DUPLICATE_WINDOW', '0'))
+QR_CODE_TRUSTED_PROXY_HOPS = int(os.getenv('QR_CODE_TRUSTED_PROXY_HOPS', '0'))
+
+# Short codes are numbered from a database sequence, in blocks of this many reserved per process
+# at a time (unused codes of a block are skipped when the process exits)
+QR_CODE_SHORT_CODE_BLOCK_SIZE = int(os.getenv('QR_CODE_SHORT_CODE_BLOCK_SIZE', '1000'))
+
+# Redirects of unknown short codes are rejected from memory by a Bloom filter of existing codes,
+# rebuilt in the background every this many seconds (`0` disables the filter), with this
+# false-positive rate. Allocator blocks are dropped after half the rebuild interval.
+QR_CODE_SHORT_CODE_FILTER_REBUILD = int(os.getenv('QR_CODE_SHORT_CODE_FILTER_REBUILD', '3600'))
+QR_CODE_SHORT_CODE_FILTER_ERROR_RATE = float(
+    os.getenv('QR_CODE_SHORT_CODE_FILTER_ERROR_RATE', '0.01')
+)
+
+# Upper bound for the content-addressed render cache under `MEDIA_ROOT/qrcodes/cache/`, counting
+# the renders of all processes.
+# Least recently used renders are evicted beyond this size. `0` disables the cache.
+QR_CODE_RENDER_CACHE_MAX_BYTES = int(os.getenv('QR_CODE_RENDER_CACHE_MAX_BYTES', str(256 * 2**20)))
+
+# Number of worker processes used to encode/rasterize QR codes. `0` renders in a worker thread of
+# the current process instead (handy for development and tests).
+QR_CODE_RENDER_WORKERS = int(os.getenv('QR_CODE_RENDER_WORKERS', '0'))
+
+# Number of encoded (bit-packed) QR matrices kept in memory per process, so re-styling a code or
+# exporting it in another format skips encoding. `0` disables the cache.
+QR_CODE_MATRIX_CACHE_SIZE = int(os.getenv('QR_CODE_MATRIX_CACHE_SIZE', '10000'))
+
+# PNG writer: `segno` (reference implementation) or `numpy` (vectorized, much faster at large
+# scales). Both produce images with the same pixels.
+QR_CODE_PNG_BACKEND = os.getenv('QR_CODE_PNG_BACKEND', 'segno').lower()
+# zlib compression level (0-9) and bit depth (1-bit when true, else 8-bit) of the numpy writer
+QR_CODE_PNG_COMPRESSLEVEL = int(os.getenv('QR_CODE_PNG_COMPRESSLEVEL', '9'))
+QR_CODE_PNG_ONE_BIT = os.getenv('QR_CODE_PNG_ONE_BIT', 'True').lower() in ['true', '1']
+
+# SVG writer: `segno`, or `compact` (no XML declaration or classes, viewBox scaling, short colors)
+QR_CODE_SVG_WRITER = os.getenv('QR_CODE_SVG_WRITER', 'segno').lower()
+# Write gzip (.svgz) and Brotli (.svg.br) siblings of SVG files, served by Accept-Encoding
+QR_CODE_SVG_PRECOMPRESS = os.getenv('QR_CODE_SVG_PRECOMPRESS', 'True').lower() in ['true', '1']
+
+# Media serving: browser cache lifetime of media files that aren't content-addressed or
+# versioned, and optional offloading of the byte pushing to the front proxy: `nginx`
+# (X-Accel-Redirect to QR_CODE_MEDIA_ACCEL_PREFIX + path, an `internal` location aliased to
+# MEDIA_ROOT) or `sendfile` (X-Sendfile with the absolute path, for Apache mod_xsendfile /
+# lighttpd). Empty serves directly.
+QR_CODE_MEDIA_MAX_AGE = int(os.getenv('QR_CODE_MEDIA_MAX_AGE', '3600'))
+QR_CODE_MEDIA_ACCEL = os.getenv('QR_CODE_MEDIA_ACCEL', '').lower()
+QR_CODE_MEDIA_ACCEL_PREFIX = os.getenv('QR_CODE_MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Layout of generated image files under MEDIA_ROOT: `sharded` (qrcodes/ab/cd/<id>.<format>, two
+# levels of 256 directories from the id) or `flat` (qrcodes/<id>.<format>). Existing files keep
+# working after a change; `manage.py migrate_media_layout` moves them to the configured layout.
+QR_CODE_MEDIA_LAYOUT = os.getenv('QR_CODE_MEDIA_LAYOUT', 'sharded').lower()
+
+# Largest scale accepted by the image endpoint (`/api/qrcodes/{id}/image?scale=`)
+QR_CODE_IMAGE_MAX_SCALE = int(os.getenv('QR_CODE_IMAGE_MAX_SCALE', '50'))
+
+# Bulk creation (`POST /api/qrcodes/bulk`): most items accepted per request, and items inserted
+# (and rendered) per batch; each batch is one transaction and its results are streamed at once
+QR_CODE_BULK_MAX_ITEMS = int(os.getenv('QR_CODE_BULK_MAX_ITEMS', '100000'))
+QR_CODE_BULK_BATCH_SIZE = int(os.getenv('QR_CODE_BULK_BATCH_SIZE', '500'))
+
+# Listing (`GET /api/qrcodes/`): default and largest `limit` of a cursor-paginated page, and rows
+# fetched per query by the streaming mode (`?stream=true`)
+QR_CODE_LIST_PAGE_SIZE = int(os.getenv('QR_CODE_LIST_PAGE_SIZE', '100'))
+QR_CODE_LIST_MAX_PAGE_SIZE = int(os.getenv('QR_CODE_LIST_MAX_PAGE_SIZE', '1000'))
+QR_CODE_LIST_STREAM_CHUNK_SIZE = int(os.getenv('QR_CODE_LIST_STREAM_CHUNK_SIZE', '2000'))
+
+# Dashboard: codes rendered per batch; the first batch comes with the page, and each further
+# batch is fetched as an HTML fragment when the user scrolls to the end of the list
+QR_CODE_DASHBOARD_PAGE_SIZE = int(os.getenv('QR_CODE_DASHBOARD_PAGE_SIZE', '50'))
+
+# Dashboard thumbnails: scale of the per-code PNG thumbnails, and whether to show all thumbnails
+# of a batch from one SVG sprite instead (one request per batch instead of one per code)
+QR_CODE_THUMBNAIL_SCALE = int(os.getenv('QR_CODE_THUMBNAIL_SCALE', '2'))
+QR_CODE_DASHBOARD_SPRITE = os.getenv('QR_CODE_DASHBOARD_SPRITE', 'True').lower() in ['true', '1']
+
 # Password reset settings
 PASSWORD_RESET_TOKEN_TTL_HOURS = int(os.getenv('PASSWORD_RESET_TOKEN_TTL_HOURS', '4'))
 
@@ -15,24 +15,23 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
-from django.urls import include, path
+from django.urls import URLPattern, URLResolver, include, path, re_path
 
 from src.qr_code.admin import custom_admin_site
 from src.qr_code.api.router import api
+from src.qr_code.views import serve_media
 
-urlpatterns = [
+urlpatterns: list[URLPattern | URLResolver] = [
     path('admin/', custom_admin_site.urls),
     path('api/', api.urls),  # Django Ninja API with built-in docs at /api/docs
     path('', include('src.qr_code.urls')),
 ]
 
-# Serve media files (WhiteNoise automatically handles static files)
-if settings.DEBUG:
-    # mypy struggles with the return type of static(); this is fine at runtime.
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)  # type: ignore[arg-type]
-else:
-    # Serve media files even when DEBUG=False for local testing
-    # In production, use a proper web server (nginx, Apache, etc.) for media files
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)  # type: ignore[arg-type]
+# Serve media files (WhiteNoise automatically handles static files). With QR_CODE_MEDIA_ACCEL,
+# the view only authorizes and sets headers, and the front proxy sends the bytes.
+urlpatterns += [
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$', serve_media),
+]
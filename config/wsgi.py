@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Build the short code filter in the background now (no-op if disabled).
+from src.qr_code.services.short_code_filter import get_short_code_filter  # noqa: E402
+
+get_short_code_filter().start()
@@ -11,6 +11,12 @@ from django.utils import timezone
 
 from .models import CreditTransaction, InsufficientCreditsError, QRCode, User
 from .services.email_service import send_email
+from .services.matrix_cache import get_matrix_cache
+from .services.redirect_cache import get_redirect_cache
+from .services.redirect_index import get_redirect_index
+from .services.render_cache import get_render_cache
+from .services.scan_classifier import get_scan_classifier
+from .services.short_code_filter import get_short_code_filter
 
 
 @admin.register(User)
@@ -120,6 +126,18 @@ class CreditAdjustmentForm(forms.Form):
     )
 
 
+def cache_stats() -> list[tuple[str, dict[str, int | float]]]:
+    """Statistics of the in-process caches, as shown on the admin tools page."""
+    return [
+        ('Render cache', get_render_cache().stats()),
+        ('Matrix cache', get_matrix_cache().stats()),
+        ('Redirect cache', get_redirect_cache().stats()),
+        ('Redirect index', get_redirect_index().stats()),
+        ('Short code filter', get_short_code_filter().stats()),
+        ('Scan classifier', get_scan_classifier().stats()),
+    ]
+
+
 class CustomAdminSite(admin.AdminSite):
     """Custom admin site with additional tools."""
 
@@ -275,6 +293,7 @@ class CustomAdminSite(admin.AdminSite):
             'credit_form': credit_form,
             'environment': environment,
             'environment_variables': environment_variables,
+            'cache_stats': cache_stats(),
         }
         return render(request, 'admin/tools.html', context)
 
@@ -1,40 +1,142 @@
 """Async QRCode endpoints for Django Ninja."""
 
+import json
 import uuid
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from itertools import islice
+from typing import Any
+from urllib.parse import urlencode
 
 from asgiref.sync import sync_to_async
-from ninja import Router
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from ninja import Query, Router
+from ninja.responses import NinjaJSONEncoder
 from ninja_jwt.authentication import AsyncJWTAuth
 
-from src.qr_code.models import QRCode
+from src.qr_code.models import QRCode, QRCodeFormat, ScanPeriod
 from src.qr_code.schemas import (
+    QRCodeBulkResultSchema,
     QRCodeCreateSchema,
+    QRCodeExportRequestSchema,
+    QRCodeExportSchema,
     QRCodePreviewSchema,
+    QRCodeScansSchema,
     QRCodeSchema,
     QRCodeUpdateSchema,
 )
 from src.qr_code.services import QRCodeGenerator
+from src.qr_code.services.analytics import (
+    DEFAULT_RANGES,
+    MAX_BUCKETS,
+    PERIODS,
+    scan_series,
+)
+from src.qr_code.services.archive import archive_queryset, archive_response
+from src.qr_code.services.bulk import (
+    build_qrcode,
+    error_message,
+    insert_batch,
+    render_batch,
+)
+from src.qr_code.services.image_variants import serve_variant
+from src.qr_code.services.pagination import get_page, newest_first
+from src.qr_code.services.search import decode_offset, get_search_page
+from src.qr_code.services.search import search as search_qrcodes
 
 router = Router()
 
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+@router.get('/', response={200: list[QRCodeSchema], 400: dict}, auth=AsyncJWTAuth())
+async def list_qrcodes(
+    request,
+    response: HttpResponse,
+    limit: int | None = Query(None, ge=1),
+    cursor: str | None = None,
+    stream: bool = False,
+    search: str = '',
+):
+    """List QR codes for the authenticated user, newest first.
+
+    Results are cursor-paginated: up to ``limit`` codes per page (default
+    ``QR_CODE_LIST_PAGE_SIZE``). When there are more, the response carries a
+    ``Link: <...>; rel="next"`` header whose URL fetches the next page.
 
-@router.get('/', response=list[QRCodeSchema], auth=AsyncJWTAuth())
-async def list_qrcodes(request):
-    """List all QR codes for the authenticated user."""
+    With ``search``, only codes whose name, content or target URL contain every word of it (as a
+    prefix) are listed, best matches first.
+
+    With ``stream``, all codes (after ``cursor``, if given) are streamed as one JSON array instead,
+    fetched ``QR_CODE_LIST_STREAM_CHUNK_SIZE`` rows at a time.
+    """
     user = request.auth
 
+    if limit is not None and limit > settings.QR_CODE_LIST_MAX_PAGE_SIZE:
+        return 400, {'detail': f'Limit must be at most {settings.QR_CODE_LIST_MAX_PAGE_SIZE}.'}
+
     # Get QR codes excluding soft-deleted
     queryset = QRCode.objects.filter(created_by=user, deleted_at__isnull=True)
-    qrcodes: list[QRCode] = await sync_to_async(lambda: list(queryset))()
+
+    try:
+        if stream:
+            if search:
+                queryset = search_qrcodes(queryset, search)
+                if cursor:
+                    queryset = queryset[decode_offset(cursor) :]
+            else:
+                queryset = newest_first(queryset, cursor)
+            return StreamingHttpResponse(
+                _stream_json_array(queryset), content_type='application/json'
+            )
+        limit = limit or settings.QR_CODE_LIST_PAGE_SIZE
+        if search:
+            qrcodes, next_cursor = await sync_to_async(get_search_page)(
+                queryset, search, limit, cursor
+            )
+        else:
+            qrcodes, next_cursor = await sync_to_async(get_page)(queryset, limit, cursor)
+    except ValueError:
+        return 400, {'detail': 'Invalid cursor.'}
+
+    if next_cursor:
+        params = {'limit': limit, 'cursor': next_cursor}
+        if search:
+            params['search'] = search
+        next_url = request.build_absolute_uri(f'{request.path}?{urlencode(params)}')
+        response['Link'] = f'<{next_url}>; rel="next"'
 
     # Add computed fields (dynamic attributes for serialization)
     for qr in qrcodes:
-        qr.image_url = QRCodeGenerator.get_file_url(qr.image_file)  # type: ignore[attr-defined]
-        qr.redirect_url = qr.get_redirect_url()  # type: ignore[attr-defined]
+        _add_computed_fields(qr)
 
     return qrcodes
 
 
+def _add_computed_fields(qrcode: QRCode):
+    qrcode.image_url = QRCodeGenerator.get_image_url(qrcode)  # type: ignore[attr-defined]
+    qrcode.redirect_url = qrcode.get_redirect_url()  # type: ignore[attr-defined]
+
+
+async def _stream_json_array(queryset) -> AsyncIterator[str]:
+    """Serialize ``queryset`` as a JSON array, one server-side chunk of rows at a time."""
+    chunk_size = settings.QR_CODE_LIST_STREAM_CHUNK_SIZE
+    rows = queryset.iterator(chunk_size=chunk_size)
+    separator = '['
+    while qrcodes := await sync_to_async(lambda: list(islice(rows, chunk_size)))():
+        items = []
+        for qr in qrcodes:
+            _add_computed_fields(qr)
+            item = QRCodeSchema.model_validate(qr).model_dump()
+            items.append(json.dumps(item, cls=NinjaJSONEncoder))
+        yield separator + ','.join(items)
+        separator = ','
+    yield '[]' if separator == '[' else ']'
+
+
 @router.post('/', response={201: QRCodeSchema}, auth=AsyncJWTAuth())
 async def create_qrcode(request, payload: QRCodeCreateSchema):
     """Create a new QR code."""
@@ -69,18 +171,130 @@ async def create_qrcode(request, payload: QRCodeCreateSchema):
             qrcode.content = redirect_url
             await sync_to_async(qrcode.save)(update_fields=['content'])
 
-    # Generate QR code image
-    image_path = await QRCodeGenerator.generate_qr_code(qrcode)
-    qrcode.image_file = image_path
-    await sync_to_async(qrcode.save)(update_fields=['image_file'])
+    # The image is rendered lazily, on the first request to the image endpoint
 
     # Add computed fields (dynamic attributes for serialization)
-    qrcode.image_url = QRCodeGenerator.get_file_url(image_path)  # type: ignore[attr-defined]
+    qrcode.image_url = QRCodeGenerator.get_image_url(qrcode)  # type: ignore[attr-defined]
     qrcode.redirect_url = qrcode.get_redirect_url()  # type: ignore[attr-defined]
 
     return 201, qrcode
 
 
+@router.post('/bulk', response={400: dict}, auth=AsyncJWTAuth())
+async def bulk_create_qrcodes(request, render: bool = False):
+    """Create many QR codes in one request.
+
+    The body is a JSON array of ``QRCodeCreateSchema`` items, or one item per line when sent as
+    ``application/x-ndjson``. Items are inserted in batches of ``QR_CODE_BULK_BATCH_SIZE`` (one
+    ``bulk_create`` each) and, with ``render``, their images are rendered concurrently.
+
+    The response streams one ``QRCodeBulkResultSchema`` per line (NDJSON) as soon as the item's
+    batch is inserted, or its image rendered, so results within a batch may come out of order.
+    """
+    if request.content_type == NDJSON_CONTENT_TYPE:
+        items: Iterator[Any] = _ndjson_lines(request)
+    else:
+        try:
+            body = json.loads(await sync_to_async(request.read, thread_sensitive=False)())
+        except ValueError:
+            return 400, {'detail': 'Invalid JSON.'}
+        if not isinstance(body, list):
+            return 400, {'detail': f'Expected a JSON array, or {NDJSON_CONTENT_TYPE}.'}
+        if len(body) > settings.QR_CODE_BULK_MAX_ITEMS:
+            return 400, {'detail': f'At most {settings.QR_CODE_BULK_MAX_ITEMS} items.'}
+        items = iter(body)
+
+    return StreamingHttpResponse(
+        _bulk_results(request.auth, items, render), content_type=NDJSON_CONTENT_TYPE
+    )
+
+
+def _ndjson_lines(stream) -> Iterator[bytes]:
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def _qrcode_from_item(item: Any, user) -> QRCode:
+    """Validate one bulk item (decoded, or a raw NDJSON line) into an unsaved QRCode."""
+    if isinstance(item, bytes):
+        item = json.loads(item)
+    return build_qrcode(QRCodeCreateSchema.model_validate(item), user)
+
+
+def _result_line(index: int, qrcode: QRCode | None = None, error: str | None = None) -> str:
+    if qrcode is None:
+        result = QRCodeBulkResultSchema(index=index, error=error)
+    else:
+        result = QRCodeBulkResultSchema(
+            index=index,
+            id=qrcode.id,
+            short_code=qrcode.short_code,
+            image_url=QRCodeGenerator.get_image_url(qrcode),
+        )
+    return result.model_dump_json(exclude_none=True) + '\n'
+
+
+async def _bulk_results(user, items: Iterator[Any], render: bool) -> AsyncIterator[str]:
+    batch_size = settings.QR_CODE_BULK_BATCH_SIZE
+    index = 0
+    while True:
+        # NDJSON lines are read from the request body, off the event loop
+        raw_items = await sync_to_async(
+            lambda: list(islice(items, batch_size)), thread_sensitive=False
+        )()
+        if not raw_items:
+            return
+
+        indexes: dict[uuid.UUID, int] = {}
+        qrcodes = []
+        for raw_item in raw_items:
+            if index >= settings.QR_CODE_BULK_MAX_ITEMS:
+                yield _result_line(index, error=f'At most {settings.QR_CODE_BULK_MAX_ITEMS} items.')
+                return
+            try:
+                qrcode = _qrcode_from_item(raw_item, user)
+            except ValueError as exc:
+                yield _result_line(index, error=error_message(exc))
+            else:
+                indexes[qrcode.id] = index
+                qrcodes.append(qrcode)
+            index += 1
+
+        if not qrcodes:
+            continue
+        try:
+            await sync_to_async(insert_batch)(qrcodes)
+        except DatabaseError:
+            for qrcode in qrcodes:
+                yield _result_line(indexes[qrcode.id], error='Could not be saved.')
+            continue
+
+        if not render:
+            for qrcode in qrcodes:
+                yield _result_line(indexes[qrcode.id], qrcode)
+            continue
+
+        # A failed render doesn't fail the item: the code exists and renders lazily instead
+        async for qrcode, _ in render_batch(qrcodes):
+            yield _result_line(indexes[qrcode.id], qrcode)
+
+
+@router.get('/archive', auth=AsyncJWTAuth())
+async def archive_qrcodes(
+    request,
+    q: str = '',
+    qr_format: QRCodeFormat | None = Query(None, alias='format'),
+):
+    """Download the images of all your QR codes as a ZIP archive, with a manifest CSV.
+
+    ``q`` filters by name (like the dashboard search) and ``format`` by image format. The archive
+    is streamed as it is generated; codes without a stored image are rendered on the fly.
+    """
+    queryset = await sync_to_async(archive_queryset)(request.auth, q, qr_format)
+    return archive_response(queryset)
+
+
 @router.get('/{qr_id}', response=QRCodeSchema, auth=AsyncJWTAuth())
 async def retrieve_qrcode(request, qr_id: uuid.UUID):
     """Get details of a specific QR code."""
@@ -94,12 +308,112 @@ async def retrieve_qrcode(request, qr_id: uuid.UUID):
         return 404, {'detail': 'QR code not found.'}
 
     # Add computed fields (dynamic attributes for serialization)
-    qrcode.image_url = QRCodeGenerator.get_file_url(qrcode.image_file)  # type: ignore[attr-defined]
+    qrcode.image_url = QRCodeGenerator.get_image_url(qrcode)  # type: ignore[attr-defined]
     qrcode.redirect_url = qrcode.get_redirect_url()  # type: ignore[attr-defined]
 
     return qrcode
 
 
+@router.get('/{qr_id}/image', response={400: dict, 404: dict}, auth=AsyncJWTAuth())
+async def qrcode_image(
+    request,
+    qr_id: uuid.UUID,
+    qr_format: QRCodeFormat | None = Query(None, alias='format'),
+    scale: int | None = Query(None, ge=1),
+):
+    """Get the QR code image, optionally in another format or scale.
+
+    Variants are rendered on first request from the stored parameters and cached on disk.
+    Responses carry ``ETag`` and ``Last-Modified``, so clients can revalidate cheaply.
+    """
+    user = request.auth
+
+    if scale is not None and scale > settings.QR_CODE_IMAGE_MAX_SCALE:
+        return 400, {'detail': f'Scale must be at most {settings.QR_CODE_IMAGE_MAX_SCALE}.'}
+
+    try:
+        qrcode = await sync_to_async(QRCode.objects.get)(
+            id=qr_id, created_by=user, deleted_at__isnull=True
+        )
+    except QRCode.DoesNotExist:
+        return 404, {'detail': 'QR code not found.'}
+
+    return await serve_variant(request, qrcode, qr_format=qr_format, scale=scale)
+
+
+@router.post('/{qr_id}/export', response={200: QRCodeExportSchema, 404: dict}, auth=AsyncJWTAuth())
+async def export_qrcode(request, qr_id: uuid.UUID, payload: QRCodeExportRequestSchema):
+    """Generate image files of a QR code in several formats from a single encode."""
+    user = request.auth
+
+    try:
+        qrcode = await sync_to_async(QRCode.objects.get)(
+            id=qr_id, created_by=user, deleted_at__isnull=True
+        )
+    except QRCode.DoesNotExist:
+        return 404, {'detail': 'QR code not found.'}
+
+    artifacts = await QRCodeGenerator.generate_formats(qrcode, [f.value for f in payload.formats])
+
+    return {
+        'artifacts': [
+            {
+                'qr_format': artifact.qr_format,
+                'path': artifact.path,
+                'url': QRCodeGenerator.get_file_url(artifact.path),
+                'size': artifact.size,
+            }
+            for artifact in artifacts
+        ]
+    }
+
+
+@router.get(
+    '/{qr_id}/scans', response={200: QRCodeScansSchema, 400: dict, 404: dict}, auth=AsyncJWTAuth()
+)
+async def qrcode_scans(
+    request,
+    qr_id: uuid.UUID,
+    period: ScanPeriod = ScanPeriod.DAY,
+    start: datetime | None = None,
+    end: datetime | None = None,
+):
+    """Get the scans of a QR code per hour or day.
+
+    Read from pre-aggregated rollups only. Defaults to the last 48 hours or 30 days.
+    """
+    user = request.auth
+
+    # Times without an offset are in the server's time zone
+    end = timezone.now() if end is None else _aware(end)
+    start = end - DEFAULT_RANGES[period] if start is None else _aware(start)
+    if start >= end:
+        return 400, {'detail': 'start must be before end.'}
+    if (end - start) / PERIODS[period] > MAX_BUCKETS:
+        return 400, {'detail': f'The range spans more than {MAX_BUCKETS} {period.value}s.'}
+
+    exists = await sync_to_async(
+        QRCode.objects.filter(id=qr_id, created_by=user, deleted_at__isnull=True).exists
+    )()
+    if not exists:
+        return 404, {'detail': 'QR code not found.'}
+
+    series = await sync_to_async(scan_series)(qr_id, period, start, end)
+
+    return {
+        'id': qr_id,
+        'period': period,
+        'start': start,
+        'end': end,
+        'total': sum(count for _, count in series),
+        'buckets': [{'bucket': bucket, 'count': count} for bucket, count in series],
+    }
+
+
+def _aware(moment: datetime) -> datetime:
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
 @router.put('/{qr_id}', response=QRCodeSchema, auth=AsyncJWTAuth())
 async def update_qrcode(request, qr_id: uuid.UUID, payload: QRCodeUpdateSchema):
     """Update QR code (name only)."""
@@ -119,7 +433,7 @@ async def update_qrcode(request, qr_id: uuid.UUID, payload: QRCodeUpdateSchema):
         await sync_to_async(qrcode.save)(update_fields=['name'])
 
     # Add computed fields (dynamic attributes for serialization)
-    qrcode.image_url = QRCodeGenerator.get_file_url(qrcode.image_file)  # type: ignore[attr-defined]
+    qrcode.image_url = QRCodeGenerator.get_image_url(qrcode)  # type: ignore[attr-defined]
     qrcode.redirect_url = qrcode.get_redirect_url()  # type: ignore[attr-defined]
 
     return qrcode
@@ -148,8 +462,12 @@ async def delete_qrcode(request, qr_id: uuid.UUID):
 
 
 @router.post('/preview', response=QRCodePreviewSchema, auth=AsyncJWTAuth())
-async def preview_qrcode(request, payload: QRCodeCreateSchema):
-    """Generate a QR code image for preview without saving to DB."""
+async def preview_qrcode(request, payload: QRCodeCreateSchema, as_image: bool = False):
+    """Generate a QR code image for preview without saving to DB.
+
+    The image is rendered in memory and never written to ``MEDIA_ROOT``. It is returned as a
+    ``data:`` URI in ``image_url``, or as the raw image body when ``as_image`` is set.
+    """
     user = request.auth
 
     # Extract fields
@@ -169,11 +487,10 @@ async def preview_qrcode(request, payload: QRCodeCreateSchema):
             base_url = request.build_absolute_uri('/')
             content = f'{base_url}go/{short_code}/'
 
-    # Create temporary QR instance for preview
+    # Create temporary QR instance for preview (never saved)
     # Use model_dump() to extract pydantic fields
     payload_data = payload.model_dump(exclude={'url', 'data'})
     qr_instance = QRCode(
-        id=uuid.uuid4(),
         created_by=user,
         content=content,
         name=payload_data.get('name', 'Preview'),
@@ -185,10 +502,15 @@ async def preview_qrcode(request, payload: QRCodeCreateSchema):
         background_color=payload_data.get('background_color', '#FFFFFF'),
         foreground_color=payload_data.get('foreground_color', '#000000'),
         use_url_shortening=use_url_shortening,
-        image_file='preview.png',
     )
 
-    image_path = await QRCodeGenerator.generate_qr_code(qr_instance)
-    image_url = QRCodeGenerator.get_file_url(image_path)
+    image = await QRCodeGenerator.render_bytes(qr_instance)
+
+    if as_image:
+        return HttpResponse(
+            image,
+            content_type=QRCodeGenerator.content_type(qr_instance.qr_format),
+            headers={'Cache-Control': 'no-store'},
+        )
 
-    return {'image_url': image_url}
+    return {'image_url': QRCodeGenerator.to_data_uri(image, qr_instance.qr_format)}
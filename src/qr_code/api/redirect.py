@@ -1,32 +1,37 @@
 """Async redirect endpoint for shortened URLs."""
 
-from asgiref.sync import sync_to_async
 from django.http import HttpResponse
 from django.shortcuts import redirect
 from ninja import Router
 
-from src.qr_code.models import QRCode
+from src.qr_code.services.redirect_cache import get_redirect_cache
+from src.qr_code.services.scan_classifier import get_scan_classifier
+from src.qr_code.services.scan_counter import get_scan_counter
 
 router = Router()
 
 
-@router.get('/{short_code}', auth=None)
+@router.api_operation(['GET', 'HEAD'], '/{short_code}', auth=None)
 async def redirect_short_url(request, short_code: str):
     """Redirect endpoint for shortened URLs (public access)."""
-    try:
-        qrcode = await sync_to_async(QRCode.objects.get)(short_code=short_code)
-    except QRCode.DoesNotExist:
+    target = await get_redirect_cache().aresolve(short_code)
+    if target is None:
         return HttpResponse('QR Code not found', status=404)
 
     # Redirect to dashboard if QR code is soft-deleted
-    if qrcode.deleted_at:
+    if target.deleted:
         return redirect('dashboard')
 
-    # Increment scan count
-    await qrcode.aincrement_scan_count()
+    # Record the scan (buffered, written in batches), unless it is a preview, check or repeat
+    user_agent = request.headers.get('User-Agent', '')
+    peer = request.META.get('REMOTE_ADDR', '')
+    forwarded_for = request.headers.get('X-Forwarded-For', '')
+    classifier = get_scan_classifier()
+    if classifier.classify(short_code, request.method, user_agent, peer, forwarded_for) is None:
+        await get_scan_counter().arecord(target.id, user_agent=user_agent)
 
     # Redirect to original URL
-    if qrcode.original_url:
-        return redirect(qrcode.original_url)
+    if target.original_url:
+        return redirect(target.original_url)
 
     return HttpResponse('No redirect URL available for this QR code', status=400)
@@ -0,0 +1,132 @@
+"""
+ASGI fast path for short code redirects.
+
+Scans are the highest-volume traffic, and need neither sessions, CSRF, authentication nor
+messages. :class:`RedirectFastPath` wraps the Django ASGI application and answers ``GET`` and
+``HEAD /api/go/<short_code>`` itself, with the same redirect cache, scan classifier and scan
+counter as ``redirect_short_url``, skipping the middleware stack and the API router. Everything
+else, including redirects it can't answer as Django would, is passed to Django unchanged.
+
+Codes cached in this process are answered with no I/O at all. Other lookups run between Django's
+``request_started`` and ``request_finished`` signals, so database connections are managed as for
+any other request.
+"""
+
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core import signals
+from django.urls import reverse
+from django.utils.encoding import iri_to_uri
+
+from .services.redirect_cache import RedirectTarget, get_redirect_cache
+from .services.scan_classifier import get_scan_classifier
+from .services.scan_counter import get_scan_counter
+
+# Path of the redirect endpoint, as mounted in ``api.router``
+REDIRECT_PREFIX = '/api/go/'
+
+# Schemes ``HttpResponseRedirect`` accepts; other targets are left to Django
+ALLOWED_SCHEMES = {'', 'http', 'https', 'ftp'}
+
+type Scope = dict[str, Any]
+type Receive = Callable[[], Awaitable[Mapping[str, Any]]]
+type Send = Callable[[Mapping[str, Any]], Awaitable[None]]
+type ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class RedirectFastPath:
+    """ASGI application serving short code redirects, delegating everything else to ``app``."""
+
+    def __init__(self, app: ASGIApp, prefix: str = REDIRECT_PREFIX):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        short_code = self._short_code(scope)
+        if short_code is None or not await self._redirect(scope, short_code, send):
+            await self.app(scope, receive, send)
+
+    def _short_code(self, scope: Scope) -> str | None:
+        """The short code requested by ``scope``, if it is a redirect request."""
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            return None
+        path = scope['path']
+        if not path.startswith(self.prefix):
+            return None
+        short_code = path[len(self.prefix) :]
+        return short_code if short_code and '/' not in short_code else None
+
+    async def _redirect(self, scope: Scope, short_code: str, send: Send) -> bool:
+        """Answer the redirect of ``short_code``; return ``False`` to leave it to Django."""
+        cache = get_redirect_cache()
+        counter = get_scan_counter()
+
+        # Nothing to read or write: skip the request signals too
+        target = cache.get_cached(short_code) if counter.buffered else None
+        if target is not None:
+            return await self._respond(scope, short_code, target, send)
+
+        await signals.request_started.asend(sender=self.__class__, scope=scope)
+        try:
+            target = await cache.aresolve(short_code)
+            if target is None:
+                await _send(send, 404, b'QR Code not found', method=scope['method'])
+                return True
+            return await self._respond(scope, short_code, target, send)
+        finally:
+            await signals.request_finished.asend(sender=self.__class__)
+
+    async def _respond(
+        self, scope: Scope, short_code: str, target: RedirectTarget, send: Send
+    ) -> bool:
+        if target.deleted:
+            await _send(send, 302, location=reverse('dashboard'), method=scope['method'])
+            return True
+
+        if target.original_url and urlsplit(target.original_url).scheme not in ALLOWED_SCHEMES:
+            return False
+
+        user_agent = _header(scope, b'user-agent')
+        peer = scope['client'][0] if scope.get('client') else ''
+        forwarded_for = _header(scope, b'x-forwarded-for')
+        method = scope['method']
+        classifier = get_scan_classifier()
+        if classifier.classify(short_code, method, user_agent, peer, forwarded_for) is None:
+            await get_scan_counter().arecord(target.id, user_agent=user_agent)
+
+        if target.original_url:
+            await _send(send, 302, location=iri_to_uri(target.original_url), method=method)
+        else:
+            await _send(send, 400, b'No redirect URL available for this QR code', method=method)
+        return True
+
+
+def _header(scope: Scope, name: bytes) -> str:
+    headers: list[tuple[bytes, bytes]] = scope['headers']
+    for key, value in headers:
+        if key == name:
+            return value.decode('latin-1')
+    return ''
+
+
+async def _send(
+    send: Send, status: int, body: bytes = b'', location: str | None = None, method: str = 'GET'
+):
+    headers: list[tuple[bytes, bytes]] = [
+        (b'content-type', b'text/html; charset=utf-8'),
+        (b'content-length', str(len(body)).encode()),
+        (b'x-content-type-options', b'nosniff'),
+    ]
+    # As SecurityMiddleware sets it
+    policy = settings.SECURE_REFERRER_POLICY
+    if policy:
+        values = policy.split(',') if isinstance(policy, str) else policy
+        headers.append((b'referrer-policy', ','.join(v.strip() for v in values).encode()))
+    if location is not None:
+        headers.append((b'location', location.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    # Responses to HEAD carry the headers of the GET response, without its body
+    await send({'type': 'http.response.body', 'body': b'' if method == 'HEAD' else body})
@@ -13,6 +13,7 @@ from .services.email_service import (
     EMAIL_BACKEND_KIND_TO_CLASS,
     parse_email_backend_kinds,
 )
+from .services.redirect_cache import process_local_cache
 
 
 @register()
@@ -90,3 +91,95 @@ def check_email_backends(*args, **kwargs):
         )
 
     return checks
+
+
+@register()
+def check_render_settings(*args, **kwargs):
+    checks: list[Error] = []
+
+    backend = getattr(settings, 'QR_CODE_PNG_BACKEND', 'segno')
+    if backend not in ('segno', 'numpy'):
+        checks.append(
+            Error(
+                f'Unknown QR_CODE_PNG_BACKEND: {backend!r}',
+                hint='Valid backends: segno, numpy',
+                id='E020',
+            )
+        )
+
+    writer = getattr(settings, 'QR_CODE_SVG_WRITER', 'segno')
+    if writer not in ('segno', 'compact'):
+        checks.append(
+            Error(
+                f'Unknown QR_CODE_SVG_WRITER: {writer!r}',
+                hint='Valid writers: segno, compact',
+                id='E022',
+            )
+        )
+
+    accel = getattr(settings, 'QR_CODE_MEDIA_ACCEL', '')
+    if accel not in ('', 'nginx', 'sendfile'):
+        checks.append(
+            Error(
+                f'Unknown QR_CODE_MEDIA_ACCEL: {accel!r}',
+                hint='Valid values: nginx, sendfile, or empty to serve files directly',
+                id='E023',
+            )
+        )
+
+    layout = getattr(settings, 'QR_CODE_MEDIA_LAYOUT', 'sharded')
+    if layout not in ('flat', 'sharded'):
+        checks.append(
+            Error(
+                f'Unknown QR_CODE_MEDIA_LAYOUT: {layout!r}',
+                hint='Valid layouts: flat, sharded',
+                id='E024',
+            )
+        )
+
+    level = getattr(settings, 'QR_CODE_PNG_COMPRESSLEVEL', 9)
+    if not 0 <= level <= 9:
+        checks.append(
+            Error(
+                f'QR_CODE_PNG_COMPRESSLEVEL must be between 0 and 9, got {level}.',
+                id='E021',
+            )
+        )
+
+    return checks
+
+
+@register()
+def check_redirect_cache(*args, **kwargs):
+    checks: list[Warning | Error] = []
+
+    if not process_local_cache():
+        return checks
+
+    index_path = getattr(settings, 'QR_CODE_REDIRECT_INDEX_PATH', '')
+    if index_path and getattr(settings, 'QR_CODE_REDIRECT_INDEX_MAX_AGE', 0) > 0:
+        checks.append(
+            Error(
+                'QR_CODE_REDIRECT_INDEX_PATH needs a Django cache shared by all workers: codes '
+                'changed since the index was built are marked in it, and other workers would '
+                'keep redirecting to their old targets.',
+                hint='Configure CACHES with a shared backend (e.g. Redis or Memcached), or '
+                'unset QR_CODE_REDIRECT_INDEX_PATH.',
+                id='E030',
+            )
+        )
+
+    # A single development server has one process, so its cache is as good as shared
+    if getattr(settings, 'QR_CODE_REDIRECT_SHARED_CACHE_TTL', 0) > 0 and not settings.DEBUG:
+        checks.append(
+            Warning(
+                'The redirect cache\'s shared level uses a Django cache private to each worker: '
+                'other workers keep redirecting to the old target of a changed code for up to '
+                'QR_CODE_REDIRECT_SHARED_CACHE_TTL seconds.',
+                hint='Configure CACHES with a shared backend (e.g. Redis or Memcached), or set '
+                'QR_CODE_REDIRECT_SHARED_CACHE_TTL=0.',
+                id='W030',
+            )
+        )
+
+    return checks
@@ -0,0 +1,48 @@
+"""
+Bloom filter of strings.
+
+Sized from the expected number of items and the target false-positive rate. The bit positions of
+an item come from one BLAKE2b digest, split into two hashes combined as ``h1 + i * h2``
+(Kirsch-Mitzenmacher), so adding or testing an item costs a single hash.
+
+This module is Django-free.
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Set of strings answering membership with no false negatives and tunable false positives."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        if not 0 < error_rate < 1:
+            raise ValueError(f'Error rate must be between 0 and 1: {error_rate}')
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        """Add ``item``."""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item)
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
@@ -0,0 +1,69 @@
+"""
+Precompressed siblings of text-based images.
+
+SVGs compress very well, so next to ``name.svg`` we keep ``name.svgz`` (gzip) and ``name.svg.br``
+(Brotli). The media view hands them out to clients whose ``Accept-Encoding`` allows it, so
+compression is paid once at generation time instead of on every request.
+
+This module is Django-free.
+"""
+
+import gzip
+import os
+import tempfile
+from pathlib import Path
+
+import brotli
+
+# Preferred first
+ENCODINGS = ('br', 'gzip')
+
+
+def sibling_path(path: Path, encoding: str) -> Path:
+    """Path of the ``encoding``-compressed sibling of ``path``."""
+    if encoding == 'gzip':
+        # Conventional name of gzipped SVGs, recognized by `mimetypes` as image/svg+xml + gzip
+        return path.with_name(f'{path.name}z')
+    return path.with_name(f'{path.name}.br')
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress ``data`` with maximum effort (done once per file)."""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output deterministic
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    compressed: bytes = brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+    return compressed
+
+
+def write_siblings(path: Path, data: bytes):
+    """Write the compressed siblings of ``path``, whose content is ``data``."""
+    for encoding in ENCODINGS:
+        target = sibling_path(path, encoding)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compress(data, encoding))
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+def accepted_encodings(accept_encoding: str) -> list[str]:
+    """Return the supported encodings allowed by an ``Accept-Encoding`` header, preferred first."""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        name, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    default = qualities.get('*', 0.0)
+    return [encoding for encoding in ENCODINGS if qualities.get(encoding, default) > 0]
@@ -0,0 +1,112 @@
+"""
+Vectorized PNG writer for QR code matrices.
+
+segno's PNG writer builds every scanline pixel by pixel in Python, which dominates render time for
+large scale factors. This writer upscales the module matrix with NumPy and emits an indexed-color
+(palette) PNG whose pixels decode to the same modules.
+
+Like the rest of :mod:`src.qr_code.common`, this module is Django-free.
+"""
+
+import struct
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Palette indices
+LIGHT = 0
+DARK = 1
+
+# PNG filter types, see <https://www.w3.org/TR/png/#9Filter-types>
+FILTER_NONE = 0
+FILTER_UP = 2
+
+
+@dataclass(frozen=True, slots=True)
+class PngOptions:
+    """Options of the vectorized PNG writer."""
+
+    compresslevel: int = 9
+    one_bit: bool = True
+
+
+def _chunk(name: bytes, data: bytes) -> bytes:
+    head = name + data
+    return struct.pack('>I', len(data)) + head + struct.pack('>I', zlib.crc32(head))
+
+
+def _rgb(color: str) -> bytes:
+    """Convert a normalized ``#rrggbb`` color to its three bytes."""
+    if len(color) != 7 or not color.startswith('#'):
+        raise ValueError(f'Unsupported color for the PNG writer: {color!r}')
+    return bytes.fromhex(color[1:])
+
+
+def write_png(
+    modules: np.ndarray,
+    scale: int,
+    border: int,
+    dark: str | None,
+    light: str | None,
+    options: PngOptions = PngOptions(),
+) -> bytes:
+    """Serialize a matrix of modules (``1`` = dark) as a palette PNG.
+
+    Args:
+        modules: 2D ``uint8`` array of ``0``/``1`` modules, without quiet zone.
+        scale: Pixels per module.
+        border: Quiet zone size, in modules.
+        dark: Normalized ``#rrggbb`` color of dark modules, or ``None`` for transparent.
+        light: Normalized ``#rrggbb`` color of light modules, or ``None`` for transparent.
+        options: Compression level and bit depth.
+    """
+    if scale < 1:
+        raise ValueError('The scale must be a positive integer')
+    if border < 0:
+        raise ValueError('The border must not be negative')
+
+    padded = np.pad(modules.astype(np.uint8, copy=False), border, constant_values=LIGHT)
+    # Horizontal upscaling only: vertically repeated pixel rows are encoded with the "Up" filter
+    # (all-zero scanlines), which is cheaper to build and compresses to almost nothing.
+    rows = np.repeat(padded, scale, axis=1)
+    height = padded.shape[0] * scale
+    width = rows.shape[1]
+
+    if options.one_bit:
+        pixels = np.packbits(rows, axis=1)
+        bit_depth = 1
+    else:
+        pixels = rows
+        bit_depth = 8
+
+    scanlines = np.zeros((padded.shape[0], scale, 1 + pixels.shape[1]), dtype=np.uint8)
+    scanlines[:, 0, 0] = FILTER_NONE
+    scanlines[:, 0, 1:] = pixels
+    scanlines[:, 1:, 0] = FILTER_UP
+
+    palette = [
+        _rgb(light) if light is not None else b'\xff\xff\xff',
+        _rgb(dark) if dark is not None else b'\x00\x00\x00',
+    ]
+    alpha = bytes([0 if light is None else 255, 0 if dark is None else 255])
+
+    header = struct.pack('>2I5B', width, height, bit_depth, 3, 0, 0, 0)
+    parts = [
+        PNG_SIGNATURE,
+        _chunk(b'IHDR', header),
+        _chunk(b'PLTE', b''.join(palette)),
+    ]
+    if alpha != b'\xff\xff':
+        parts.append(_chunk(b'tRNS', alpha.rstrip(b'\xff')))
+    parts.append(_chunk(b'IDAT', zlib.compress(scanlines.tobytes(), options.compresslevel)))
+    parts.append(_chunk(b'IEND', b''))
+    return b''.join(parts)
+
+
+def unpack_modules(bits: bytes, width: int, height: int) -> np.ndarray:
+    """Unpack a bit-packed matrix (rows padded to whole bytes) into a 2D array of modules."""
+    packed = np.frombuffer(bits, dtype=np.uint8).reshape(height, -1)
+    return np.unpackbits(packed, axis=1)[:, :width]
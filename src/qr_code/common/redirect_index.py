@@ -0,0 +1,141 @@
+"""
+Compiled, memory-mapped index of redirect targets.
+
+The file holds fixed-size records sorted by short code, followed by the target URLs:
+
+- a header: magic, format version, key size, record count and build time (Unix seconds);
+- one record per code: the code (NUL-padded to ``KEY_SIZE`` bytes), the QR code id, the offset and
+  length of its URL, and flags;
+- the UTF-8 URLs, back to back.
+
+Readers map the file read-only and binary search the records, so lookups read a few pages that
+the operating system shares between all processes mapping the same file. Files are written to a
+temporary path and renamed over the old one, so a reader never sees a partial file; readers that
+still map the old file keep a consistent snapshot.
+
+This module is Django-free.
+"""
+
+import mmap
+import os
+import struct
+import uuid
+from collections.abc import Iterable, Iterator
+
+MAGIC = b'QRRI'
+VERSION = 1
+# Longest short code stored; longer codes are left out
+KEY_SIZE = 16
+
+HEADER = struct.Struct('<4sHHQd')
+RECORD = struct.Struct(f'<{KEY_SIZE}s16sQIB3x')
+
+# Record flags
+DELETED = 1
+HAS_URL = 2
+
+# A target: QR code id, URL and whether the code is soft-deleted
+Entry = tuple[uuid.UUID, str | None, bool]
+
+
+def _key(short_code: str) -> bytes | None:
+    """Padded record key of ``short_code``, or ``None`` if it can't be stored."""
+    if not short_code.isascii() or not 0 < len(short_code) <= KEY_SIZE:
+        return None
+    return short_code.encode().ljust(KEY_SIZE, b'\0')
+
+
+def write_index(
+    path: str | os.PathLike, entries: Iterable[tuple[str, Entry]], built_at: float
+) -> int:
+    """Write ``(short_code, entry)`` pairs to the index file at ``path``; return the count written.
+
+    The file is replaced atomically.
+    """
+    records = sorted(
+        (key, entry) for short_code, entry in entries if (key := _key(short_code)) is not None
+    )
+    tmp_path = f'{os.fspath(path)}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as fh:
+            fh.write(HEADER.pack(MAGIC, VERSION, KEY_SIZE, len(records), built_at))
+            urls = []
+            offset = 0
+            for key, (qr_id, url, deleted) in records:
+                data = url.encode() if url is not None else b''
+                flags = (DELETED if deleted else 0) | (HAS_URL if url is not None else 0)
+                fh.write(RECORD.pack(key, qr_id.bytes, offset, len(data), flags))
+                urls.append(data)
+                offset += len(data)
+            for data in urls:
+                fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(records)
+
+
+class RedirectIndex:
+    """Read-only view of an index file, mapped into memory."""
+
+    def __init__(self, path: str | os.PathLike):
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f'Not a redirect index: {path}')
+        magic, version, key_size, count, built_at = HEADER.unpack_from(self._map)
+        self.count: int = count
+        self.built_at: float = built_at
+        if magic != MAGIC or version != VERSION or key_size != KEY_SIZE:
+            raise ValueError(f'Not a redirect index of version {VERSION}: {path}')
+        self._urls = HEADER.size + self.count * RECORD.size
+        if len(self._map) < self._urls:
+            raise ValueError(f'Truncated redirect index: {path}')
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._map)
+
+    def _key_at(self, index: int) -> bytes:
+        start = HEADER.size + index * RECORD.size
+        return self._map[start : start + KEY_SIZE]
+
+    def _entry_at(self, index: int) -> Entry:
+        _, qr_id, offset, length, flags = RECORD.unpack_from(
+            self._map, HEADER.size + index * RECORD.size
+        )
+        url = None
+        if flags & HAS_URL:
+            start = self._urls + offset
+            url = self._map[start : start + length].decode()
+        return uuid.UUID(bytes=qr_id), url, bool(flags & DELETED)
+
+    def get(self, short_code: str) -> Entry | None:
+        """Return the target of ``short_code``, or ``None`` if it isn't in the index."""
+        key = _key(short_code)
+        if key is None:
+            return None
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._key_at(low) == key:
+            return self._entry_at(low)
+        return None
+
+    def __iter__(self) -> Iterator[tuple[str, Entry]]:
+        for index in range(self.count):
+            yield self._key_at(index).rstrip(b'\0').decode(), self._entry_at(index)
+
+    def close(self):
+        self._map.close()
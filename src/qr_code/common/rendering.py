@@ -0,0 +1,167 @@
+"""
+Render specifications for QR code images.
+
+This module is intentionally Django-free: it is imported by render pool worker processes, which
+don't set up Django.
+"""
+
+import hashlib
+import io
+import json
+import os
+from dataclasses import asdict, dataclass
+
+import segno
+from segno import writers
+
+# Public segno functions, but left out of `segno.writers.__all__`, which mypy honors
+from segno.writers import color_to_rgb_hex  # type: ignore[attr-defined]
+
+from .png import PngOptions, unpack_modules, write_png
+from .svg import write_svg
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf',
+}
+
+
+def normalize_color(color: str | None) -> str | None:
+    """Normalize a color value so equivalent spellings produce the same render.
+
+    ``None`` and ``'transparent'`` map to ``None`` (transparent modules). Web color names and
+    ``#RGB``/``#RRGGBB`` values map to lowercase ``#rrggbb``. Anything segno can't parse is
+    returned lowercased and stripped, and left for segno to reject at render time.
+    """
+    if color is None:
+        return None
+    value = color.strip().lower()
+    if value == 'transparent':
+        return None
+    try:
+        return str(color_to_rgb_hex(value))
+    except ValueError:
+        return value
+
+
+@dataclass(frozen=True, slots=True)
+class RenderSpec:
+    """Everything that determines the bytes of a rendered QR code image."""
+
+    content: str
+    error: str
+    scale: int
+    border: int
+    dark: str | None
+    light: str | None
+    kind: str
+    # PNG writer options; ``None`` renders PNGs with segno's own writer
+    png: PngOptions | None = None
+    # Write SVGs with the compact writer instead of segno's
+    compact_svg: bool = False
+
+    @property
+    def cache_key(self) -> str:
+        """Canonical hash of the spec, used to content-address rendered images."""
+        canonical = json.dumps(asdict(self), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedMatrix:
+    """A QR code module matrix, bit-packed (one bit per module, rows padded to whole bytes).
+
+    This is everything encoding produces (version selection, Reed-Solomon, masking); scale,
+    border and colors only matter when the matrix is serialized.
+    """
+
+    width: int
+    height: int
+    bits: bytes
+
+    @classmethod
+    def from_matrix(cls, matrix: tuple[bytearray, ...]) -> 'EncodedMatrix':
+        """Pack a segno matrix (rows of ``0``/``1`` values)."""
+        width = len(matrix[0])
+        packed = bytearray()
+        for row in matrix:
+            for start in range(0, width, 8):
+                chunk = row[start : start + 8]
+                byte = 0
+                for module in chunk:
+                    byte = (byte << 1) | (module & 1)
+                packed.append(byte << (8 - len(chunk)))
+        return cls(width=width, height=len(matrix), bits=bytes(packed))
+
+    def to_matrix(self) -> tuple[bytearray, ...]:
+        """Unpack into a segno-compatible matrix."""
+        row_bytes = (self.width + 7) // 8
+        rows = []
+        for y in range(self.height):
+            packed = self.bits[y * row_bytes : (y + 1) * row_bytes]
+            row = bytearray(self.width)
+            for x in range(self.width):
+                row[x] = (packed[x >> 3] >> (7 - (x & 7))) & 1
+            rows.append(row)
+        return tuple(rows)
+
+
+def encode(content: str, error: str, micro: bool = False) -> EncodedMatrix:
+    """Encode ``content`` into a bit-packed module matrix."""
+    qr = segno.make(content, error=error, micro=micro)
+    return EncodedMatrix.from_matrix(qr.matrix)
+
+
+def rasterize(matrix: EncodedMatrix, spec: RenderSpec) -> bytes:
+    """Serialize an already encoded matrix with the style and format from ``spec``."""
+    if spec.kind == 'png' and spec.png is not None:
+        return write_png(
+            unpack_modules(matrix.bits, matrix.width, matrix.height),
+            scale=spec.scale,
+            border=spec.border,
+            dark=spec.dark,
+            light=spec.light,
+            options=spec.png,
+        )
+
+    if spec.kind == 'svg' and spec.compact_svg:
+        return write_svg(matrix.to_matrix(), spec.scale, spec.border, spec.dark, spec.light)
+
+    out = io.BytesIO()
+    writers.save(  # type: ignore[attr-defined]
+        matrix.to_matrix(),
+        (matrix.width, matrix.height),
+        out,
+        kind=spec.kind,
+        scale=spec.scale,
+        border=spec.border,
+        dark=spec.dark,
+        light=spec.light,
+    )
+    return out.getvalue()
+
+
+def encode_and_rasterize(spec: RenderSpec) -> tuple[EncodedMatrix, bytes]:
+    """Encode and serialize ``spec``, also returning the matrix so callers can cache it."""
+    matrix = encode(spec.content, spec.error)
+    return matrix, rasterize(matrix, spec)
+
+
+def render(spec: RenderSpec) -> bytes:
+    """Encode and serialize a QR code described by ``spec``."""
+    return encode_and_rasterize(spec)[1]
+
+
+def warm_up():
+    """Initialize a render worker process.
+
+    Imports segno and runs one throwaway encode so the first real render doesn't pay for lazy
+    imports and table setup.
+    """
+    render(RenderSpec('warm-up', 'M', 1, 0, '#000000', '#ffffff', 'png'))
+
+
+def worker_pid() -> int:
+    """Return the current process id (used to force and check worker start-up)."""
+    return os.getpid()
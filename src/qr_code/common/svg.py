@@ -0,0 +1,110 @@
+"""
+Compact SVG serialization of QR code matrices.
+
+Dark modules are drawn as one horizontal stroke per run of adjacent modules, using relative moves
+and integer coordinates (except the first move), which keeps path data short.
+
+This module is Django-free.
+"""
+
+from xml.sax.saxutils import quoteattr
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if value == int(value) else str(value)
+
+
+def short_color(color: str) -> str:
+    """Shorten ``#rrggbb`` to ``#rgb`` when lossless."""
+    if len(color) == 7 and color[0] == '#' and color[1::2] == color[2::2]:
+        return '#' + color[1::2]
+    return color
+
+
+def path_data(matrix: tuple[bytearray, ...], border: int) -> str:
+    """Return path data drawing the dark modules of ``matrix`` as unit-width strokes.
+
+    Strokes run through the middle of each row (``y + 0.5``), so the path must be drawn with
+    ``stroke-width="1"`` (the SVG default) and no fill.
+    """
+    parts: list[str] = []
+    pen_x, pen_y = 0.0, 0.0
+    for y, row in enumerate(matrix):
+        width = len(row)
+        x = 0
+        while x < width:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < width and row[x]:
+                x += 1
+            run_x, run_y = start + border, y + border + 0.5
+            move = 'm' if parts else 'M'
+            parts.append(f'{move}{_num(run_x - pen_x)} {_num(run_y - pen_y)}h{x - start}')
+            pen_x, pen_y = run_x + x - start, run_y
+    return ''.join(parts)
+
+
+def symbol(
+    symbol_id: str,
+    matrix: tuple[bytearray, ...],
+    border: int,
+    dark: str | None,
+    light: str | None,
+) -> str:
+    """Return a ``<symbol>`` element of ``matrix``, to be referenced with ``<use href="#id">``.
+
+    ``None`` colors are transparent.
+    """
+    width = len(matrix[0]) + 2 * border
+    height = len(matrix) + 2 * border
+    parts = [f'<symbol id={quoteattr(symbol_id)} viewBox="0 0 {width} {height}">']
+    if light is not None:
+        parts.append(
+            f'<rect width="{width}" height="{height}" fill={quoteattr(short_color(light))}/>'
+        )
+    if dark is not None:
+        parts.append(
+            f'<path stroke={quoteattr(short_color(dark))} d="{path_data(matrix, border)}"/>'
+        )
+    parts.append('</symbol>')
+    return ''.join(parts)
+
+
+def write_svg(
+    matrix: tuple[bytearray, ...],
+    scale: int,
+    border: int,
+    dark: str | None,
+    light: str | None,
+) -> bytes:
+    """Serialize ``matrix`` as a minimal standalone SVG document.
+
+    Compared to segno's default output: no XML declaration, no class attributes, the scale is
+    expressed by ``width``/``height`` against a module-unit ``viewBox`` instead of a transform,
+    and colors use their shortest form. ``None`` colors are transparent.
+    """
+    width = len(matrix[0]) + 2 * border
+    height = len(matrix) + 2 * border
+    parts = [
+        f'<svg xmlns="{SVG_NS}" width="{width * scale}" height="{height * scale}"'
+        f' viewBox="0 0 {width} {height}">'
+    ]
+    if light is not None:
+        parts.append(
+            f'<rect width="{width}" height="{height}" fill={quoteattr(short_color(light))}/>'
+        )
+    if dark is not None:
+        parts.append(
+            f'<path stroke={quoteattr(short_color(dark))} d="{path_data(matrix, border)}"/>'
+        )
+    parts.append('</svg>')
+    return ''.join(parts).encode('utf-8')
+
+
+def sprite(symbols: list[str]) -> str:
+    """Wrap ``<symbol>`` elements into a standalone SVG sprite document."""
+    return f'<svg xmlns="{SVG_NS}">{"".join(symbols)}</svg>'
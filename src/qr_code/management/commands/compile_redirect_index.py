@@ -0,0 +1,43 @@
+"""Management command for compiling the memory-mapped redirect index.
+
+Workers read the index at ``QR_CODE_REDIRECT_INDEX_PATH`` before the database. The file is
+replaced atomically, and workers pick up the new one within seconds. Run this more often than
+``QR_CODE_REDIRECT_INDEX_MAX_AGE``, e.g. every few minutes from cron; each run only re-reads the
+rows updated since the previous one, unless ``--full`` is given.
+"""
+
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ...services.redirect_index import compile_redirect_index
+
+
+class Command(BaseCommand):
+    """Write all short codes and their targets to the redirect index file."""
+
+    help = 'Compiles short codes and target URLs into the memory-mapped redirect index.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--output',
+            default=settings.QR_CODE_REDIRECT_INDEX_PATH,
+            help='Index file (default: QR_CODE_REDIRECT_INDEX_PATH).',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild from all rows instead of updating the existing index.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        path = options['output']
+        if not path:
+            raise CommandError('No index file: set QR_CODE_REDIRECT_INDEX_PATH or pass --output')
+
+        written, read = compile_redirect_index(path, full=options['full'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {written} short code(s) to {path} ({read} row(s) read).')
+        )
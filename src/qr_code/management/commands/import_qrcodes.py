@@ -0,0 +1,203 @@
+"""Management command for importing QR codes from a CSV or NDJSON file.
+
+Rows are streamed from the file, validated against ``QRCodeCreateSchema`` and inserted in
+transactional batches. With ``--render``, their images are rendered on the render process pool.
+
+Progress is checkpointed after each committed batch (by default to ``<file>.checkpoint``), so an
+interrupted import run again with the same arguments resumes after the last committed batch. Row
+ids are derived from the import and the row number, so rows committed just before an interruption
+are recognized and not inserted twice.
+"""
+
+import csv
+import json
+import os
+import time
+import uuid
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ...models import QRCode, User
+from ...schemas import QRCodeCreateSchema
+from ...services.bulk import build_qrcode, error_message, insert_batch, render_batch
+from ...services.render_pool import shutdown_render_pool, start_render_pool
+
+
+def _read_rows(path: Path, file_format: str, offset: int) -> Iterator[tuple[int, Any]]:
+    """Yield ``(file offset after the row, row)`` for the rows of ``path`` from ``offset`` on.
+
+    CSV rows are dicts keyed by the header (empty cells left out, so defaults apply); NDJSON rows
+    are raw lines, decoded by the caller.
+    """
+    with open(path, 'rb') as f:
+        position = 0
+
+        def lines() -> Iterator[str]:
+            nonlocal position
+            for line in iter(f.readline, b''):
+                encoding = 'utf-8-sig' if position == 0 else 'utf-8'
+                position += len(line)
+                yield line.decode(encoding)
+
+        if file_format == 'csv':
+            header = next(csv.reader(lines()), None)
+            if header is None:
+                return
+            header = [name.strip() for name in header]
+            if offset > position:
+                f.seek(offset)
+                position = offset
+            # csv.reader pulls one line at a time, so `position` is exact after each record
+            for record in csv.reader(lines()):
+                if any(record):
+                    yield position, {name: value for name, value in zip(header, record) if value}
+        else:
+            f.seek(offset)
+            position = offset
+            for line in lines():
+                if line.strip():
+                    yield position, line
+
+
+class Command(BaseCommand):
+    """Import QR codes from a CSV or NDJSON file."""
+
+    help = 'Imports QR codes from a CSV or NDJSON file, in resumable transactional batches.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('file', type=Path, help='CSV (with a header row) or NDJSON file.')
+        parser.add_argument('--user', required=True, help='Email of the owner of the codes.')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            dest='file_format',
+            help='File format (default: from the file extension).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.QR_CODE_BULK_BATCH_SIZE,
+            help='Rows inserted per transaction.',
+        )
+        parser.add_argument(
+            '--render', action='store_true', help='Render images (otherwise rendered lazily).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Render processes used with --render.',
+        )
+        parser.add_argument(
+            '--checkpoint', type=Path, help='Checkpoint file (default: <file>.checkpoint).'
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint.')
+
+    def handle(self, *args: object, **options: Any) -> None:
+        path: Path = options['file']
+        if not path.is_file():
+            raise CommandError(f'File not found: {path}')
+        file_format = options['file_format'] or (
+            'csv' if path.suffix.lower() == '.csv' else 'ndjson'
+        )
+        checkpoint_path: Path = options['checkpoint'] or path.with_name(f'{path.name}.checkpoint')
+
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]!r}')
+
+        state = self._load_checkpoint(checkpoint_path, user, options['restart'])
+        if state['rows']:
+            self.stdout.write(f'Resuming after row {state["rows"]} (offset {state["offset"]}).')
+        import_id = uuid.UUID(state['import_id'])
+
+        render = options['render']
+        if render:
+            start_render_pool(options['workers'])
+
+        rows = _read_rows(path, file_format, state['offset'])
+        started, processed = time.monotonic(), 0
+        try:
+            while batch := list(islice(rows, options['batch_size'])):
+                qrcodes = []
+                for _, row in batch:
+                    state['rows'] += 1
+                    try:
+                        item = json.loads(row) if isinstance(row, str) else row
+                        qrcode = build_qrcode(QRCodeCreateSchema.model_validate(item), user)
+                    except ValueError as exc:
+                        state['failed'] += 1
+                        self.stderr.write(f'Row {state["rows"]}: {error_message(exc)}')
+                        continue
+                    qrcode.id = uuid.uuid5(import_id, str(state['rows']))
+                    qrcodes.append(qrcode)
+
+                # Rows of a batch committed before an interruption, but not checkpointed
+                existing = set(
+                    QRCode.objects.filter(id__in=[qr.id for qr in qrcodes]).values_list(
+                        'id', flat=True
+                    )
+                )
+                qrcodes = [qr for qr in qrcodes if qr.id not in existing]
+                insert_batch(qrcodes)
+                if render:
+                    async_to_sync(self._render)(qrcodes)
+
+                state['created'] += len(qrcodes)
+                state['offset'] = batch[-1][0]
+                self._save_checkpoint(checkpoint_path, state)
+
+                processed += len(batch)
+                rate = processed / max(time.monotonic() - started, 1e-9)
+                self.stdout.write(
+                    f'{state["rows"]} row(s): {state["created"]} created, '
+                    f'{state["failed"]} failed ({rate:.0f} rows/s)'
+                )
+        finally:
+            if render:
+                shutdown_render_pool()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {state["created"]} QR code(s) from {state["rows"]} row(s), '
+                f'{state["failed"]} failed; {processed} row(s) in {elapsed:.1f}s '
+                f'({processed / max(elapsed, 1e-9):.0f} rows/s).'
+            )
+        )
+
+    async def _render(self, qrcodes: list[QRCode]):
+        async for qrcode, error in render_batch(qrcodes):
+            if error is not None:
+                # The code is saved; its image will be rendered on first request instead
+                self.stderr.write(f'Could not render {qrcode.id}: {error}')
+
+    def _load_checkpoint(self, checkpoint_path: Path, user: User, restart: bool) -> dict:
+        if checkpoint_path.exists() and not restart:
+            state: dict = json.loads(checkpoint_path.read_text())
+            if state['user_id'] != user.pk:
+                raise CommandError(
+                    f'{checkpoint_path} belongs to an import for another user; use --restart.'
+                )
+            return state
+        return {
+            'import_id': str(uuid.uuid4()),
+            'user_id': user.pk,
+            'offset': 0,
+            'rows': 0,
+            'created': 0,
+            'failed': 0,
+        }
+
+    def _save_checkpoint(self, checkpoint_path: Path, state: dict):
+        # Atomic replace: a crash leaves either the previous or the new checkpoint
+        tmp_path = checkpoint_path.with_name(f'.{checkpoint_path.name}.tmp')
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, checkpoint_path)
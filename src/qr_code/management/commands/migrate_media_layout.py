@@ -0,0 +1,117 @@
+"""Management command for moving generated image files to the configured media layout.
+
+Files are moved without downtime: each file is first hard-linked at its new path, then
+``QRCode.image_file`` is switched in a short transaction, and only then is the old path removed.
+A row whose ``image_file`` changed in the meantime (e.g. the code was regenerated) is left alone.
+
+The command is resumable: rows already in the target layout are skipped, and old files left
+behind by an interrupted run are removed when their row is seen again.
+"""
+
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from ...common.compression import ENCODINGS, sibling_path
+from ...models import QRCode
+from ...services import QRCodeGenerator
+from ...services.render_cache import RenderCache
+
+
+def _with_siblings(path: Path) -> list[Path]:
+    """``path`` and its precompressed siblings."""
+    return [path] + [sibling_path(path, encoding) for encoding in ENCODINGS]
+
+
+class Command(BaseCommand):
+    """Move QR code image files to the layout set by ``QR_CODE_MEDIA_LAYOUT``."""
+
+    help = 'Moves generated QR code images to the configured media layout (flat or sharded).'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--batch-size', type=int, default=500, help='Rows updated per transaction.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Only count the files that would be moved.'
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        layout = settings.QR_CODE_MEDIA_LAYOUT
+        other_layout = 'flat' if layout == 'sharded' else 'sharded'
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        media_root = Path(settings.MEDIA_ROOT)
+
+        moved = missing = scanned = 0
+        last_pk = None
+        while True:
+            # Keyset pagination: stable under concurrent inserts and cheap to restart
+            queryset = QRCode.objects.exclude(image_file='').order_by('pk').only('id', 'image_file')
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            batch = list(queryset[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            scanned += len(batch)
+
+            switches = []
+            for qr_code in batch:
+                qr_format = Path(qr_code.image_file).suffix.lstrip('.')
+                target = QRCodeGenerator.relative_path(qr_code.id, qr_format, layout)
+                if qr_code.image_file == target:
+                    # Leftovers of a run interrupted between the switch and the cleanup
+                    if not dry_run:
+                        stale = QRCodeGenerator.relative_path(qr_code.id, qr_format, other_layout)
+                        for path in _with_siblings(media_root / stale):
+                            path.unlink(missing_ok=True)
+                    continue
+
+                source_path = media_root / qr_code.image_file
+                if not source_path.is_file():
+                    missing += 1
+                    continue
+                if dry_run:
+                    moved += 1
+                    continue
+
+                for source, dest in zip(
+                    _with_siblings(source_path), _with_siblings(media_root / target)
+                ):
+                    if source.is_file():
+                        RenderCache.link(source, dest)
+                switches.append((qr_code, target))
+
+            with transaction.atomic():
+                switched = {
+                    qr_code.pk
+                    for qr_code, target in switches
+                    if QRCode.objects.filter(pk=qr_code.pk, image_file=qr_code.image_file).update(
+                        image_file=target
+                    )
+                }
+
+            for qr_code, target in switches:
+                if qr_code.pk in switched:
+                    obsolete = qr_code.image_file
+                elif not QRCode.objects.filter(pk=qr_code.pk, image_file=target).exists():
+                    # The row moved on to another file meanwhile: drop the unused links
+                    obsolete = target
+                else:
+                    continue
+                for path in _with_siblings(media_root / obsolete):
+                    path.unlink(missing_ok=True)
+            moved += len(switched)
+
+            self.stdout.write(f'{scanned} row(s) scanned, {moved} file(s) moved...')
+
+        verb = 'Would move' if dry_run else 'Moved'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{verb} {moved} file(s) to the {layout} layout; {missing} file(s) missing.'
+            )
+        )
@@ -0,0 +1,62 @@
+"""Management command for deleting old raw scan events.
+
+Events are added to the hourly and daily rollups in the same transaction that inserts them, so
+pruning them never changes the analytics. Deletes run in small batches by primary key, keeping
+each transaction (and the lock it holds) short.
+"""
+
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from ...models import ScanEvent
+
+
+class Command(BaseCommand):
+    """Delete scan events older than the retention period."""
+
+    help = (
+        'Deletes raw scan events older than QR_CODE_SCAN_EVENT_RETENTION_DAYS (rollups are kept).'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.QR_CODE_SCAN_EVENT_RETENTION_DAYS,
+            help='Keep events of this many days.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000, help='Events deleted per transaction.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Only count the events that would be deleted.'
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = ScanEvent.objects.filter(scanned_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'{expired.count()} scan event(s) older than {cutoff:%Y-%m-%d %H:%M}.'
+            )
+            return
+
+        deleted = 0
+        while True:
+            batch = list(
+                expired.order_by('pk').values_list('pk', flat=True)[: options['batch_size']]
+            )
+            if not batch:
+                break
+            deleted += ScanEvent.objects.filter(pk__in=batch).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Deleted {deleted} scan event(s) older than {cutoff:%Y-%m-%d %H:%M}.'
+            )
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-17 09:12
+
+import secrets
+
+from django.db import migrations, models
+
+
+def create_default_sequence(apps, schema_editor):
+    ShortCodeSequence = apps.get_model('qr_code', 'ShortCodeSequence')
+    ShortCodeSequence.objects.get_or_create(name='default', defaults={'key': secrets.token_hex(32)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_code', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortCodeSequence',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                (
+                    'next_value',
+                    models.BigIntegerField(default=0, help_text='First number not reserved yet'),
+                ),
+                (
+                    'key',
+                    models.CharField(
+                        help_text='Secret key of the code permutation', max_length=128
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Short Code Sequence',
+                'verbose_name_plural': 'Short Code Sequences',
+            },
+        ),
+        migrations.RunPython(create_default_sequence, migrations.RunPython.noop),
+    ]
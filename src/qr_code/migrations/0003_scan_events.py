@@ -0,0 +1,75 @@
+# Generated by Django 6.0 on 2026-10-17 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_code', '0002_shortcodesequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanEvent',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('scanned_at', models.DateTimeField()),
+                ('user_agent', models.CharField(blank=True, default='', max_length=255)),
+                (
+                    'qrcode',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='scan_events',
+                        to='qr_code.qrcode',
+                    ),
+                ),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['scanned_at'], name='qr_code_sca_scanned_dddab2_idx'),
+                    models.Index(
+                        fields=['qrcode', 'scanned_at'], name='qr_code_sca_qrcode__69b2ec_idx'
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScanRollup',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                (
+                    'period',
+                    models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4),
+                ),
+                ('bucket', models.DateTimeField(help_text='Start of the hour or day')),
+                ('count', models.IntegerField(default=0)),
+                (
+                    'qrcode',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='scan_rollups',
+                        to='qr_code.qrcode',
+                    ),
+                ),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('qrcode', 'period', 'bucket'), name='unique_scan_rollup_bucket'
+                    )
+                ],
+            },
+        ),
+    ]
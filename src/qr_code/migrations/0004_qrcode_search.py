@@ -0,0 +1,89 @@
+# Generated by Django 6.0 on 2026-10-17 14:20
+
+import sqlite3
+
+from django.db import migrations
+
+CREATE_SQL = [
+    """CREATE TABLE qr_code_qrcode_search_key (
+        id integer NOT NULL PRIMARY KEY,
+        qrcode_id char(32) NOT NULL UNIQUE
+    )""",
+    """CREATE VIRTUAL TABLE qr_code_qrcode_search USING fts5(
+        name, content, original_url,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """INSERT INTO qr_code_qrcode_search (qr_code_qrcode_search, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0, 2.0)')""",
+    """CREATE TRIGGER qr_code_qrcode_search_insert AFTER INSERT ON qr_code_qrcode BEGIN
+        INSERT INTO qr_code_qrcode_search_key (qrcode_id) VALUES (new.id);
+        INSERT INTO qr_code_qrcode_search (rowid, name, content, original_url)
+        SELECT last_insert_rowid(), new.name, new.content, coalesce(new.original_url, '')
+        WHERE new.deleted_at IS NULL;
+    END""",
+    """CREATE TRIGGER qr_code_qrcode_search_update
+    AFTER UPDATE OF name, content, original_url, deleted_at ON qr_code_qrcode BEGIN
+        DELETE FROM qr_code_qrcode_search
+        WHERE rowid = (SELECT id FROM qr_code_qrcode_search_key WHERE qrcode_id = old.id);
+        INSERT INTO qr_code_qrcode_search (rowid, name, content, original_url)
+        SELECT id, new.name, new.content, coalesce(new.original_url, '')
+        FROM qr_code_qrcode_search_key
+        WHERE qrcode_id = new.id AND new.deleted_at IS NULL;
+    END""",
+    """CREATE TRIGGER qr_code_qrcode_search_delete AFTER DELETE ON qr_code_qrcode BEGIN
+        DELETE FROM qr_code_qrcode_search
+        WHERE rowid = (SELECT id FROM qr_code_qrcode_search_key WHERE qrcode_id = old.id);
+        DELETE FROM qr_code_qrcode_search_key WHERE qrcode_id = old.id;
+    END""",
+    'INSERT INTO qr_code_qrcode_search_key (qrcode_id) SELECT id FROM qr_code_qrcode',
+    """INSERT INTO qr_code_qrcode_search (rowid, name, content, original_url)
+    SELECT search_key.id, qrcode.name, qrcode.content, coalesce(qrcode.original_url, '')
+    FROM qr_code_qrcode AS qrcode
+    JOIN qr_code_qrcode_search_key AS search_key ON search_key.qrcode_id = qrcode.id
+    WHERE qrcode.deleted_at IS NULL""",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS qr_code_qrcode_search_insert',
+    'DROP TRIGGER IF EXISTS qr_code_qrcode_search_update',
+    'DROP TRIGGER IF EXISTS qr_code_qrcode_search_delete',
+    'DROP TABLE IF EXISTS qr_code_qrcode_search',
+    'DROP TABLE IF EXISTS qr_code_qrcode_search_key',
+]
+
+
+def fts5_supported() -> bool:
+    connection = sqlite3.connect(':memory:')
+    try:
+        connection.execute('CREATE VIRTUAL TABLE probe USING fts5(text)')
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    # Searches fall back to substring matches on other databases and without FTS5
+    if schema_editor.connection.vendor != 'sqlite' or not fts5_supported():
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_code', '0003_scan_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
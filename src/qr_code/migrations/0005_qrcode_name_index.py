@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-17 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_code', '0004_qrcode_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='qrcode',
+            index=models.Index(
+                fields=['created_by', 'name', 'id'], name='qr_code_qrc_created_24935a_idx'
+            ),
+        ),
+    ]
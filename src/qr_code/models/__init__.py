@@ -1,11 +1,7 @@
 from .credit_transaction import CreditTransaction, CreditTransactionType
-from .qrcode import (
-    QRCode,
-    QRCodeErrorCorrection,
-    QRCodeFormat,
-    QRCodeType,
-    generate_short_code,
-)
+from .qrcode import QRCode, QRCodeErrorCorrection, QRCodeFormat, QRCodeType
+from .scan import ScanEvent, ScanPeriod, ScanRollup
+from .short_code import ShortCodeSequence
 from .user import InsufficientCreditsError, User
 
 __all__ = [
@@ -17,5 +13,8 @@ __all__ = [
     'QRCodeFormat',
     'QRCodeErrorCorrection',
     'QRCodeType',
-    'generate_short_code',
+    'ShortCodeSequence',
+    'ScanEvent',
+    'ScanPeriod',
+    'ScanRollup',
 ]
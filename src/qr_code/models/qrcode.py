@@ -1,5 +1,3 @@
-import random
-import string
 import uuid
 
 from asgiref.sync import sync_to_async
@@ -7,11 +5,8 @@ from django.db import models
 
 from .user import User
 
-
-def generate_short_code(length: int = 8) -> str:
-    """Generate a random short code for URL shortening."""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choice(chars) for _ in range(length))
+# Fields cached by the redirect cache; saving any of them invalidates the code's entry
+REDIRECT_FIELDS = {'short_code', 'original_url', 'deleted_at'}
 
 
 class QRCodeFormat(models.TextChoices):
@@ -103,6 +98,7 @@ class QRCode(models.Model):
         indexes = [
             models.Index(fields=['short_code']),
             models.Index(fields=['created_by', '-created_at']),
+            models.Index(fields=['created_by', 'name', 'id']),
             models.Index(fields=['deleted_at']),
         ]
         verbose_name = 'QR Code'
@@ -112,15 +108,50 @@ class QRCode(models.Model):
         return f'QRCode {self.id} - {self.content[:50]}'
 
     def save(self, *args, **kwargs):
-        # Generate short code if URL shortening is enabled and code doesn't exist
+        new_short_code = self._state.adding
+        # Allocate a short code if URL shortening is enabled and code doesn't exist
         if self.use_url_shortening and not self.short_code:
-            self.short_code = generate_short_code()
-            # Ensure uniqueness
-            while QRCode.objects.filter(short_code=self.short_code).exists():
-                self.short_code = generate_short_code()
+            from ..services.short_codes import get_short_code_allocator
+
+            self.short_code = get_short_code_allocator().allocate_one()
+            new_short_code = True
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and REDIRECT_FIELDS & set(update_fields):
+            # The redirect index is refreshed from rows updated since its last build
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
 
         super().save(*args, **kwargs)
 
+        if self.short_code and new_short_code:
+            from ..services.short_code_filter import get_short_code_filter
+
+            get_short_code_filter().add(self.short_code)
+        if self.short_code and (update_fields is None or REDIRECT_FIELDS & set(update_fields)):
+            self._invalidate_redirect()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        if self.short_code:
+            self._invalidate_redirect()
+        return result
+
+    def _invalidate_redirect(self):
+        """Drop the cached redirect target of this code, now and once the transaction commits.
+
+        Invalidating again on commit keeps a scan racing the transaction from caching the old
+        target.
+        """
+        from django.db import transaction
+
+        from ..services.redirect_cache import get_redirect_cache
+
+        short_code = self.short_code
+        if not short_code:
+            return
+        get_redirect_cache().invalidate(short_code)
+        transaction.on_commit(lambda: get_redirect_cache().invalidate(short_code))
+
     def get_redirect_url(self) -> str | None:
         """Get the full redirect URL for this QR code."""
         from django.conf import settings
@@ -133,9 +164,13 @@ class QRCode(models.Model):
         """Increment the scan count and update last scanned timestamp."""
         from django.utils import timezone
 
+        now = timezone.now()
+        # Increment in the database, so concurrent scans don't overwrite each other's count
+        QRCode.objects.filter(pk=self.pk).update(
+            scan_count=models.F('scan_count') + 1, last_scanned_at=now
+        )
         self.scan_count += 1
-        self.last_scanned_at = timezone.now()
-        self.save(update_fields=['scan_count', 'last_scanned_at'])
+        self.last_scanned_at = now
 
     async def aincrement_scan_count(self):
         """Async version: Increment the scan count and update last scanned timestamp."""
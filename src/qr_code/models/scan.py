@@ -0,0 +1,51 @@
+from django.db import models
+
+from .qrcode import QRCode
+
+
+class ScanPeriod(models.TextChoices):
+    """Bucket sizes of scan rollups."""
+
+    HOUR = 'hour', 'Hour'
+    DAY = 'day', 'Day'
+
+
+class ScanEvent(models.Model):
+    """One scan of a QR code (append-only).
+
+    Events are inserted in batches by the scan counter, in the same transaction that adds them to
+    the rollups, so every stored event is already counted there and old events can be pruned
+    without losing analytics.
+    """
+
+    qrcode = models.ForeignKey(QRCode, on_delete=models.CASCADE, related_name='scan_events')
+    scanned_at = models.DateTimeField()
+    user_agent = models.CharField(max_length=255, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['scanned_at']),
+            models.Index(fields=['qrcode', 'scanned_at']),
+        ]
+
+    def __str__(self) -> str:
+        return f'ScanEvent {self.qrcode_id} at {self.scanned_at}'
+
+
+class ScanRollup(models.Model):
+    """Number of scans of a QR code in one hour or day, maintained as events are recorded."""
+
+    qrcode = models.ForeignKey(QRCode, on_delete=models.CASCADE, related_name='scan_rollups')
+    period = models.CharField(max_length=4, choices=ScanPeriod.choices)
+    bucket = models.DateTimeField(help_text='Start of the hour or day')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['qrcode', 'period', 'bucket'], name='unique_scan_rollup_bucket'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'ScanRollup {self.qrcode_id} {self.period} {self.bucket}: {self.count}'
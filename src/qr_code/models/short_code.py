@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class ShortCodeSequence(models.Model):
+    """Database sequence numbering short codes.
+
+    Processes reserve blocks of numbers by advancing ``next_value``; numbers are turned into codes
+    by a permutation keyed with ``key``, so the key must never change once codes are issued.
+    """
+
+    name = models.CharField(max_length=32, primary_key=True)
+    next_value = models.BigIntegerField(default=0, help_text='First number not reserved yet')
+    key = models.CharField(max_length=128, help_text='Secret key of the code permutation')
+
+    class Meta:
+        verbose_name = 'Short Code Sequence'
+        verbose_name_plural = 'Short Code Sequences'
+
+    def __str__(self) -> str:
+        return f'ShortCodeSequence {self.name} at {self.next_value}'
@@ -12,10 +12,16 @@ from .auth import (
     UserResponseSchema,
 )
 from .qrcode import (
+    QRCodeArtifactSchema,
+    QRCodeBulkResultSchema,
     QRCodeCreateSchema,
+    QRCodeExportRequestSchema,
+    QRCodeExportSchema,
     QRCodePreviewSchema,
+    QRCodeScansSchema,
     QRCodeSchema,
     QRCodeUpdateSchema,
+    ScanBucketSchema,
 )
 
 __all__ = [
@@ -34,4 +40,10 @@ __all__ = [
     'QRCodeUpdateSchema',
     'QRCodeSchema',
     'QRCodePreviewSchema',
+    'QRCodeExportRequestSchema',
+    'QRCodeArtifactSchema',
+    'QRCodeExportSchema',
+    'QRCodeBulkResultSchema',
+    'QRCodeScansSchema',
+    'ScanBucketSchema',
 ]
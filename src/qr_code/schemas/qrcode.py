@@ -1,8 +1,12 @@
 """Pydantic schemas for QR code endpoints."""
 
+import uuid
+from datetime import datetime
+
 from ninja import ModelSchema, Schema
+from pydantic import Field
 
-from src.qr_code.models import QRCode
+from src.qr_code.models import QRCode, QRCodeFormat, ScanPeriod
 
 
 class QRCodeCreateSchema(ModelSchema):
@@ -65,6 +69,64 @@ class QRCodeSchema(ModelSchema):
 
 
 class QRCodePreviewSchema(Schema):
-    """Schema for QR code preview response."""
+    """Schema for QR code preview response.
+
+    ``image_url`` is a ``data:`` URI holding the rendered image.
+    """
 
     image_url: str
+
+
+class QRCodeExportRequestSchema(Schema):
+    """Schema for exporting a QR code in several formats."""
+
+    formats: list[QRCodeFormat] = Field(..., min_length=1)
+
+
+class QRCodeArtifactSchema(Schema):
+    """Schema for one exported image file."""
+
+    qr_format: str
+    path: str
+    url: str
+    size: int
+
+
+class QRCodeExportSchema(Schema):
+    """Schema for QR code export response."""
+
+    artifacts: list[QRCodeArtifactSchema]
+
+
+class QRCodeBulkResultSchema(Schema):
+    """Schema for one line of the bulk creation response (NDJSON).
+
+    ``index`` is the position of the item in the request. Failed items only carry ``error``.
+    """
+
+    index: int
+    id: uuid.UUID | None = None
+    short_code: str | None = None
+    image_url: str | None = None
+    error: str | None = None
+
+
+class ScanBucketSchema(Schema):
+    """Schema for the scans of one hour or day."""
+
+    bucket: datetime
+    count: int
+
+
+class QRCodeScansSchema(Schema):
+    """Schema for the scan time series of a QR code.
+
+    Only non-empty buckets are listed, oldest first.
+    """
+
+    id: uuid.UUID
+    period: ScanPeriod
+    start: datetime
+    end: datetime
+    total: int
+    buckets: list[ScanBucketSchema]
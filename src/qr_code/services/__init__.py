@@ -1,3 +1,3 @@
-from .qrcode import QRCodeGenerator
+from .qrcode import ImageArtifact, QRCodeGenerator
 
-__all__ = ['QRCodeGenerator']
+__all__ = ['ImageArtifact', 'QRCodeGenerator']
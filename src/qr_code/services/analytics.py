@@ -0,0 +1,46 @@
+"""
+Scan analytics from pre-aggregated rollups.
+
+Time series are read from ``ScanRollup`` only, one row per non-empty hour or day bucket, so a
+query costs the same whatever the number of raw scan events behind it.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from ..models import ScanPeriod, ScanRollup
+
+PERIODS = {ScanPeriod.HOUR: timedelta(hours=1), ScanPeriod.DAY: timedelta(days=1)}
+
+# Range of a series when the caller gives no start
+DEFAULT_RANGES = {ScanPeriod.HOUR: timedelta(hours=48), ScanPeriod.DAY: timedelta(days=30)}
+
+# Most buckets a series may span
+MAX_BUCKETS = 10000
+
+
+def bucket_start(moment: datetime, period: str) -> datetime:
+    """Start of the hour or day (in the current time zone) containing ``moment``."""
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if period == ScanPeriod.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def scan_series(
+    qr_id: uuid.UUID, period: str, start: datetime, end: datetime
+) -> list[tuple[datetime, int]]:
+    """``(bucket, count)`` of the non-empty buckets of ``qr_id`` from the one containing
+    ``start`` up to ``end`` (excluded), oldest first."""
+    return list(
+        ScanRollup.objects.filter(
+            qrcode_id=qr_id,
+            period=period,
+            bucket__gte=bucket_start(start, period),
+            bucket__lt=end,
+        )
+        .order_by('bucket')
+        .values_list('bucket', 'count')
+    )
@@ -0,0 +1,217 @@
+"""
+Streaming ZIP archives of a user's QR code images.
+
+The archive is written on the fly into a small in-memory buffer that is drained after every write,
+so memory stays bounded whatever the number of codes: rows are fetched in pages, in the order of
+the listing (best matches first for searches, otherwise newest first), and image files are read in
+chunks. Codes without a stored image are rendered on the fly (through the render cache).
+
+The archive ends with ``manifest.csv``, listing each image with the code's details. Its rows are
+collected as the images are written, so they describe exactly the archived files; they are
+spooled to a temporary file once they outgrow ``MANIFEST_SPOOL_SIZE``.
+"""
+
+import csv
+import io
+import tempfile
+import zipfile
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import BinaryIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from ..models import QRCode
+from .pagination import get_page
+from .qrcode import QRCodeGenerator
+from .search import ranked, search
+
+# Rows fetched per query
+PAGE_SIZE = 500
+
+# Bytes read from an image file at a time
+READ_SIZE = 256 * 1024
+
+# PNG and PDF are already compressed, deflating them again only costs CPU
+DEFLATED_FORMATS = {'svg'}
+
+MANIFEST_NAME = 'manifest.csv'
+# Manifest rows are kept in memory up to this many bytes, then spooled to a temporary file
+MANIFEST_SPOOL_SIZE = 1024 * 1024
+MANIFEST_FIELDS = [
+    'file',
+    'id',
+    'name',
+    'qr_type',
+    'content',
+    'original_url',
+    'short_code',
+    'redirect_url',
+    'qr_format',
+    'scan_count',
+    'created_at',
+]
+
+
+class _ZipBuffer(io.RawIOBase):
+    """Write-only, unseekable sink collecting the archive bytes until they are taken."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+def archive_name(qrcode: QRCode) -> str:
+    """File name of the image of ``qrcode`` inside the archive."""
+    return f'{qrcode.id}.{qrcode.qr_format}'
+
+
+def archive_queryset(user, query: str = '', qr_format: str | None = None) -> QuerySet[QRCode]:
+    """The user's non-deleted QR codes, filtered like the dashboard search and by format.
+
+    Searches check whether the database has the search table, so call this from sync code.
+    """
+    qrcodes = QRCode.objects.filter(created_by=user, deleted_at__isnull=True)
+    if query:
+        qrcodes = search(qrcodes, query)
+    if qr_format:
+        qrcodes = qrcodes.filter(qr_format=qr_format)
+    return qrcodes
+
+
+def _fetch(queryset: QuerySet[QRCode]) -> list[QRCode]:
+    return list(queryset)
+
+
+async def _pages(queryset: QuerySet[QRCode]) -> AsyncIterator[list[QRCode]]:
+    """Paginate ``queryset`` in the order of the listing, one short query per page.
+
+    Ranked search results are paged by offset, like ``get_search_page``; other querysets are
+    keyset-paginated newest first.
+    """
+    offset = 0
+    cursor = None
+    while True:
+        if ranked(queryset):
+            page = await sync_to_async(_fetch)(queryset[offset : offset + PAGE_SIZE])
+            offset += len(page)
+            more = len(page) == PAGE_SIZE
+        else:
+            page, cursor = await sync_to_async(get_page)(queryset, PAGE_SIZE, cursor)
+            more = cursor is not None
+        if page:
+            yield page
+        if not more:
+            return
+
+
+def _stored_image(qrcode: QRCode) -> Path | None:
+    """Path of the stored image of ``qrcode``, if it has one in its current format."""
+    if not qrcode.image_file or not qrcode.image_file.endswith(f'.{qrcode.qr_format}'):
+        return None
+    path = Path(settings.MEDIA_ROOT) / qrcode.image_file
+    return path if path.is_file() else None
+
+
+def _open(path: Path) -> BinaryIO:
+    return open(path, 'rb')
+
+
+def _read_chunk(f: BinaryIO, size: int) -> bytes:
+    return f.read(size)
+
+
+def _manifest_row(qrcode: QRCode) -> list:
+    return [
+        archive_name(qrcode),
+        qrcode.id,
+        qrcode.name,
+        qrcode.qr_type,
+        qrcode.content,
+        qrcode.original_url or '',
+        qrcode.short_code or '',
+        qrcode.get_redirect_url() or '',
+        qrcode.qr_format,
+        qrcode.scan_count,
+        qrcode.created_at.isoformat(),
+    ]
+
+
+def archive_response(
+    queryset: QuerySet[QRCode], filename: str = 'qrcodes.zip'
+) -> StreamingHttpResponse:
+    """Streaming download response of the archive of ``queryset``."""
+    return StreamingHttpResponse(
+        stream_archive(queryset),
+        content_type='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+        },
+    )
+
+
+async def stream_archive(queryset: QuerySet[QRCode]) -> AsyncIterator[bytes]:
+    """Yield a ZIP archive of the images of ``queryset``, followed by a manifest."""
+    buffer = _ZipBuffer()
+    archive = zipfile.ZipFile(buffer, mode='w')
+    manifest = tempfile.SpooledTemporaryFile(
+        max_size=MANIFEST_SPOOL_SIZE, mode='w+', encoding='utf-8', newline=''
+    )
+    try:
+        writer = csv.writer(manifest)
+        writer.writerow(MANIFEST_FIELDS)
+
+        async for page in _pages(queryset):
+            for qrcode in page:
+                info = zipfile.ZipInfo(
+                    archive_name(qrcode), timezone.localtime(qrcode.updated_at).timetuple()[:6]
+                )
+                if qrcode.qr_format in DEFLATED_FORMATS:
+                    info.compress_type = zipfile.ZIP_DEFLATED
+
+                path = await sync_to_async(_stored_image, thread_sensitive=False)(qrcode)
+                with archive.open(info, mode='w') as entry:
+                    if path is None:
+                        spec = QRCodeGenerator.render_spec(qrcode)
+                        entry.write(await QRCodeGenerator.render_cached(spec))
+                    else:
+                        f = await sync_to_async(_open, thread_sensitive=False)(path)
+                        try:
+                            while chunk := await sync_to_async(_read_chunk, thread_sensitive=False)(
+                                f, READ_SIZE
+                            ):
+                                entry.write(chunk)
+                                yield buffer.take()
+                        finally:
+                            await sync_to_async(f.close, thread_sensitive=False)()
+                writer.writerow(_manifest_row(qrcode))
+                yield buffer.take()
+
+        info = zipfile.ZipInfo(MANIFEST_NAME, timezone.localtime().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        manifest.seek(0)
+        with archive.open(info, mode='w') as entry:
+            while text := manifest.read(READ_SIZE):
+                entry.write(text.encode())
+                yield buffer.take()
+    finally:
+        manifest.close()
+
+    archive.close()
+    yield buffer.take()
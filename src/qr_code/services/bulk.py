@@ -0,0 +1,89 @@
+"""
+Bulk creation of QR codes.
+
+A batch of codes is inserted with one ``bulk_create`` (short codes are allocated for the whole
+batch up front, so each row is written once), then optionally rendered concurrently on the render
+pool. Results are yielded as renders complete, so callers can stream them.
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from pydantic import ValidationError
+
+from ..models import QRCode, User
+from ..schemas import QRCodeCreateSchema
+from .qrcode import QRCodeGenerator
+from .short_code_filter import get_short_code_filter
+from .short_codes import get_short_code_allocator
+
+
+def build_qrcode(payload: QRCodeCreateSchema, user: User) -> QRCode:
+    """Build an unsaved QRCode from a validated create payload."""
+    fields = payload.dict(exclude={'url', 'data'})
+    if payload.url:
+        fields['original_url'] = payload.url
+        fields['content'] = payload.url
+    elif payload.data:
+        fields['content'] = payload.data
+    else:
+        raise ValueError('Either url or data is required.')
+
+    return QRCode(created_by=user, **fields)
+
+
+def error_message(exc: ValueError) -> str:
+    """One-line description of why an item was rejected."""
+    if isinstance(exc, json.JSONDecodeError):
+        return 'Invalid JSON.'
+    if isinstance(exc, ValidationError):
+        return '; '.join(
+            f"{'.'.join(str(loc) for loc in error['loc']) or 'item'}: {error['msg']}"
+            for error in exc.errors()
+        )
+    return str(exc)
+
+
+def insert_batch(qrcodes: list[QRCode]) -> None:
+    """Insert unsaved ``qrcodes`` in one transaction, allocating their short codes.
+
+    Shortened codes get their redirect URL as content before the insert, instead of the
+    create-then-update of ``QRCode.save``.
+    """
+    shortened = [qr for qr in qrcodes if qr.use_url_shortening and not qr.short_code]
+    for qr, short_code in zip(shortened, get_short_code_allocator().allocate(len(shortened))):
+        qr.short_code = short_code
+        qr.content = qr.get_redirect_url() or qr.content
+    with transaction.atomic():
+        QRCode.objects.bulk_create(qrcodes)
+    short_code_filter = get_short_code_filter()
+    for qr in qrcodes:
+        if qr.short_code:
+            short_code_filter.add(qr.short_code)
+
+
+async def render_batch(qrcodes: list[QRCode]) -> AsyncIterator[tuple[QRCode, Exception | None]]:
+    """Render the images of saved ``qrcodes`` concurrently, yielding each as it completes.
+
+    ``image_file`` is set on the instances as they are rendered and saved for the whole batch
+    once all renders are done.
+    """
+
+    async def render(qr: QRCode) -> tuple[QRCode, Exception | None]:
+        try:
+            qr.image_file = await QRCodeGenerator.generate_qr_code(qr)
+        except Exception as exc:
+            return qr, exc
+        return qr, None
+
+    rendered = []
+    for future in asyncio.as_completed([render(qr) for qr in qrcodes]):
+        qr, error = await future
+        if error is None:
+            rendered.append(qr)
+        yield qr, error
+
+    await sync_to_async(QRCode.objects.bulk_update)(rendered, ['image_file'])
@@ -0,0 +1,50 @@
+"""
+On-demand image variants of stored QR codes.
+
+A variant is a QR code rendered in another format or scale than the one stored on the row. It is
+rendered on first request and kept in the render cache; later requests are served from the cache,
+or answered with ``304 Not Modified`` when the client's copy is still current.
+"""
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from ..models import QRCode
+from .qrcode import QRCodeGenerator
+
+# Style fields are immutable after creation, so a variant only goes stale if the row is edited
+# out-of-band; revalidation (ETag / Last-Modified) covers that case.
+CACHE_CONTROL = 'private, max-age=86400'
+
+
+async def serve_variant(
+    request: HttpRequest,
+    qrcode: QRCode,
+    qr_format: str | None = None,
+    scale: int | None = None,
+    cache_control: str = CACHE_CONTROL,
+) -> HttpResponse:
+    """Return the image of ``qrcode`` in ``qr_format`` at ``scale`` (defaults: stored values).
+
+    The ETag is the render spec's cache key, so it changes exactly when the bytes would.
+    """
+    spec = QRCodeGenerator.render_spec(qrcode, qr_format=qr_format, scale=scale)
+    headers = {
+        'ETag': f'"{spec.cache_key}"',
+        'Last-Modified': http_date(qrcode.updated_at.timestamp()),
+        'Cache-Control': cache_control,
+    }
+
+    not_modified = get_conditional_response(
+        request, etag=headers['ETag'], last_modified=int(qrcode.updated_at.timestamp())
+    )
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified[name] = value
+        return not_modified
+
+    image = await QRCodeGenerator.render_cached(spec)
+    return HttpResponse(
+        image, content_type=QRCodeGenerator.content_type(spec.kind), headers=headers
+    )
@@ -0,0 +1,77 @@
+"""
+In-memory cache of encoded QR code matrices.
+
+Encoding depends only on the content and error correction level, so re-styling a code (scale,
+border, colors) or exporting it in another format reuses the cached matrix and only pays for
+rasterization.
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from ..common.rendering import EncodedMatrix
+
+type MatrixKey = tuple[str, str, bool]
+
+
+class MatrixCache:
+    """LRU cache of bit-packed module matrices keyed by ``(content, error, micro)``."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[MatrixKey, EncodedMatrix] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(content: str, error: str, micro: bool = False) -> MatrixKey:
+        return content, error.upper(), micro
+
+    def get(self, key: MatrixKey) -> EncodedMatrix | None:
+        """Return the cached matrix for ``key``, or ``None`` on a miss."""
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return matrix
+
+    def put(self, key: MatrixKey, matrix: EncodedMatrix):
+        """Store ``matrix`` for ``key``, evicting the least recently used entries."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.bits)
+            self._entries[key] = matrix
+            self._bytes += len(matrix.bits)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.bits)
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+            }
+
+
+@functools.cache
+def get_matrix_cache() -> MatrixCache:
+    """Return the process-wide matrix cache configured from settings."""
+    return MatrixCache(max_entries=settings.QR_CODE_MATRIX_CACHE_SIZE)
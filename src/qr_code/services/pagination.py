@@ -0,0 +1,92 @@
+"""
+Keyset (cursor) pagination of QR code listings.
+
+Codes are listed newest first, ordered by ``(created_at, id)`` so the order is total, or by
+``(name, id)``. A page starts after the last code of the previous page, which the
+``created_by, -created_at`` and ``created_by, name, id`` indexes serve directly, instead of an
+``OFFSET`` that gets slower with every page.
+
+Cursors are opaque to clients: URL-safe base64 of the last listed ``created_at`` (or ``name``) and
+``id``.
+"""
+
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from django.db.models import Q, QuerySet
+
+from ..models import QRCode
+
+
+def _encode(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except (UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def encode_cursor(qrcode: QRCode) -> str:
+    """Cursor pointing right after ``qrcode``."""
+    return _encode(f'{qrcode.created_at.isoformat()}|{qrcode.id}')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Decode a cursor into ``(created_at, id)``; raises ``ValueError`` if malformed."""
+    created_at, _, qr_id = _decode(cursor).partition('|')
+    return datetime.fromisoformat(created_at), uuid.UUID(qr_id)
+
+
+def encode_name_cursor(qrcode: QRCode) -> str:
+    """Cursor pointing right after ``qrcode`` in a listing by name."""
+    # The id goes first: names may contain the separator
+    return _encode(f'{qrcode.id}|{qrcode.name}')
+
+
+def decode_name_cursor(cursor: str) -> tuple[str, uuid.UUID]:
+    """Decode a listing-by-name cursor into ``(name, id)``; raises ``ValueError`` if malformed."""
+    qr_id, _, name = _decode(cursor).partition('|')
+    return name, uuid.UUID(qr_id)
+
+
+def newest_first(queryset: QuerySet[QRCode], cursor: str | None = None) -> QuerySet[QRCode]:
+    """Order ``queryset`` newest first, starting after ``cursor`` if given."""
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, qr_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=qr_id)
+        )
+    return queryset
+
+
+def by_name(queryset: QuerySet[QRCode], cursor: str | None = None) -> QuerySet[QRCode]:
+    """Order ``queryset`` by name, starting after ``cursor`` if given."""
+    queryset = queryset.order_by('name', 'id')
+    if cursor:
+        name, qr_id = decode_name_cursor(cursor)
+        queryset = queryset.filter(Q(name__gt=name) | Q(name=name, id__gt=qr_id))
+    return queryset
+
+
+def get_page(
+    queryset: QuerySet[QRCode], limit: int, cursor: str | None = None, sort: str = ''
+) -> tuple[list[QRCode], str | None]:
+    """Return one page of ``queryset`` and the cursor of the next page (``None`` on the last).
+
+    Codes are listed newest first, or by name with ``sort='name'``.
+    """
+    if sort == 'name':
+        ordered, encode = by_name(queryset, cursor), encode_name_cursor
+    else:
+        ordered, encode = newest_first(queryset, cursor), encode_cursor
+    page = list(ordered[: limit + 1])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode(page[-1])
+    return page, None
@@ -1,10 +1,40 @@
+import asyncio
+import base64
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
 from pathlib import Path
 
-import segno
 from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.urls import reverse
 
-from ..models import QRCode, QRCodeFormat
+from ..common.compression import ENCODINGS, sibling_path, write_siblings
+from ..common.png import PngOptions
+from ..common.rendering import (
+    CONTENT_TYPES,
+    EncodedMatrix,
+    RenderSpec,
+    encode,
+    encode_and_rasterize,
+    normalize_color,
+    rasterize,
+)
+from ..models import QRCode
+from .matrix_cache import MatrixCache, get_matrix_cache
+from .render_cache import RenderCache, get_render_cache
+from .render_pool import run_in_render_pool
+
+
+@dataclass(frozen=True, slots=True)
+class ImageArtifact:
+    """An image file generated for a QR code."""
+
+    qr_format: str
+    # Path relative to MEDIA_ROOT
+    path: str
+    size: int
 
 
 class QRCodeGenerator:
@@ -12,47 +42,241 @@ class QRCodeGenerator:
 
     @staticmethod
     async def generate_qr_code(qr_code_instance: QRCode) -> str:
-        """Generate a QR code image file based on the QRCode model instance."""
-        # Create QR code with segno (CPU-bound, run in executor)
-        qr = await sync_to_async(segno.make)(
-            qr_code_instance.content,
-            error=qr_code_instance.error_correction,
-            micro=False,
+        """Generate a QR code image file based on the QRCode model instance.
+
+        Identical renders (same content and style) are served from the render cache: the
+        per-instance file is a hard link to the existing artifact instead of a fresh encode.
+        """
+        spec = QRCodeGenerator.render_spec(qr_code_instance)
+        file_path = QRCodeGenerator._file_path(qr_code_instance, spec.kind)
+
+        if not await QRCodeGenerator._link_cached(spec, file_path):
+            image = await QRCodeGenerator.render(spec)
+            await sync_to_async(QRCodeGenerator._store, thread_sensitive=False)(
+                spec, image, file_path
+            )
+
+        # Return relative path for storage
+        return QRCodeGenerator.relative_path(qr_code_instance.id, spec.kind)
+
+    @staticmethod
+    async def generate_formats(qr_code_instance: QRCode, formats: list[str]) -> list[ImageArtifact]:
+        """Generate image files of a QR code in several formats from a single encode.
+
+        Formats already in the render cache are linked; the others are rasterized concurrently
+        from one encoded matrix.
+        """
+        specs = [
+            QRCodeGenerator.render_spec(qr_code_instance, qr_format=qr_format)
+            for qr_format in dict.fromkeys(formats)
+        ]
+        paths = [QRCodeGenerator._file_path(qr_code_instance, spec.kind) for spec in specs]
+
+        linked = await asyncio.gather(
+            *(QRCodeGenerator._link_cached(spec, path) for spec, path in zip(specs, paths))
         )
+        missing = [(spec, path) for spec, path, hit in zip(specs, paths, linked) if not hit]
+        if missing:
+            matrix = await QRCodeGenerator.encode(missing[0][0])
+            images = await asyncio.gather(
+                *(run_in_render_pool(rasterize, matrix, spec) for spec, _ in missing)
+            )
+            for (spec, path), image in zip(missing, images):
+                await sync_to_async(QRCodeGenerator._store, thread_sensitive=False)(
+                    spec, image, path
+                )
 
-        # Prepare the file path
-        media_qrcodes = Path(settings.MEDIA_ROOT) / 'qrcodes'
-        await sync_to_async(media_qrcodes.mkdir)(parents=True, exist_ok=True)
-
-        file_name = f'{qr_code_instance.id}.{qr_code_instance.qr_format}'
-        file_path = media_qrcodes / file_name
-
-        # Prepare color values
-        bg_color = QRCodeGenerator._parse_color(qr_code_instance.background_color)
-        fg_color = QRCodeGenerator._parse_color(qr_code_instance.foreground_color)
-
-        # Generate based on format (I/O-bound, run in executor)
-        if qr_code_instance.qr_format == QRCodeFormat.SVG:
-            await sync_to_async(qr.save)(
-                str(file_path),
-                kind='svg',
-                scale=qr_code_instance.size,
-                border=qr_code_instance.border,
-                dark=fg_color,
-                light=bg_color,
+        sizes = await sync_to_async(
+            lambda: [path.stat().st_size for path in paths], thread_sensitive=False
+        )()
+        return [
+            ImageArtifact(
+                qr_format=spec.kind,
+                path=QRCodeGenerator.relative_path(qr_code_instance.id, spec.kind),
+                size=size,
             )
-        else:  # png, pdf, or other formats
-            await sync_to_async(qr.save)(
-                str(file_path),
-                kind=qr_code_instance.qr_format,
-                scale=qr_code_instance.size,
-                border=qr_code_instance.border,
-                dark=fg_color,
-                light=bg_color,
+            for spec, size in zip(specs, sizes)
+        ]
+
+    @staticmethod
+    async def render_bytes(qr_code_instance: QRCode) -> bytes:
+        """Render a QR code image into memory, without touching the file system or cache."""
+        return await QRCodeGenerator.render(QRCodeGenerator.render_spec(qr_code_instance))
+
+    @staticmethod
+    async def encode(spec: RenderSpec) -> EncodedMatrix:
+        """Encode the content of ``spec`` on the render pool, reusing a cached matrix."""
+        cache = get_matrix_cache()
+        key = MatrixCache.key_for(spec.content, spec.error)
+
+        matrix = cache.get(key)
+        if matrix is None:
+            matrix = await run_in_render_pool(encode, spec.content, spec.error)
+            cache.put(key, matrix)
+        return matrix
+
+    @staticmethod
+    async def render(spec: RenderSpec) -> bytes:
+        """Render ``spec`` on the render pool, reusing a cached matrix when available.
+
+        Only a matrix cache miss pays for encoding; otherwise just the rasterization runs.
+        """
+        cache = get_matrix_cache()
+        key = MatrixCache.key_for(spec.content, spec.error)
+
+        matrix = cache.get(key)
+        if matrix is not None:
+            return await run_in_render_pool(rasterize, matrix, spec)
+
+        encoded, image = await run_in_render_pool(encode_and_rasterize, spec)
+        cache.put(key, encoded)
+        return image
+
+    @staticmethod
+    def content_type(qr_format: str) -> str:
+        """Get the MIME type of images rendered in ``qr_format``."""
+        return CONTENT_TYPES.get(qr_format, 'application/octet-stream')
+
+    @staticmethod
+    def to_data_uri(image: bytes, qr_format: str) -> str:
+        """Encode rendered image bytes as a ``data:`` URI."""
+        encoded = base64.b64encode(image).decode('ascii')
+        return f'data:{QRCodeGenerator.content_type(qr_format)};base64,{encoded}'
+
+    @staticmethod
+    async def render_cached(spec: RenderSpec) -> bytes:
+        """Render ``spec``, reading and filling the render cache."""
+        cache = get_render_cache()
+        if cache.max_bytes <= 0:
+            return await QRCodeGenerator.render(spec)
+
+        cached = await sync_to_async(cache.get, thread_sensitive=False)(spec)
+        if cached is not None:
+            try:
+                return await sync_to_async(cached.read_bytes, thread_sensitive=False)()
+            except FileNotFoundError:
+                pass  # Evicted by another process since the lookup; render it again
+
+        image = await QRCodeGenerator.render(spec)
+        await sync_to_async(cache.put, thread_sensitive=False)(spec, image)
+        return image
+
+    @staticmethod
+    def render_spec(
+        qr_code_instance: QRCode, qr_format: str | None = None, scale: int | None = None
+    ) -> RenderSpec:
+        """Build the render spec (content + style) for a QRCode model instance.
+
+        ``qr_format`` and ``scale`` override the stored values, to render another variant.
+        """
+        kind = qr_format or qr_code_instance.qr_format
+        return RenderSpec(
+            content=qr_code_instance.content,
+            error=qr_code_instance.error_correction.upper(),
+            scale=scale or qr_code_instance.size,
+            border=qr_code_instance.border,
+            dark=normalize_color(QRCodeGenerator._parse_color(qr_code_instance.foreground_color)),
+            light=normalize_color(QRCodeGenerator._parse_color(qr_code_instance.background_color)),
+            kind=kind,
+            png=QRCodeGenerator._png_options(kind),
+            compact_svg=kind == 'svg' and settings.QR_CODE_SVG_WRITER == 'compact',
+        )
+
+    @staticmethod
+    def _png_options(qr_format: str) -> PngOptions | None:
+        """Options for the NumPy PNG writer, or ``None`` to render PNGs with segno."""
+        if qr_format != 'png' or settings.QR_CODE_PNG_BACKEND != 'numpy':
+            return None
+        return PngOptions(
+            compresslevel=settings.QR_CODE_PNG_COMPRESSLEVEL,
+            one_bit=settings.QR_CODE_PNG_ONE_BIT,
+        )
+
+    @staticmethod
+    def relative_path(qr_id: uuid.UUID | str, qr_format: str, layout: str | None = None) -> str:
+        """Path, relative to MEDIA_ROOT, of the image file of QR code ``qr_id`` in ``qr_format``.
+
+        ``layout`` defaults to ``QR_CODE_MEDIA_LAYOUT``. The sharded layout spreads files over
+        two levels of 256 directories named after the leading hex digits of the (random) id, so
+        that no directory grows beyond a few thousand entries.
+        """
+        name = f'{qr_id}.{qr_format}'
+        if (layout or settings.QR_CODE_MEDIA_LAYOUT) == 'sharded':
+            digits = uuid.UUID(str(qr_id)).hex
+            return f'qrcodes/{digits[:2]}/{digits[2:4]}/{name}'
+        return f'qrcodes/{name}'
+
+    @staticmethod
+    def _file_path(qr_code_instance: QRCode, qr_format: str) -> Path:
+        """Absolute path of the image file of ``qr_code_instance`` in ``qr_format``."""
+        return Path(settings.MEDIA_ROOT) / QRCodeGenerator.relative_path(
+            qr_code_instance.id, qr_format
+        )
+
+    @staticmethod
+    async def _link_cached(spec: RenderSpec, file_path: Path) -> bool:
+        """Expose the cached render of ``spec`` at ``file_path``; ``False`` on a cache miss."""
+        # File I/O doesn't touch the DB, so keep it off the thread-sensitive executor
+        cache = get_render_cache()
+        if cache.max_bytes <= 0:
+            return False
+        cached = await sync_to_async(cache.get, thread_sensitive=False)(spec)
+        if cached is None:
+            return False
+        try:
+            await sync_to_async(QRCodeGenerator._expose_cached, thread_sensitive=False)(
+                spec, cached, file_path
             )
+        except FileNotFoundError:
+            return False  # Evicted by another process since the lookup; render it again
+        return True
 
-        # Return relative path for storage
-        return f'qrcodes/{file_name}'
+    @staticmethod
+    def _expose_cached(spec: RenderSpec, cached: Path, file_path: Path):
+        """Link the cached artifact ``cached`` at ``file_path``, with its precompressed siblings.
+
+        Siblings are only compressed when ``file_path`` changes or one of them is missing, so a
+        hit for a file already linking the artifact costs no compression.
+        """
+        try:
+            unchanged = file_path.samefile(cached)
+        except FileNotFoundError:
+            unchanged = False
+        if not unchanged:
+            RenderCache.link(cached, file_path)
+
+        if not QRCodeGenerator._precompress(spec):
+            return
+        if unchanged and all(sibling_path(file_path, encoding).exists() for encoding in ENCODINGS):
+            return
+        write_siblings(file_path, file_path.read_bytes())
+
+    @staticmethod
+    def _store(spec: RenderSpec, image: bytes, file_path: Path):
+        """Write a freshly rendered image to the cache and expose it at ``file_path``."""
+        cache = get_render_cache()
+        if cache.max_bytes <= 0:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            # The file may still be a hard link to a cache artifact shared by other codes: replace
+            # it rather than writing through it
+            fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(image)
+                os.replace(tmp_name, file_path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        else:
+            RenderCache.link(cache.put(spec, image), file_path)
+
+        if QRCodeGenerator._precompress(spec):
+            write_siblings(file_path, image)
+
+    @staticmethod
+    def _precompress(spec: RenderSpec) -> bool:
+        """Whether image files of ``spec`` get precompressed siblings."""
+        return spec.kind == 'svg' and settings.QR_CODE_SVG_PRECOMPRESS
 
     @staticmethod
     def _parse_color(color_value: str) -> str | None:
@@ -65,3 +289,13 @@ class QRCodeGenerator:
     def get_file_url(image_file: str) -> str:
         """Get the full URL for accessing the QR code image."""
         return f'{settings.MEDIA_URL}{image_file}'
+
+    @staticmethod
+    def get_image_url(qr_code_instance: QRCode) -> str:
+        """Get the URL of the QR code image: the stored file if rendered, else the lazy view.
+
+        The lazy view is session-authenticated, so the URL also works in ``<img>`` tags.
+        """
+        if qr_code_instance.image_file:
+            return QRCodeGenerator.get_file_url(qr_code_instance.image_file)
+        return reverse('qrcode-image', args=[qr_code_instance.id])
@@ -0,0 +1,215 @@
+"""
+Read-through cache of short code redirect targets.
+
+Scans only need a code's id, target URL and whether it is deleted, so that is all that is cached.
+Lookups go through up to three levels:
+
+- an in-process LRU with a short TTL, answering hot codes without any I/O;
+- the Django cache framework (``settings.CACHES``), shared by all workers, with a longer TTL;
+- the compiled redirect index, if configured (see :mod:`.redirect_index`).
+
+Misses of codes that the short code filter rules out answer ``None`` without a query; other
+misses load the three columns from the database and fill both levels. ``QRCode.save`` and
+``QRCode.delete`` invalidate a code in this process and in the shared cache; other processes see
+the change when their local entry expires, which is why the local TTL is kept short.
+"""
+
+import functools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from ..models import QRCode
+from .redirect_index import get_redirect_index
+from .short_code_filter import get_short_code_filter
+
+KEY_PREFIX = 'qr_code:redirect:'
+# Marks codes changed since the redirect index was built
+CHANGED_PREFIX = 'qr_code:redirect-changed:'
+
+# Longest short code that is cached; longer strings can't be codes and go straight to the database
+MAX_CODE_LENGTH = 16
+
+
+@dataclass(frozen=True, slots=True)
+class RedirectTarget:
+    """What a scan of a short code needs to know about its QR code."""
+
+    id: uuid.UUID
+    original_url: str | None
+    deleted: bool
+
+
+class RedirectCache:
+    """Two-level (in-process LRU, then shared cache) read-through cache of redirect targets."""
+
+    def __init__(
+        self, max_entries: int, ttl: float, shared_ttl: float, cache_alias: str = 'default'
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_ttl = shared_ttl
+        self.cache_alias = cache_alias
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.filtered = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[str, tuple[float, RedirectTarget]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cacheable(short_code: str) -> bool:
+        """Whether ``short_code`` looks like a code, and so is safe as a cache key."""
+        return (
+            0 < len(short_code) <= MAX_CODE_LENGTH and short_code.isascii() and short_code.isalnum()
+        )
+
+    @property
+    def _shared(self):
+        return caches[self.cache_alias]
+
+    def get_cached(self, short_code: str) -> RedirectTarget | None:
+        """Return the target of ``short_code`` if this process has it cached, without any I/O."""
+        if not self.cacheable(short_code):
+            return None
+        return self._get_local(short_code)
+
+    async def aresolve(self, short_code: str) -> RedirectTarget | None:
+        """Return the redirect target of ``short_code``, or ``None`` if there is no such code."""
+        if not self.cacheable(short_code):
+            return await self._aload(short_code)
+
+        target = self._get_local(short_code)
+        if target is not None:
+            return target
+
+        if self.shared_ttl > 0:
+            shared: RedirectTarget | None = await self._shared.aget(KEY_PREFIX + short_code)
+            if shared is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self._put_local(short_code, shared)
+                return shared
+
+        target = await self._from_index(short_code)
+        if target is not None:
+            self._put_local(short_code, target)
+            return target
+
+        with self._lock:
+            self.misses += 1
+        target = await self._aload(short_code)
+        if target is not None:
+            if self.shared_ttl > 0:
+                await self._shared.aset(KEY_PREFIX + short_code, target, self.shared_ttl)
+            self._put_local(short_code, target)
+        return target
+
+    def invalidate(self, short_code: str):
+        """Forget ``short_code`` in this process and in the shared cache."""
+        if not self.cacheable(short_code):
+            return
+        with self._lock:
+            self._entries.pop(short_code, None)
+            self.invalidations += 1
+        if self.shared_ttl > 0:
+            self._shared.delete(KEY_PREFIX + short_code)
+        index = get_redirect_index()
+        if index.enabled:
+            # Indexes built before now may hold the old target until they are too old to be used
+            self._shared.set(CHANGED_PREFIX + short_code, True, index.max_age)
+
+    def clear(self):
+        """Empty the in-process level."""
+        with self._lock:
+            self._entries.clear()
+
+    async def _from_index(self, short_code: str) -> RedirectTarget | None:
+        index = get_redirect_index()
+        if not index.enabled or await self._shared.aget(CHANGED_PREFIX + short_code):
+            return None
+        entry = index.get(short_code)
+        if entry is None:
+            return None
+        qr_id, original_url, deleted = entry
+        return RedirectTarget(id=qr_id, original_url=original_url, deleted=deleted)
+
+    async def _aload(self, short_code: str) -> RedirectTarget | None:
+        if not get_short_code_filter().might_exist(short_code):
+            with self._lock:
+                self.filtered += 1
+            return None
+        return await sync_to_async(self._load)(short_code)
+
+    @staticmethod
+    def _load(short_code: str) -> RedirectTarget | None:
+        row = (
+            QRCode.objects.filter(short_code=short_code)
+            .values_list('id', 'original_url', 'deleted_at')
+            .first()
+        )
+        if row is None:
+            return None
+        qr_id, original_url, deleted_at = row
+        return RedirectTarget(id=qr_id, original_url=original_url, deleted=deleted_at is not None)
+
+    def _get_local(self, short_code: str) -> RedirectTarget | None:
+        with self._lock:
+            entry = self._entries.get(short_code)
+            if entry is None:
+                return None
+            expires, target = entry
+            if expires <= time.monotonic():
+                del self._entries[short_code]
+                return None
+            self._entries.move_to_end(short_code)
+            self.hits += 1
+            return target
+
+    def _put_local(self, short_code: str, target: RedirectTarget):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[short_code] = (time.monotonic() + self.ttl, target)
+            self._entries.move_to_end(short_code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'filtered': self.filtered,
+                'hit_ratio': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+
+def process_local_cache(alias: str = 'default') -> bool:
+    """Whether the Django cache ``alias`` is private to each process, so not shared by workers."""
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+@functools.cache
+def get_redirect_cache() -> RedirectCache:
+    """Return the process-wide redirect cache configured from settings."""
+    return RedirectCache(
+        max_entries=settings.QR_CODE_REDIRECT_CACHE_SIZE,
+        ttl=settings.QR_CODE_REDIRECT_CACHE_TTL,
+        shared_ttl=settings.QR_CODE_REDIRECT_SHARED_CACHE_TTL,
+    )
@@ -0,0 +1,159 @@
+"""
+Redirect index shared by all workers through a memory-mapped file.
+
+``manage.py compile_redirect_index`` writes every short code and its target to the file at
+``QR_CODE_REDIRECT_INDEX_PATH`` (see :mod:`..common.redirect_index`). Each process maps it
+read-only, so a cold worker answers redirects without the database and without a copy of the
+targets in its own memory, and redirects keep working while the database is unavailable.
+
+The index is a snapshot. Saving or deleting a code marks it as changed in the shared Django cache
+(``RedirectCache.invalidate``) for ``QR_CODE_REDIRECT_INDEX_MAX_AGE`` seconds, and marked codes are
+looked up in the database instead. Indexes older than that are ignored, so a change is always
+either in the index or marked. Run the command more often than the maximum age; without
+``--full`` it only re-reads the rows updated since the previous build.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from datetime import UTC, datetime
+
+from django.conf import settings
+
+from ..common.redirect_index import Entry, RedirectIndex, write_index
+from ..models import QRCode
+
+logger = logging.getLogger(__name__)
+
+# Rows updated this many seconds before the previous build are read again by an incremental
+# build, for transactions that committed after it started
+CLOCK_SLACK = 60
+
+# Seconds between checks for a new index file
+RELOAD_INTERVAL = 5
+
+# Rows read per query while compiling
+COMPILE_CHUNK_SIZE = 10000
+
+FIELDS = ('short_code', 'id', 'original_url', 'deleted_at')
+
+
+def compile_redirect_index(path: str | os.PathLike, full: bool = False) -> tuple[int, int]:
+    """Write the index of all short codes to ``path``; return the codes written and rows read.
+
+    Unless ``full``, the index already at ``path`` is updated with the rows changed since it was
+    built, and the codes deleted since.
+    """
+    built_at = time.time()
+    previous = None
+    if not full:
+        try:
+            previous = RedirectIndex(path)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    codes = QRCode.objects.filter(short_code__isnull=False)
+    if previous is None:
+        rows = codes
+    else:
+        since = datetime.fromtimestamp(previous.built_at - CLOCK_SLACK, tz=UTC)
+        rows = codes.filter(updated_at__gte=since)
+
+    entries: dict[str, Entry] = {}
+    if previous is not None:
+        existing = set(codes.values_list('short_code', flat=True).iterator(COMPILE_CHUNK_SIZE))
+        entries = {code: entry for code, entry in previous if code in existing}
+        previous.close()
+
+    read = 0
+    for short_code, qr_id, original_url, deleted_at in rows.values_list(*FIELDS).iterator(
+        COMPILE_CHUNK_SIZE
+    ):
+        entries[short_code] = (qr_id, original_url, deleted_at is not None)
+        read += 1
+
+    return write_index(path, entries.items(), built_at), read
+
+
+class RedirectIndexFile:
+    """Thread-safe reader of the index file at ``path``, reopened when the file is replaced."""
+
+    def __init__(self, path: str, max_age: float):
+        self.path = path
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._index: RedirectIndex | None = None
+        self._signature: tuple[int, int, int] | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.max_age > 0
+
+    def get(self, short_code: str) -> Entry | None:
+        """Return the indexed target of ``short_code``, or ``None`` if not in a current index."""
+        index = self._current()
+        entry = index.get(short_code) if index is not None else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def _current(self) -> RedirectIndex | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + RELOAD_INTERVAL
+                self._reload()
+            index = self._index
+        if index is None or time.time() - index.built_at > self.max_age:
+            return None
+        return index
+
+    def _reload(self):
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._signature:
+            return
+        self._signature = signature
+        # The old map is left to the garbage collector: other threads may still be reading it
+        self._index = None
+        if signature is not None:
+            try:
+                self._index = RedirectIndex(self.path)
+            except (OSError, ValueError):
+                logger.exception('Failed to open the redirect index %s', self.path)
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hit/miss counters, and the size and age of the mapped index."""
+        with self._lock:
+            index = self._index
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'entries': len(index) if index else 0,
+                'bytes': index.size_bytes if index else 0,
+                'age': round(time.time() - index.built_at) if index else 0,
+            }
+
+
+@functools.cache
+def get_redirect_index() -> RedirectIndexFile:
+    """Return the process-wide redirect index reader configured from settings."""
+    return RedirectIndexFile(
+        path=settings.QR_CODE_REDIRECT_INDEX_PATH,
+        max_age=settings.QR_CODE_REDIRECT_INDEX_MAX_AGE,
+    )
@@ -0,0 +1,174 @@
+"""
+Content-addressed render cache for QR code images.
+
+Rendered images are stored once per distinct :class:`RenderSpec`, named by the spec's cache key.
+Per-QR-code files are hard links to the cached artifact, so identical codes share disk blocks and
+evicting a cache entry never breaks a file that is still referenced by a ``QRCode`` row.
+
+The byte budget applies to the whole directory, which the web workers and the render pool share:
+each process re-measures it before evicting, at most every ``RESCAN_INTERVAL`` seconds, so the
+files written by the others count too.
+"""
+
+import functools
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+from ..common.rendering import RenderSpec
+
+logger = logging.getLogger(__name__)
+
+# Seconds between re-measurements of the cache directory when storing entries
+RESCAN_INTERVAL = 60
+
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered images stored as content-addressed files.
+
+    The LRU order is kept in memory and seeded from file modification times, so several
+    processes can share one cache directory. Hits touch the file to keep that order meaningful
+    across processes and restarts. Stores re-seed it every ``rescan_interval`` seconds, so
+    eviction sees the entries the other processes added.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, rescan_interval: float = RESCAN_INTERVAL):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.rescan_interval = rescan_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def path_for(self, spec: RenderSpec) -> Path:
+        """Return the content-addressed path for ``spec`` (whether cached or not)."""
+        return self.root / f'{spec.cache_key}.{spec.kind}'
+
+    def get(self, spec: RenderSpec) -> Path | None:
+        """Return the cached artifact for ``spec``, or ``None`` on a miss."""
+        path = self.path_for(spec)
+        with self._lock:
+            self._load()
+            if not path.exists():
+                self._forget(path.name)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(path.name, path.stat().st_size)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process between the check and the touch; still readable by
+            # anyone holding a link, and the next lookup will simply miss.
+            pass
+        return path
+
+    def put(self, spec: RenderSpec, data: bytes) -> Path:
+        """Store rendered ``data`` for ``spec`` and evict old entries if over budget."""
+        path = self.path_for(spec)
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            self._load(rescan=True)
+            self._remember(path.name, len(data))
+            self._evict(keep=path.name)
+        return path
+
+    @staticmethod
+    def link(source: Path, target: Path):
+        """Expose a cached artifact at ``target`` without copying its bytes.
+
+        Falls back to a copy when hard links aren't supported (e.g. across file systems).
+        """
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.unlink(missing_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _load(self, rescan: bool = False):
+        """Seed the LRU index from the cache directory (oldest first). Caller holds the lock.
+
+        With ``rescan``, the index is rebuilt if it was seeded over ``rescan_interval`` ago.
+        """
+        now = time.monotonic()
+        if self._loaded_at is not None and (
+            not rescan or now - self._loaded_at < self.rescan_interval
+        ):
+            return
+        self._loaded_at = now
+        self._entries.clear()
+        self._total_bytes = 0
+        if not self.root.is_dir():
+            return
+        files = []
+        for entry in os.scandir(self.root):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._remember(name, size)
+
+    def _remember(self, name: str, size: int):
+        self._forget(name)
+        self._entries[name] = size
+        self._total_bytes += size
+
+    def _forget(self, name: str):
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self, keep: str):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name = next(iter(self._entries))
+            if name == keep:
+                self._entries.move_to_end(name)
+                continue
+            self._forget(name)
+            (self.root / name).unlink(missing_ok=True)
+            self.evictions += 1
+            logger.debug('Evicted render cache entry %s', name)
+
+
+@functools.cache
+def get_render_cache() -> RenderCache:
+    """Return the process-wide render cache configured from settings."""
+    return RenderCache(
+        root=Path(settings.MEDIA_ROOT) / 'qrcodes' / 'cache',
+        max_bytes=settings.QR_CODE_RENDER_CACHE_MAX_BYTES,
+    )
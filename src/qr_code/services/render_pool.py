@@ -0,0 +1,107 @@
+"""
+Process pool for QR code encoding and rasterization.
+
+segno is pure Python, so renders hold the GIL; and ``sync_to_async`` defaults to running every
+call on the single thread-sensitive executor. Running renders in a process pool lets concurrent
+requests use all cores instead of queuing behind each other.
+
+Workers are started with the ``spawn`` method (safe with the threads of an ASGI server) and only
+import :mod:`src.qr_code.common.rendering`, which is Django-free.
+"""
+
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from ..common.rendering import warm_up, worker_pid
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_executor: ProcessPoolExecutor | None = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_render_executor(workers: int | None = None) -> ProcessPoolExecutor | None:
+    """Return the shared render pool, creating it on first use.
+
+    A new pool gets ``workers`` processes, ``QR_CODE_RENDER_WORKERS`` by default. Returns
+    ``None`` when there is no pool and that count is ``0``, in which case renders run in a thread
+    instead.
+    """
+    global _executor, _executor_workers
+
+    with _executor_lock:
+        if _executor is None:
+            count = settings.QR_CODE_RENDER_WORKERS if workers is None else workers
+            if count <= 0:
+                return None
+            _executor = ProcessPoolExecutor(
+                max_workers=count,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=warm_up,
+            )
+            _executor_workers = count
+            logger.info('Started render pool with %d worker(s)', count)
+        return _executor
+
+
+def start_render_pool(workers: int | None = None):
+    """Create the render pool and start all its workers up front (warm start).
+
+    Worker processes are otherwise spawned lazily, so the first renders after a deploy would pay
+    for interpreter start-up and the segno import. ``workers`` overrides
+    ``QR_CODE_RENDER_WORKERS``, e.g. for a management command.
+    """
+    executor = get_render_executor(workers)
+    if executor is None:
+        return
+    futures = [executor.submit(worker_pid) for _ in range(_executor_workers)]
+    pids = {future.result() for future in futures}
+    logger.info('Render pool warm: %d worker process(es) ready', len(pids))
+
+
+def shutdown_render_pool():
+    """Stop the render pool, if running."""
+    global _executor
+
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_in_render_pool(fn: Callable[..., T], *args: Any) -> T:
+    """Run a Django-free, picklable ``fn(*args)`` on the render pool.
+
+    Falls back to a non-thread-sensitive worker thread when the pool is disabled. A pool broken
+    by a crashed worker is replaced once before giving up.
+    """
+    executor = get_render_executor()
+    if executor is None:
+        return await sync_to_async(fn, thread_sensitive=False)(*args)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        logger.warning('Render pool is broken; restarting it')
+        workers = _executor_workers
+        shutdown_render_pool()
+        executor = get_render_executor(workers)
+        assert executor is not None
+        return await loop.run_in_executor(executor, fn, *args)
+
+
+atexit.register(shutdown_render_pool)
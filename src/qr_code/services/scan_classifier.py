@@ -0,0 +1,162 @@
+"""
+Classification of redirect requests into scans worth counting and the rest.
+
+Link previewers, chat apps and mail security scanners fetch a short code when its link is shared,
+and some clients retry or prefetch it; none of these are scans by a person. They still get their
+redirect, but :meth:`ScanClassifier.classify` tells the redirect not to record a scan:
+
+- ``HEAD`` requests only check the link;
+- user agents of known previewers, crawlers and scanners, matched case-insensitively;
+- repeated hits of the same code by the same client (address and user agent) within
+  ``QR_CODE_SCAN_DUPLICATE_WINDOW`` seconds of its last counted scan.
+
+Behind reverse proxies, the peer address is the proxy's, shared by every visitor: the client
+address is then read from ``X-Forwarded-For``, skipping the ``QR_CODE_TRUSTED_PROXY_HOPS`` entries
+the trusted proxies appended. Duplicate detection is off by default, as it would merge different
+people into one client if the hop count is left unset behind a proxy.
+
+Each skipped request is a write avoided, reported by :meth:`ScanClassifier.stats`.
+"""
+
+import functools
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+# Reasons a request isn't counted as a scan
+HEAD = 'head'
+BOT = 'bot'
+DUPLICATE = 'duplicate'
+
+# Case-insensitive patterns of preview, crawler and scanner user agents. Bots are matched by name:
+# a bare `bot` would also match phones such as CUBOT.
+BOT_USER_AGENT = re.compile(
+    '|'.join(
+        [
+            r'\b(?:google|bing|slack|twitter|linkedin|discord|telegram|apple|yandex|duckduck'
+            r'|pinterest|reddit|petal|ahrefs|semrush|mj12|gpt|amazon|face|cc)bot',
+            # Crawlers link to a page about themselves, e.g. `(+http://www.google.com/bot.html)`
+            r'\+https?://',
+            r'crawler',
+            r'spider',
+            r'preview',
+            r'facebookexternalhit',
+            r'facebookcatalog',
+            r'whatsapp',
+            r'slack-imgproxy',
+            r'skypeuripreview',
+            r'embedly',
+            r'iframely',
+            r'vkshare',
+            r'google-read-aloud',
+            r'mediapartners-google',
+            r'headlesschrome',
+            r'curl/',
+            r'wget/',
+            r'python-requests',
+            r'go-http-client',
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+# Clients remembered for duplicate detection; the least recently seen are forgotten first
+MAX_CLIENTS = 100000
+
+
+class ScanClassifier:
+    """Thread-safe classifier of redirect requests, counting the scan writes it avoids."""
+
+    def __init__(
+        self, duplicate_window: float, max_clients: int = MAX_CLIENTS, trusted_proxy_hops: int = 0
+    ):
+        self.duplicate_window = duplicate_window
+        self.max_clients = max_clients
+        self.trusted_proxy_hops = trusted_proxy_hops
+        self.counted = 0
+        self.skipped = {HEAD: 0, BOT: 0, DUPLICATE: 0}
+        self._last_counted: OrderedDict[tuple[str, str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def classify(
+        self, short_code: str, method: str, user_agent: str, peer: str, forwarded_for: str = ''
+    ) -> str | None:
+        """Return why this request isn't a scan (``HEAD``, ``BOT`` or ``DUPLICATE``), or ``None``.
+
+        ``peer`` is the address the request came from, and ``forwarded_for`` its
+        ``X-Forwarded-For`` header. A ``None`` result is remembered as the client's latest counted
+        scan of ``short_code``.
+        """
+        reason: str | None
+        if method == 'HEAD':
+            reason = HEAD
+        elif BOT_USER_AGENT.search(user_agent):
+            reason = BOT
+        else:
+            reason = self._duplicate(short_code, user_agent, self.client(peer, forwarded_for))
+
+        with self._lock:
+            if reason is None:
+                self.counted += 1
+            else:
+                self.skipped[reason] += 1
+        return reason
+
+    def client(self, peer: str, forwarded_for: str) -> str:
+        """Address of the client: the peer, or the one before the trusted proxies' entries.
+
+        Each proxy appends the address it received the request from to ``X-Forwarded-For``, so
+        with ``n`` trusted proxies the client is the ``n``-th entry from the end; entries further
+        left are set by the client and can't be trusted.
+        """
+        if self.trusted_proxy_hops <= 0:
+            return peer
+        addresses = [address.strip() for address in forwarded_for.split(',') if address.strip()]
+        if not addresses:
+            return peer
+        return addresses[-min(self.trusted_proxy_hops, len(addresses))]
+
+    def _duplicate(self, short_code: str, user_agent: str, client: str) -> str | None:
+        if self.duplicate_window <= 0 or self.max_clients <= 0:
+            return None
+        key = (short_code, client, user_agent)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_counted.get(key)
+            if last is not None and now - last < self.duplicate_window:
+                return DUPLICATE
+            self._last_counted[key] = now
+            self._last_counted.move_to_end(key)
+            while len(self._last_counted) > self.max_clients:
+                self._last_counted.popitem(last=False)
+        return None
+
+    def clear(self):
+        """Forget the clients seen so far."""
+        with self._lock:
+            self._last_counted.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Return counted and skipped requests, and the writes avoided."""
+        with self._lock:
+            avoided = sum(self.skipped.values())
+            requests = self.counted + avoided
+            return {
+                'counted': self.counted,
+                **self.skipped,
+                'writes_avoided': avoided,
+                'avoided_ratio': avoided / requests if requests else 0.0,
+                'clients': len(self._last_counted),
+            }
+
+
+@functools.cache
+def get_scan_classifier() -> ScanClassifier:
+    """Return the process-wide scan classifier configured from settings."""
+    return ScanClassifier(
+        duplicate_window=settings.QR_CODE_SCAN_DUPLICATE_WINDOW,
+        trusted_proxy_hops=settings.QR_CODE_TRUSTED_PROXY_HOPS,
+    )
@@ -0,0 +1,220 @@
+"""
+Write-behind scan recording.
+
+Redirects record scans in an in-process buffer instead of writing rows per scan. A background
+thread flushes the buffer every ``QR_CODE_SCAN_FLUSH_INTERVAL`` seconds, or as soon as
+``QR_CODE_SCAN_MAX_PENDING`` scans are waiting, in one transaction that:
+
+- inserts the buffered ``ScanEvent`` rows in one batch;
+- adds each code's delta to ``scan_count`` and keeps the latest ``last_scanned_at``;
+- adds the scans to the hourly and daily ``ScanRollup`` buckets.
+
+A viral code costs one ``UPDATE`` per flush, and increments never read the current counts, so
+concurrent processes can't lose updates.
+
+The buffer is flushed when the process exits; scans buffered by a process that is killed outright
+are lost. Failed flushes keep their scans for the next one, but at most ``MAX_BUFFERED`` scans are
+kept: while the database is unavailable, the oldest are dropped (and counted) instead of growing
+the buffer until the process runs out of memory. An interval of ``0`` writes every scan through
+immediately.
+"""
+
+import atexit
+import functools
+import logging
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from ..models import QRCode, ScanEvent, ScanPeriod, ScanRollup
+from .analytics import bucket_start
+
+logger = logging.getLogger(__name__)
+
+# Events inserted per INSERT statement
+EVENT_BATCH_SIZE = 500
+
+# Scans kept in the buffer at most; the oldest are dropped beyond this
+MAX_BUFFERED = 100000
+
+
+class ScanCounter:
+    """Thread-safe buffer of scans, flushed in batches by a background thread."""
+
+    def __init__(self, flush_interval: float, max_pending: int, max_buffered: int = MAX_BUFFERED):
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, 1)
+        self.max_buffered = max(max_buffered, self.max_pending)
+        self.flushes = 0
+        self.dropped = 0
+        self._events: list[ScanEvent] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def buffered(self) -> bool:
+        """Whether scans are buffered (otherwise each one is written through)."""
+        return self.flush_interval > 0
+
+    def record(self, qr_id: uuid.UUID, scanned_at: datetime | None = None, user_agent: str = ''):
+        """Record one scan of the QR code ``qr_id``."""
+        event = ScanEvent(
+            qrcode_id=qr_id,
+            scanned_at=scanned_at or timezone.now(),
+            user_agent=user_agent[: ScanEvent._meta.get_field('user_agent').max_length],
+        )
+        with self._lock:
+            self._events.append(event)
+            self._trim()
+            full = len(self._events) >= self.max_pending
+
+        if not self.buffered:
+            self.flush()
+            return
+        self._start()
+        if full:
+            self._wake.set()
+
+    async def arecord(
+        self, qr_id: uuid.UUID, scanned_at: datetime | None = None, user_agent: str = ''
+    ):
+        """Async version of :meth:`record`."""
+        if self.buffered:
+            self.record(qr_id, scanned_at, user_agent)
+        else:
+            await sync_to_async(self.record)(qr_id, scanned_at, user_agent)
+
+    def flush(self) -> int:
+        """Write the buffered scans in one transaction; return the number of scans written.
+
+        On failure the scans are put back in the buffer, to be retried by the next flush, as far
+        as ``max_buffered`` allows.
+        """
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+
+            try:
+                with transaction.atomic():
+                    self._write(events)
+            except Exception:
+                logger.exception('Failed to flush %d scan(s)', len(events))
+                for event in events:
+                    event.pk = None
+                with self._lock:
+                    self._events[:0] = events
+                    self._trim()
+                return 0
+
+            self.flushes += 1
+            return len(events)
+
+    def _trim(self):
+        """Drop the oldest scans beyond ``max_buffered``. Caller holds the lock."""
+        excess = len(self._events) - self.max_buffered
+        if excess > 0:
+            del self._events[:excess]
+            self.dropped += excess
+            logger.warning(
+                'Scan buffer full: dropped %d scan(s), %d in total', excess, self.dropped
+            )
+
+    @staticmethod
+    def _write(events: list[ScanEvent]):
+        # Codes deleted since they were scanned would fail the whole batch
+        scanned = {event.qrcode_id for event in events}
+        existing = set(QRCode.objects.filter(pk__in=scanned).values_list('pk', flat=True))
+        events = [event for event in events if event.qrcode_id in existing]
+        ScanEvent.objects.bulk_create(events, batch_size=EVENT_BATCH_SIZE)
+
+        counts = Counter(event.qrcode_id for event in events)
+        latest: dict[uuid.UUID, datetime] = {}
+        for event in events:
+            latest[event.qrcode_id] = max(
+                latest.get(event.qrcode_id, event.scanned_at), event.scanned_at
+            )
+        # Sorted, so concurrent flushers lock rows in the same order
+        for qr_id in sorted(counts):
+            last = latest[qr_id]
+            QRCode.objects.filter(pk=qr_id).update(
+                scan_count=F('scan_count') + counts[qr_id],
+                last_scanned_at=Coalesce(Greatest('last_scanned_at', Value(last)), Value(last)),
+            )
+
+        buckets = Counter(
+            (event.qrcode_id, period, bucket_start(event.scanned_at, period))
+            for event in events
+            for period in ScanPeriod.values
+        )
+        # Create missing buckets empty, then increment: safe against concurrent flushers
+        ScanRollup.objects.bulk_create(
+            [
+                ScanRollup(qrcode_id=qr_id, period=period, bucket=bucket)
+                for qr_id, period, bucket in buckets
+            ],
+            ignore_conflicts=True,
+        )
+        for (qr_id, period, bucket), count in sorted(buckets.items()):
+            ScanRollup.objects.filter(qrcode_id=qr_id, period=period, bucket=bucket).update(
+                count=F('count') + count
+            )
+
+    def stop(self):
+        """Stop the background thread and flush what is left."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _start(self):
+        if self._thread is not None or self._stopping.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='scan-counter-flusher', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                # This thread's connection would otherwise stay open between flushes
+                connections.close_all()
+
+
+@functools.cache
+def get_scan_counter() -> ScanCounter:
+    """Return the process-wide scan counter configured from settings."""
+    return ScanCounter(
+        flush_interval=settings.QR_CODE_SCAN_FLUSH_INTERVAL,
+        max_pending=settings.QR_CODE_SCAN_MAX_PENDING,
+    )
+
+
+def shutdown_scan_counter():
+    """Flush buffered scans, if any were counted in this process."""
+    if get_scan_counter.cache_info().currsize:
+        get_scan_counter().stop()
+
+
+atexit.register(shutdown_scan_counter)
@@ -0,0 +1,188 @@
+"""
+Full-text search of QR codes by name, content and target URL.
+
+On SQLite, an FTS5 table (``qr_code_qrcode_search``) indexes the three fields of every
+non-deleted code. Triggers on ``qr_code_qrcode`` keep it in sync with every write, including
+saves, soft deletes and restores, bulk inserts and ``update()`` calls, so the application never
+writes to it. Codes have a UUID primary key and an implicit ``rowid`` that ``VACUUM`` may renumber,
+so each code gets a stable integer key in ``qr_code_qrcode_search_key``, used as the row's
+``rowid``: triggers find a code's row through that table's unique index rather than by scanning.
+
+Searches match every word of the query as a prefix (``exam`` finds ``example.com``), ignoring
+case and accents, and rank results with BM25, names weighing most. Where the table doesn't exist
+(other databases, or SQLite without FTS5), searches fall back to ``icontains`` on the three fields,
+newest first.
+"""
+
+import base64
+import binascii
+import functools
+import re
+import sqlite3
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+
+from ..models import QRCode
+
+TABLE = 'qr_code_qrcode_search'
+KEY_TABLE = 'qr_code_qrcode_search_key'
+
+# BM25 weights of the name, content and original_url columns
+RANK = 'bm25(10.0, 1.0, 2.0)'
+
+_CREATE_SQL = [
+    f"""CREATE TABLE {KEY_TABLE} (
+        id integer NOT NULL PRIMARY KEY,
+        qrcode_id char(32) NOT NULL UNIQUE
+    )""",
+    f"""CREATE VIRTUAL TABLE {TABLE} USING fts5(
+        name, content, original_url,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"INSERT INTO {TABLE} ({TABLE}, rank) VALUES ('rank', '{RANK}')",
+    f"""CREATE TRIGGER {TABLE}_insert AFTER INSERT ON qr_code_qrcode BEGIN
+        INSERT INTO {KEY_TABLE} (qrcode_id) VALUES (new.id);
+        INSERT INTO {TABLE} (rowid, name, content, original_url)
+        SELECT last_insert_rowid(), new.name, new.content, coalesce(new.original_url, '')
+        WHERE new.deleted_at IS NULL;
+    END""",
+    f"""CREATE TRIGGER {TABLE}_update
+    AFTER UPDATE OF name, content, original_url, deleted_at ON qr_code_qrcode BEGIN
+        DELETE FROM {TABLE}
+        WHERE rowid = (SELECT id FROM {KEY_TABLE} WHERE qrcode_id = old.id);
+        INSERT INTO {TABLE} (rowid, name, content, original_url)
+        SELECT id, new.name, new.content, coalesce(new.original_url, '') FROM {KEY_TABLE}
+        WHERE qrcode_id = new.id AND new.deleted_at IS NULL;
+    END""",
+    f"""CREATE TRIGGER {TABLE}_delete AFTER DELETE ON qr_code_qrcode BEGIN
+        DELETE FROM {TABLE}
+        WHERE rowid = (SELECT id FROM {KEY_TABLE} WHERE qrcode_id = old.id);
+        DELETE FROM {KEY_TABLE} WHERE qrcode_id = old.id;
+    END""",
+    f"INSERT INTO {KEY_TABLE} (qrcode_id) SELECT id FROM qr_code_qrcode",
+    f"""INSERT INTO {TABLE} (rowid, name, content, original_url)
+    SELECT search_key.id, qrcode.name, qrcode.content, coalesce(qrcode.original_url, '')
+    FROM qr_code_qrcode AS qrcode JOIN {KEY_TABLE} AS search_key ON search_key.qrcode_id = qrcode.id
+    WHERE qrcode.deleted_at IS NULL""",
+]
+
+_DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {TABLE}_update',
+    f'DROP TRIGGER IF EXISTS {TABLE}_delete',
+    f'DROP TABLE IF EXISTS {TABLE}',
+    f'DROP TABLE IF EXISTS {KEY_TABLE}',
+]
+
+
+@functools.cache
+def fts5_supported() -> bool:
+    """Whether the SQLite library has the FTS5 extension."""
+    connection = sqlite3.connect(':memory:')
+    try:
+        connection.execute('CREATE VIRTUAL TABLE probe USING fts5(text)')
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+    return True
+
+
+def search_index_available(alias: str = 'default') -> bool:
+    """Whether the database ``alias`` has the FTS5 search table (created by migration 0004)."""
+    connection = connections[alias]
+    if connection.vendor != 'sqlite' or not fts5_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def create_search_index(connection):
+    """Create the search tables and triggers, and index existing codes (no-op if unsupported).
+
+    The same schema as migration 0004, for databases created without migrations.
+    """
+    if connection.vendor != 'sqlite' or not fts5_supported():
+        return
+    with connection.cursor() as cursor:
+        for sql in _CREATE_SQL:
+            cursor.execute(sql)
+
+
+def drop_search_index(connection):
+    """Drop the search tables and their triggers."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for sql in _DROP_SQL:
+            cursor.execute(sql)
+
+
+def search(queryset: QuerySet[QRCode], query: str) -> QuerySet[QRCode]:
+    """Codes of ``queryset`` matching ``query``, best matches first (newest first on fallback)."""
+    words = re.findall(r'\w+', query)
+    if not words:
+        return queryset.none()
+
+    if not search_index_available(queryset.db):
+        for word in words:
+            queryset = queryset.filter(
+                Q(name__icontains=word)
+                | Q(content__icontains=word)
+                | Q(original_url__icontains=word)
+            )
+        return queryset.order_by('-created_at', '-id')
+
+    # Quoted words with a trailing `*` are prefix matches, and can't be read as FTS5 syntax
+    match = ' '.join(f'"{word}"*' for word in words)
+    table = QRCode._meta.db_table
+    # Joined rather than filtered by a subquery, so matches are restricted to the codes of the
+    # queryset (e.g. one user's) and each match's rank is computed once
+    return queryset.extra(
+        select={'search_rank': f'{TABLE}.rank'},
+        tables=[TABLE, KEY_TABLE],
+        where=[
+            f'{TABLE} MATCH %s',
+            f'{KEY_TABLE}.id = {TABLE}.rowid',
+            f'{KEY_TABLE}.qrcode_id = {table}.id',
+        ],
+        params=[match],
+    ).order_by('search_rank', '-created_at', '-id')
+
+
+def ranked(queryset: QuerySet[QRCode]) -> bool:
+    """Whether ``queryset`` holds search results ordered by rank."""
+    return 'search_rank' in queryset.query.extra
+
+
+def encode_offset(offset: int) -> str:
+    """Cursor of the search result page starting at ``offset``."""
+    return base64.urlsafe_b64encode(f'search|{offset}'.encode()).decode().rstrip('=')
+
+
+def decode_offset(cursor: str) -> int:
+    """Decode a search cursor into an offset; raises ``ValueError`` if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except (UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError('Invalid cursor') from exc
+    prefix, _, offset = raw.partition('|')
+    if prefix != 'search' or not offset.isdigit():
+        raise ValueError('Invalid cursor')
+    return int(offset)
+
+
+def get_search_page(
+    queryset: QuerySet[QRCode], query: str, limit: int, cursor: str | None = None
+) -> tuple[list[QRCode], str | None]:
+    """Return one page of search results and the cursor of the next page (``None`` on the last).
+
+    Ranked results have no stable key to resume after, so search cursors hold an offset.
+    """
+    offset = decode_offset(cursor) if cursor else 0
+    page = list(search(queryset, query)[offset : offset + limit + 1])
+    if len(page) > limit:
+        return page[:limit], encode_offset(offset + limit)
+    return page, None
@@ -0,0 +1,193 @@
+"""
+In-memory filter of existing short codes.
+
+Scanners, bots and typos request many codes that don't exist. Before looking a code up in the
+database, redirects ask :meth:`ShortCodeFilter.might_exist`, which answers from memory:
+
+- a Bloom filter of every short code in the database, built by a background thread (started by
+  ``config/asgi.py`` and ``config/wsgi.py``) from the ``short_code`` index and rebuilt every
+  ``QR_CODE_SHORT_CODE_FILTER_REBUILD`` seconds, which also sheds deleted codes. Codes created in
+  this process are added as they are saved. Until the first build, every code is let through;
+- for codes created by other processes since the last build, the allocator's codes decode back to
+  their sequence numbers. Numbers that may have been handed out since a build are let through.
+
+Random and mistyped 9-character codes decode to numbers far beyond the sequence, so they are
+rejected even if created elsewhere in the meantime, as are codes of any other shape absent from
+the Bloom filter. Rejections are never wrong; a false positive only costs the usual query.
+"""
+
+import functools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from ..common.bloom import BloomFilter
+from ..common.short_codes import ShortCodePermutation
+from ..models import QRCode, ShortCodeSequence
+
+logger = logging.getLogger(__name__)
+
+# The filter is sized for this many times the codes present at build time, so it keeps its
+# false-positive rate while codes are added until the next rebuild
+GROWTH_FACTOR = 2
+MIN_CAPACITY = 10000
+
+# Sequence numbers up to this far past the value read at the last build are let through; more
+# codes than this would have to be allocated between two builds to be rejected wrongly
+SEQUENCE_SLACK = 10**9
+
+# Rows read per query while building
+BUILD_CHUNK_SIZE = 10000
+
+
+class ShortCodeFilter:
+    """Thread-safe, periodically rebuilt filter of the short codes that may exist.
+
+    Allocator blocks are dropped once half a rebuild interval old (``get_short_code_allocator``),
+    so numbers below the sequence value read by a build at least one interval ago are only
+    found in rows that a later build has seen. Numbers above it are let through.
+    """
+
+    def __init__(self, error_rate: float, rebuild_interval: float, sequence: str = 'default'):
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self.sequence = sequence
+        self.builds = 0
+        self.passed = 0
+        self.rejected = 0
+        self._bloom: BloomFilter | None = None
+        self._permutation: ShortCodePermutation | None = None
+        self._low = 0
+        self._high = 0
+        self._watermarks: list[tuple[float, int]] = []
+        self._added_while_building: list[str] | None = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rebuild_interval > 0
+
+    def might_exist(self, short_code: str) -> bool:
+        """``False`` only if ``short_code`` certainly isn't in the database."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            bloom, permutation = self._bloom, self._permutation
+            low, high = self._low, self._high
+            if bloom is None or short_code in bloom:
+                self.passed += 1
+                return True
+            number = permutation.decode(short_code) if permutation else None
+            if number is not None and low <= number < high:
+                self.passed += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def add(self, short_code: str):
+        """Add a code created by this process."""
+        with self._lock:
+            if self._added_while_building is not None:
+                self._added_while_building.append(short_code)
+            if self._bloom is None:
+                return
+            self._bloom.add(short_code)
+            full = self._bloom.count > self._bloom.capacity
+        if full:
+            self._wake.set()
+
+    def build(self):
+        """Rebuild the filter from the database."""
+        with self._lock:
+            self._added_while_building = []
+        try:
+            # Read before the codes, so every number below it is either in a row read below or
+            # handed out later from a block reserved before now
+            row: tuple[int, str] | None = (
+                ShortCodeSequence.objects.filter(name=self.sequence)
+                .values_list('next_value', 'key')
+                .first()
+            )
+            codes = QRCode.objects.filter(short_code__isnull=False)
+            bloom = BloomFilter(max(codes.count() * GROWTH_FACTOR, MIN_CAPACITY), self.error_rate)
+            for short_code in codes.values_list('short_code', flat=True).iterator(
+                chunk_size=BUILD_CHUNK_SIZE
+            ):
+                # Never None here, but the column is nullable
+                if short_code:
+                    bloom.add(short_code)
+        finally:
+            with self._lock:
+                added, self._added_while_building = self._added_while_building, None
+
+        now = time.monotonic()
+        watermark, key = row if row else (0, None)
+        with self._lock:
+            for short_code in added:
+                bloom.add(short_code)
+            # Lower bound: the latest watermark read at least one rebuild interval ago
+            self._watermarks.append((now, watermark))
+            old = [
+                index
+                for index, (taken_at, _) in enumerate(self._watermarks)
+                if now - taken_at >= self.rebuild_interval
+            ]
+            if old:
+                self._watermarks = self._watermarks[old[-1] :]
+                self._low = self._watermarks[0][1]
+            self._high = watermark + SEQUENCE_SLACK
+            self._bloom = bloom
+            if key is not None:
+                self._permutation = ShortCodePermutation(key.encode())
+            self.builds += 1
+        logger.info('Built short code filter: %d code(s), %d bytes', bloom.count, bloom.size_bytes)
+
+    def start(self):
+        """Start building and rebuilding in a background thread (no-op if started or disabled)."""
+        if self._thread is not None or not self.enabled:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='short-code-filter', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.build()
+            except Exception:
+                logger.exception('Failed to build the short code filter')
+            finally:
+                # This thread's connection would otherwise stay open between builds
+                connections.close_all()
+            self._wake.wait(self.rebuild_interval)
+            self._wake.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Return pass/reject counters and current size."""
+        with self._lock:
+            checks = self.passed + self.rejected
+            return {
+                'passed': self.passed,
+                'rejected': self.rejected,
+                'reject_ratio': self.rejected / checks if checks else 0.0,
+                'codes': self._bloom.count if self._bloom else 0,
+                'bytes': self._bloom.size_bytes if self._bloom else 0,
+                'builds': self.builds,
+            }
+
+
+@functools.cache
+def get_short_code_filter() -> ShortCodeFilter:
+    """Return the process-wide short code filter configured from settings."""
+    return ShortCodeFilter(
+        error_rate=settings.QR_CODE_SHORT_CODE_FILTER_ERROR_RATE,
+        rebuild_interval=settings.QR_CODE_SHORT_CODE_FILTER_REBUILD,
+    )
@@ -0,0 +1,101 @@
+"""
+Short code allocation.
+
+Short codes are numbered from the ``ShortCodeSequence`` table and the numbers mapped to codes by a
+keyed permutation (:mod:`..common.short_codes`). Distinct numbers always give distinct codes, so
+allocating a code needs no lookup of existing ones.
+
+Each process reserves a block of numbers at a time with one ``UPDATE``, then hands them out from
+memory; most allocations make no query at all. Numbers of a block left unused when the process
+exits are skipped, which only leaves gaps in the sequence.
+"""
+
+import functools
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from ..common.short_codes import ShortCodePermutation
+from ..models import ShortCodeSequence
+
+
+class ShortCodeAllocator:
+    """Thread-safe allocator of unique short codes from blocks of a database sequence.
+
+    Inside a transaction, only the numbers needed are reserved and none are kept for later: the
+    reservation is rolled back with the transaction, so keeping them could hand out numbers
+    another process reserves again after the rollback.
+
+    With ``max_block_age``, what is left of a block is dropped once the block is that many seconds
+    old: numbers reserved before a given time stop being handed out soon after it, which the
+    short code filter relies on.
+    """
+
+    def __init__(
+        self, sequence: str = 'default', block_size: int = 1000, max_block_age: float | None = None
+    ):
+        self.sequence = sequence
+        self.block_size = max(block_size, 1)
+        self.max_block_age = max_block_age
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._reserved_at = 0.0
+        self._permutation: ShortCodePermutation | None = None
+
+    def allocate(self, count: int = 1) -> list[str]:
+        """Allocate ``count`` unique short codes."""
+        with self._lock:
+            age = time.monotonic() - self._reserved_at
+            if self.max_block_age is not None and age > self.max_block_age:
+                self._next = self._end
+            numbers = list(range(self._next, min(self._next + count, self._end)))
+            self._next += len(numbers)
+            missing = count - len(numbers)
+            if missing:
+                if transaction.get_connection().in_atomic_block:
+                    start = self._reserve(missing)
+                else:
+                    size = max(self.block_size, missing)
+                    start = self._reserve(size)
+                    self._next, self._end = start + missing, start + size
+                    self._reserved_at = time.monotonic()
+                numbers.extend(range(start, start + missing))
+            if not numbers:
+                return []
+            # Numbers only come from reservations, which load the permutation key
+            permutation = self._permutation
+            assert permutation is not None
+            return [permutation.encode(number) for number in numbers]
+
+    def allocate_one(self) -> str:
+        """Allocate a single short code."""
+        return self.allocate(1)[0]
+
+    def _reserve(self, size: int) -> int:
+        """Reserve ``size`` consecutive numbers of the sequence and return the first one."""
+        sequences = ShortCodeSequence.objects.filter(name=self.sequence)
+        with transaction.atomic():
+            if not sequences.update(next_value=F('next_value') + size):
+                ShortCodeSequence.objects.get_or_create(
+                    name=self.sequence, defaults={'key': secrets.token_hex(32)}
+                )
+                sequences.update(next_value=F('next_value') + size)
+            next_value, key = sequences.values_list('next_value', 'key').get()
+        if self._permutation is None:
+            self._permutation = ShortCodePermutation(key.encode())
+        return next_value - size
+
+
+@functools.cache
+def get_short_code_allocator() -> ShortCodeAllocator:
+    """Return the process-wide short code allocator configured from settings."""
+    rebuild_interval = settings.QR_CODE_SHORT_CODE_FILTER_REBUILD
+    return ShortCodeAllocator(
+        block_size=settings.QR_CODE_SHORT_CODE_BLOCK_SIZE,
+        max_block_age=rebuild_interval / 2 if rebuild_interval > 0 else None,
+    )
@@ -0,0 +1,51 @@
+"""
+Dashboard thumbnails.
+
+Rows of the dashboard show small previews of each QR code. Instead of the full-size image, they
+use either a small PNG thumbnail per code, or a single SVG sprite holding one ``<symbol>`` per code
+of the page, so the whole page costs one image request.
+
+Both are cache-busted by ``updated_at``: URLs carry a version derived from it and are served as
+immutable.
+"""
+
+import asyncio
+import hashlib
+from collections.abc import Iterable
+
+from ..common import svg
+from ..models import QRCode
+from .qrcode import QRCodeGenerator
+
+# Versioned URLs never change content, so browsers may keep them as long as they like
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+
+def symbol_id(qrcode: QRCode) -> str:
+    """Id of the sprite ``<symbol>`` of ``qrcode``."""
+    return f'qr-{qrcode.id}'
+
+
+def thumbnail_version(qrcode: QRCode) -> str:
+    """Cache-busting version of the thumbnail of ``qrcode``."""
+    return str(int(qrcode.updated_at.timestamp()))
+
+
+def sprite_version(qrcodes: Iterable[QRCode]) -> str:
+    """Cache-busting version of a sprite; changes when a code is added, removed or updated."""
+    digest = hashlib.sha256()
+    for qrcode in qrcodes:
+        digest.update(f'{qrcode.id}:{qrcode.updated_at.timestamp()};'.encode())
+    return digest.hexdigest()[:16]
+
+
+async def render_sprite(qrcodes: list[QRCode]) -> str:
+    """Render an SVG sprite with one symbol per QR code, encoding them concurrently."""
+    specs = [QRCodeGenerator.render_spec(qrcode) for qrcode in qrcodes]
+    matrices = await asyncio.gather(*(QRCodeGenerator.encode(spec) for spec in specs))
+    return svg.sprite(
+        [
+            svg.symbol(symbol_id(qrcode), matrix.to_matrix(), spec.border, spec.dark, spec.light)
+            for qrcode, spec, matrix in zip(qrcodes, specs, matrices)
+        ]
+    )
@@ -6,6 +6,9 @@ from .views import (
     confirm_email_page,
     credits_history_page,
     dashboard,
+    dashboard_archive,
+    dashboard_rows,
+    dashboard_sprite,
     email_confirmation_success,
     forgot_password_page,
     home_page,
@@ -13,6 +16,8 @@ from .views import (
     logout_page,
     qrcode_duplicate,
     qrcode_editor,
+    qrcode_image,
+    qrcode_thumbnail,
     register_page,
     reset_password_page,
 )
@@ -32,7 +37,12 @@ urlpatterns = [
     path('logout/', logout_page, name='logout-page'),
     path('register/', register_page, name='register-page'),
     path('dashboard/', dashboard, name='dashboard'),
+    path('dashboard/rows/', dashboard_rows, name='dashboard-rows'),
+    path('dashboard/sprite.svg', dashboard_sprite, name='dashboard-sprite'),
+    path('dashboard/archive.zip', dashboard_archive, name='dashboard-archive'),
     path('qrcodes/create/', qrcode_editor, name='qrcode-create'),
     path('qrcodes/edit/<uuid:qr_id>/', qrcode_editor, name='qrcode-edit'),
     path('qrcodes/duplicate/<uuid:qr_id>/', qrcode_duplicate, name='qrcode-duplicate'),
+    path('qrcodes/<uuid:qr_id>/image/', qrcode_image, name='qrcode-image'),
+    path('qrcodes/<uuid:qr_id>/thumbnail/', qrcode_thumbnail, name='qrcode-thumbnail'),
 ]
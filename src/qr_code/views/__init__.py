@@ -1,9 +1,13 @@
+from .media import serve_media
 from .pages import (
     account_created_page,
     account_page,
     confirm_email_page,
     credits_history_page,
     dashboard,
+    dashboard_archive,
+    dashboard_rows,
+    dashboard_sprite,
     email_confirmation_success,
     forgot_password_page,
     home_page,
@@ -11,6 +15,8 @@ from .pages import (
     logout_page,
     qrcode_duplicate,
     qrcode_editor,
+    qrcode_image,
+    qrcode_thumbnail,
     register_page,
     reset_password_page,
 )
@@ -21,6 +27,9 @@ __all__ = [
     'credits_history_page',
     'confirm_email_page',
     'dashboard',
+    'dashboard_archive',
+    'dashboard_rows',
+    'dashboard_sprite',
     'email_confirmation_success',
     'forgot_password_page',
     'home_page',
@@ -28,6 +37,9 @@ __all__ = [
     'logout_page',
     'qrcode_editor',
     'qrcode_duplicate',
+    'qrcode_image',
+    'qrcode_thumbnail',
     'register_page',
     'reset_password_page',
+    'serve_media',
 ]
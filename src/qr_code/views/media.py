@@ -0,0 +1,202 @@
+"""
+Media file serving.
+
+Generated QR images are served by this view in all environments, instead of Django's development
+``serve`` view:
+
+- files are read off the event loop and streamed in chunks when large;
+- ETags are strong (content hashes), conditional requests get ``304 Not Modified``;
+- files are cacheable for ``QR_CODE_MEDIA_MAX_AGE``, and forever (``immutable``) when the URL
+  can't outlive the content: content-addressed render cache paths, and URLs whose ``v`` query
+  parameter is the file's ETag;
+- single byte ranges are supported (``206 Partial Content``);
+- precompressed siblings are chosen by ``Accept-Encoding`` (see ``common.compression``), and
+  carry their ``Content-Encoding`` when requested directly;
+- optionally, the response only carries an ``X-Accel-Redirect`` (nginx) or ``X-Sendfile``
+  (Apache, lighttpd) header and the front proxy sends the bytes.
+"""
+
+import functools
+import hashlib
+import mimetypes
+import os
+import re
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import BinaryIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from ..common.compression import accepted_encodings, sibling_path
+
+# Files with precompressed siblings (see `common.compression`)
+PRECOMPRESSED_SUFFIXES = {'.svg'}
+
+# Content-addressed files (render cache, see `services.render_cache`) and their siblings
+CONTENT_ADDRESSED = re.compile(r'^qrcodes/cache/[0-9a-f]{64}\.[a-z0-9.]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Files up to this size are read in one go; larger ones are streamed
+CHUNK_SIZE = 256 * 1024
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@functools.lru_cache(maxsize=4096)
+def _digest(path: str, inode: int, size: int, mtime_ns: int) -> str:
+    """Content hash of a file; the stat fields key the cache so rewritten files are re-hashed."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()[:32]
+
+
+def _resolve(path: str, accept_encoding: str) -> tuple[Path, str | None, os.stat_result]:
+    """Pick the file to send for ``path``: the best accepted precompressed sibling, or itself."""
+    full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+
+    if full_path.suffix in PRECOMPRESSED_SUFFIXES:
+        for encoding in accepted_encodings(accept_encoding):
+            sibling = sibling_path(full_path, encoding)
+            try:
+                return sibling, encoding, sibling.stat()
+            except FileNotFoundError:
+                continue
+
+    try:
+        stat = full_path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    if not full_path.is_file():
+        raise Http404('File not found')
+    return full_path, None, stat
+
+
+def _byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single-range ``Range`` header into ``(start, end)`` (inclusive).
+
+    Returns ``None`` for anything other than one ``bytes`` range, in which case the whole file is
+    sent. Raises ``ValueError`` if the range is not satisfiable.
+    """
+    match = RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def _open(path: Path, start: int) -> BinaryIO:
+    f = open(path, 'rb')
+    f.seek(start)
+    return f
+
+
+async def _read_chunks(path: Path, start: int, length: int) -> AsyncIterator[bytes]:
+    f = await sync_to_async(_open, thread_sensitive=False)(path, start)
+    try:
+        while length > 0:
+            chunk = await sync_to_async(f.read, thread_sensitive=False)(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        await sync_to_async(f.close, thread_sensitive=False)()
+
+
+def _read(path: Path, start: int, length: int) -> bytes:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(length)
+
+
+async def serve_media(request: HttpRequest, path: str) -> HttpResponse | StreamingHttpResponse:
+    """Serve a file from ``MEDIA_ROOT``."""
+    file_path, encoding, stat = await sync_to_async(_resolve, thread_sensitive=False)(
+        path, request.headers.get('Accept-Encoding', '')
+    )
+
+    etag = await sync_to_async(_digest, thread_sensitive=False)(
+        str(file_path), stat.st_ino, stat.st_size, stat.st_mtime_ns
+    )
+    if encoding:
+        etag = f'{etag}-{encoding}'
+
+    # A sibling requested by name (`.svgz`, `.svg.br`) is still compressed content
+    content_type, file_encoding = mimetypes.guess_type(path)
+    encoding = encoding or file_encoding
+    if CONTENT_ADDRESSED.match(path) or request.GET.get('v') == etag:
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f'public, max-age={settings.QR_CODE_MEDIA_MAX_AGE}'
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+        'Content-Type': content_type or 'application/octet-stream',
+    }
+    if encoding:
+        headers['Content-Encoding'] = encoding
+
+    response: HttpResponse | StreamingHttpResponse
+    not_modified = get_conditional_response(request, etag=headers['ETag'])
+    if not_modified is None:
+        response = await _file_response(request, file_path, stat.st_size, headers)
+    else:
+        response = not_modified
+        for name in ('ETag', 'Cache-Control'):
+            response[name] = headers[name]
+
+    if Path(path).suffix in PRECOMPRESSED_SUFFIXES:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+async def _file_response(
+    request: HttpRequest, file_path: Path, size: int, headers: dict[str, str]
+) -> HttpResponse | StreamingHttpResponse:
+    accel = settings.QR_CODE_MEDIA_ACCEL
+    if accel == 'nginx':
+        relative = file_path.relative_to(os.path.abspath(settings.MEDIA_ROOT)).as_posix()
+        headers['X-Accel-Redirect'] = f'{settings.QR_CODE_MEDIA_ACCEL_PREFIX}{relative}'
+        return HttpResponse(headers=headers)
+    if accel == 'sendfile':
+        headers['X-Sendfile'] = str(file_path)
+        return HttpResponse(headers=headers)
+
+    start, end, status = 0, size - 1, 200
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    if_range = request.headers.get('If-Range', headers['ETag'])
+    if 'Range' in request.headers and if_range == headers['ETag']:
+        try:
+            byte_range = _byte_range(request.headers['Range'], size)
+        except ValueError:
+            return HttpResponse(
+                status=416, headers={'Content-Range': f'bytes */{size}', 'ETag': headers['ETag']}
+            )
+        if byte_range is not None:
+            (start, end), status = byte_range, 206
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    length = end - start + 1
+    headers['Content-Length'] = str(length)
+    if length <= CHUNK_SIZE:
+        body = await sync_to_async(_read, thread_sensitive=False)(file_path, start, length)
+        return HttpResponse(body, status=status, headers=headers)
+    return StreamingHttpResponse(
+        _read_chunks(file_path, start, length), status=status, headers=headers
+    )
@@ -1,13 +1,29 @@
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import BadRequest
 from django.core.paginator import Paginator
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.urls import reverse
 
 from ..models import CreditTransaction, QRCode
+from ..services.archive import archive_queryset, archive_response
 from ..services.email_confirmation import get_email_confirmation_service
+from ..services.image_variants import serve_variant
+from ..services.pagination import get_page
 from ..services.password_reset import PasswordResetService, get_password_reset_service
+from ..services.search import get_search_page, search
+from ..services.thumbnails import (
+    IMMUTABLE_CACHE_CONTROL,
+    render_sprite,
+    sprite_version,
+    thumbnail_version,
+)
 
 
 def home_page(request: HttpRequest) -> HttpResponse:
@@ -57,33 +73,123 @@ def logout_page(request: HttpRequest) -> HttpResponse:
     return redirect('home')
 
 
+def _dashboard_page(
+    user, query: str, sort: str, cursor: str = ''
+) -> tuple[list[QRCode], str | None]:
+    """One batch of the QR codes listed on the dashboard, and the cursor of the next batch.
+
+    Raises ``ValueError`` if ``cursor`` is malformed.
+    """
+    qrcodes = QRCode.objects.filter(created_by=user, deleted_at__isnull=True)
+    limit = settings.QR_CODE_DASHBOARD_PAGE_SIZE
+
+    if query:
+        # Best matches first, unless sorted explicitly
+        if not sort:
+            return get_search_page(qrcodes, query, limit, cursor or None)
+        qrcodes = search(qrcodes, query)
+
+    return get_page(qrcodes, limit, cursor or None, sort)
+
+
+def _dashboard_rows_context(request: HttpRequest) -> dict:
+    """Context of one batch of dashboard rows, for the ``q``, ``sort`` and ``cursor`` parameters."""
+    query = request.GET.get('q', '')
+    sort = request.GET.get('sort', '')
+    cursor = request.GET.get('cursor', '')
+
+    try:
+        qrcodes, next_cursor = _dashboard_page(request.user, query, sort, cursor)
+    except ValueError as exc:
+        raise BadRequest('Invalid cursor') from exc
+
+    # Thumbnails come from one SVG sprite per batch, versioned by the listed codes
+    sprite_url = None
+    if settings.QR_CODE_DASHBOARD_SPRITE and qrcodes:
+        params = {'q': query, 'sort': sort, 'v': sprite_version(qrcodes)}
+        if cursor:
+            params['cursor'] = cursor
+        sprite_url = f'{reverse("dashboard-sprite")}?{urlencode(params)}'
+
+    # The next batch is fetched when its placeholder row scrolls into view
+    next_url = None
+    if next_cursor:
+        params = {'q': query, 'sort': sort, 'cursor': next_cursor}
+        next_url = f'{reverse("dashboard-rows")}?{urlencode(params)}'
+
+    return {
+        'qrcodes': qrcodes,
+        'query': query,
+        'sprite_url': sprite_url,
+        'next_url': next_url,
+        'first_batch': not cursor,
+    }
+
+
 @login_required
 def dashboard(request: HttpRequest) -> HttpResponse:
-    """Render the user dashboard with their QR codes."""
+    """Render the user dashboard with the first batch of their QR codes."""
     user = request.user
 
     # Narrow type for static checkers; guarded by @login_required.
     if isinstance(user, AnonymousUser):
         raise RuntimeError('Authenticated user required')
 
+    return render(request, 'dashboard.html', _dashboard_rows_context(request))
+
+
+@login_required
+def dashboard_rows(request: HttpRequest) -> HttpResponse:
+    """Render the next batch of dashboard rows as an HTML fragment, for infinite scroll.
+
+    Takes the dashboard's ``q`` and ``sort`` parameters, plus the ``cursor`` of the batch.
+    """
+    return render(request, 'dashboard_rows.html', _dashboard_rows_context(request))
+
+
+@login_required
+async def dashboard_sprite(request: HttpRequest) -> HttpResponse:
+    """Serve an SVG sprite with the thumbnails of one batch of dashboard rows.
+
+    Takes the same ``q``, ``sort`` and ``cursor`` parameters as the rows, plus the ``v`` version
+    used for cache busting.
+    """
+    user = await request.auser()
+
     query = request.GET.get('q', '')
     sort = request.GET.get('sort', '')
+    cursor = request.GET.get('cursor', '')
+    try:
+        qrcodes, _ = await sync_to_async(_dashboard_page)(user, query, sort, cursor)
+    except ValueError as exc:
+        raise BadRequest('Invalid cursor') from exc
 
-    qrcodes = QRCode.objects.filter(created_by=user, deleted_at__isnull=True)
+    version = sprite_version(qrcodes)
+    if request.GET.get('v') == version:
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = 'private, no-cache'
 
-    if query:
-        qrcodes = qrcodes.filter(name__icontains=query)
+    return HttpResponse(
+        await render_sprite(qrcodes),
+        content_type='image/svg+xml',
+        headers={'Cache-Control': cache_control, 'ETag': f'"{version}"'},
+    )
 
-    if sort == 'name':
-        qrcodes = qrcodes.order_by('name')
-    else:
-        qrcodes = qrcodes.order_by('-created_at')
 
-    context = {
-        'qrcodes': qrcodes,
-        'query': query,
-    }
-    return render(request, 'dashboard.html', context)
+@login_required
+async def dashboard_archive(request: HttpRequest) -> StreamingHttpResponse:
+    """Download the images of the user's QR codes as a ZIP archive, with a manifest CSV.
+
+    Takes the dashboard's ``q`` search parameter, and ``format`` to keep a single image format.
+    Session-authenticated counterpart of ``GET /api/qrcodes/archive``.
+    """
+    user = await request.auser()
+
+    queryset = await sync_to_async(archive_queryset)(
+        user, request.GET.get('q', ''), request.GET.get('format')
+    )
+    return archive_response(queryset)
 
 
 @login_required
@@ -116,6 +222,55 @@ def qrcode_editor(request: HttpRequest, qr_id: str | None = None) -> HttpRespons
     return render(request, 'qrcode_editor.html', context)
 
 
+@login_required
+async def qrcode_image(request: HttpRequest, qr_id: str) -> HttpResponse:
+    """Serve the image of one of the user's QR codes, rendering it on first request.
+
+    Session-authenticated counterpart of ``GET /api/qrcodes/{id}/image``, for ``<img>`` tags.
+    """
+    user = await request.auser()
+
+    # Narrow type for static checkers; guarded by @login_required.
+    if isinstance(user, AnonymousUser):
+        raise RuntimeError('Authenticated user required')
+
+    try:
+        qrcode = await QRCode.objects.aget(id=qr_id, created_by=user, deleted_at__isnull=True)
+    except QRCode.DoesNotExist:
+        msg = 'QR Code not found'
+        raise Http404(msg)
+
+    return await serve_variant(request, qrcode)
+
+
+@login_required
+async def qrcode_thumbnail(request: HttpRequest, qr_id: str) -> HttpResponse:
+    """Serve a small PNG thumbnail of one of the user's QR codes.
+
+    Thumbnails are rendered on first request at ``QR_CODE_THUMBNAIL_SCALE``. Requests carrying
+    the current ``v`` (see :func:`thumbnail_version`) are cacheable forever.
+    """
+    user = await request.auser()
+
+    # Narrow type for static checkers; guarded by @login_required.
+    if isinstance(user, AnonymousUser):
+        raise RuntimeError('Authenticated user required')
+
+    try:
+        qrcode = await QRCode.objects.aget(id=qr_id, created_by=user, deleted_at__isnull=True)
+    except QRCode.DoesNotExist:
+        msg = 'QR Code not found'
+        raise Http404(msg)
+
+    kwargs = {}
+    if request.GET.get('v') == thumbnail_version(qrcode):
+        kwargs['cache_control'] = IMMUTABLE_CACHE_CONTROL
+
+    return await serve_variant(
+        request, qrcode, qr_format='png', scale=settings.QR_CODE_THUMBNAIL_SCALE, **kwargs
+    )
+
+
 @login_required
 def qrcode_duplicate(request: HttpRequest, qr_id: str) -> HttpResponse:
     """Render the QR code editor in create mode, pre-filled from an existing QR code.
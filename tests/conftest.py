@@ -11,6 +11,11 @@ from rest_framework.test import APIClient  # type: ignore[import-not-found]
 
 from src.qr_code.api.router import api
 from src.qr_code.models import QRCode, QRCodeErrorCorrection, QRCodeFormat, QRCodeType
+from src.qr_code.services.scan_classifier import get_scan_classifier
+from src.qr_code.services.scan_counter import get_scan_counter
+from src.qr_code.services.search import TABLE as SEARCH_TABLE
+from src.qr_code.services.search import create_search_index
+from src.qr_code.services.short_code_filter import get_short_code_filter
 from src.qr_code.tokens import EmailConfirmationToken, PasswordResetToken
 
 # Ensure settings that require env vars have sane defaults during tests.
@@ -23,6 +28,37 @@ os.environ.pop('ENVIRONMENT', None)
 User = get_user_model()
 
 
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Create the full-text search table of migration 0004, as tests run without migrations."""
+    from django.db import connection
+
+    with django_db_blocker.unblock():
+        if SEARCH_TABLE not in connection.introspection.table_names():
+            create_search_index(connection)
+
+
+@pytest.fixture(autouse=True)
+def write_through_scans(settings):
+    """Write every scan through, so tests see them without waiting for the background flusher."""
+    settings.QR_CODE_SCAN_FLUSH_INTERVAL = 0
+    settings.QR_CODE_SCAN_DUPLICATE_WINDOW = 0
+    get_scan_counter.cache_clear()
+    get_scan_classifier.cache_clear()
+    yield
+    get_scan_counter.cache_clear()
+    get_scan_classifier.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def no_short_code_filter(settings):
+    """Disable the short code filter, whose background builds would race the test database."""
+    settings.QR_CODE_SHORT_CODE_FILTER_REBUILD = 0
+    get_short_code_filter.cache_clear()
+    yield
+    get_short_code_filter.cache_clear()
+
+
 @pytest.fixture
 def api_client():
     """Provide a DRF API client for testing (legacy)."""
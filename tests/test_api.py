@@ -2,12 +2,19 @@
 Integration tests for QR code API endpoints.
 """
 
+import csv
+import io
+import json
+import zipfile
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 
 from src.qr_code.models import QRCode, QRCodeType
+from src.qr_code.services.render_cache import get_render_cache
 
 User = get_user_model()
 
@@ -511,3 +518,813 @@ class TestRedirectEndpoint:
 
         assert response.status_code == status.HTTP_302_FOUND
         assert response.url == reverse('dashboard')
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestQRCodeImageEndpoints:
+    """Test cases for the image and export endpoints."""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_WORKERS = 0
+        get_render_cache.cache_clear()
+        yield tmp_path
+        get_render_cache.cache_clear()
+
+    @pytest.fixture
+    def auth_headers(self, jwt_tokens):
+        return {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+
+    def test_create_does_not_render(self, client, auth_headers, media_root):
+        """Test that create returns without rendering and points at the image endpoint."""
+        response = client.post(
+            '/api/qrcodes/',
+            {'data': 'Hello', 'qr_type': 'text'},
+            content_type='application/json',
+            **auth_headers,
+        )
+
+        assert response.status_code == 201
+        body = response.json()
+        assert body['image_url'] == reverse('qrcode-image', args=[body['id']])
+        assert not any(media_root.rglob('*.*'))
+
+    def test_renders_variant_once(self, client, auth_headers, qr_code):
+        """Test that a variant is rendered on first request and then served from the cache."""
+        url = f'/api/qrcodes/{qr_code.id}/image?format=svg&scale=20'
+
+        first = client.get(url, **auth_headers)
+        second = client.get(url, **auth_headers)
+
+        assert first.status_code == 200
+        assert first['Content-Type'] == 'image/svg+xml'
+        assert first.content.startswith(b'<?xml')
+        assert second.content == first.content
+        assert get_render_cache().stats()['hits'] == 1
+
+    def test_conditional_requests(self, client, auth_headers, qr_code):
+        """Test that a matching ETag or Last-Modified is answered with 304."""
+        url = f'/api/qrcodes/{qr_code.id}/image'
+        response = client.get(url, **auth_headers)
+
+        by_etag = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **auth_headers)
+        by_date = client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'], **auth_headers)
+        other_scale = client.get(
+            f'{url}?scale=3', HTTP_IF_NONE_MATCH=response['ETag'], **auth_headers
+        )
+
+        assert response['Content-Type'] == 'image/png'
+        assert by_etag.status_code == 304
+        assert by_etag['ETag'] == response['ETag']
+        assert by_date.status_code == 304
+        assert other_scale.status_code == 200
+
+    def test_rejects_large_scale(self, client, auth_headers, qr_code, settings):
+        """Test that scales above the configured maximum are rejected."""
+        settings.QR_CODE_IMAGE_MAX_SCALE = 40
+
+        response = client.get(f'/api/qrcodes/{qr_code.id}/image?scale=41', **auth_headers)
+
+        assert response.status_code == 400
+
+    def test_other_users_code_not_found(self, client, auth_headers, qr_code):
+        """Test that another user's QR code is not served."""
+        other = User.objects.create_user(username='other@example.com', email='other@example.com')
+        qr_code.created_by = other
+        qr_code.save()
+
+        response = client.get(f'/api/qrcodes/{qr_code.id}/image', **auth_headers)
+
+        assert response.status_code == 404
+
+    def test_page_route_uses_session(self, client, user, qr_code):
+        """Test the session-authenticated image route used by the dashboard."""
+        client.force_login(user)
+
+        response = client.get(reverse('qrcode-image', kwargs={'qr_id': qr_code.id}))
+
+        assert response.status_code == 200
+        assert response.content.startswith(b'\x89PNG')
+
+    def test_export_formats(self, client, auth_headers, qr_code, media_root):
+        """Test exporting several formats in one request."""
+        response = client.post(
+            f'/api/qrcodes/{qr_code.id}/export',
+            {'formats': ['png', 'svg', 'pdf', 'svg']},
+            content_type='application/json',
+            **auth_headers,
+        )
+
+        assert response.status_code == 200
+        artifacts = response.json()['artifacts']
+        assert [a['qr_format'] for a in artifacts] == ['png', 'svg', 'pdf']
+        for artifact in artifacts:
+            shard = f'{qr_code.id.hex[:2]}/{qr_code.id.hex[2:4]}'
+            assert artifact['path'] == f'qrcodes/{shard}/{qr_code.id}.{artifact["qr_format"]}'
+            assert artifact['url'] == f'/media/{artifact["path"]}'
+            assert (media_root / artifact['path']).stat().st_size == artifact['size']
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestBulkCreateEndpoint:
+    """Test cases for the bulk creation endpoint."""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_WORKERS = 0
+        settings.QR_CODE_BULK_BATCH_SIZE = 2
+        get_render_cache.cache_clear()
+        yield tmp_path
+        get_render_cache.cache_clear()
+
+    @pytest.fixture
+    def auth_headers(self, jwt_tokens):
+        return {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+
+    def _results(self, response) -> list[dict]:
+        assert response['Content-Type'] == 'application/x-ndjson'
+        body = b''.join(response).decode()
+        return sorted((json.loads(line) for line in body.splitlines()), key=lambda r: r['index'])
+
+    def test_bulk_create_json_array(self, client, auth_headers, user):
+        """Test creating codes from a JSON array, with shortened URLs allocated in bulk."""
+        items = [
+            {'url': 'https://example.com/a', 'qr_type': 'url', 'use_url_shortening': True},
+            {'url': 'https://example.com/b', 'qr_type': 'url', 'use_url_shortening': True},
+            {'data': 'Hello', 'qr_type': 'text'},
+        ]
+
+        response = client.post(
+            '/api/qrcodes/bulk', items, content_type='application/json', **auth_headers
+        )
+
+        assert response.status_code == 200
+        results = self._results(response)
+        assert [r['index'] for r in results] == [0, 1, 2]
+        assert QRCode.objects.filter(created_by=user).count() == 3
+        first = QRCode.objects.get(id=results[0]['id'])
+        assert first.short_code == results[0]['short_code']
+        assert first.original_url == 'https://example.com/a'
+        assert first.content == first.get_redirect_url()
+        assert results[0]['short_code'] != results[1]['short_code']
+        assert 'short_code' not in results[2]
+        assert results[2]['image_url'] == reverse('qrcode-image', args=[results[2]['id']])
+
+    def test_bulk_create_ndjson_reports_item_errors(self, client, auth_headers, user):
+        """Test that invalid NDJSON lines fail alone, without failing their batch."""
+        body = '\n'.join(
+            [
+                json.dumps({'data': 'One', 'qr_type': 'text'}),
+                '{not json',
+                json.dumps({'qr_type': 'text'}),
+                json.dumps({'data': 'Two', 'qr_type': 'text', 'size': 'big'}),
+                json.dumps({'data': 'Three', 'qr_type': 'text'}),
+            ]
+        )
+
+        response = client.post(
+            '/api/qrcodes/bulk', body, content_type='application/x-ndjson', **auth_headers
+        )
+
+        results = self._results(response)
+        assert [('error' in r) for r in results] == [False, True, True, True, False]
+        assert results[1]['error'] == 'Invalid JSON.'
+        assert results[2]['error'] == 'Either url or data is required.'
+        assert results[3]['error'].startswith('size:')
+        assert QRCode.objects.filter(created_by=user).count() == 2
+
+    def test_bulk_create_renders(self, client, auth_headers, media_root):
+        """Test that images are rendered and stored when requested."""
+        items = [{'data': f'Item {i}', 'qr_type': 'text'} for i in range(3)]
+
+        response = client.post(
+            '/api/qrcodes/bulk?render=true', items, content_type='application/json', **auth_headers
+        )
+
+        for result in self._results(response):
+            qrcode = QRCode.objects.get(id=result['id'])
+            assert qrcode.image_file
+            assert result['image_url'] == f'/media/{qrcode.image_file}'
+            assert (media_root / qrcode.image_file).is_file()
+
+    def test_bulk_create_rejects_too_many_items(self, client, auth_headers, settings):
+        """Test the item limit of JSON array bodies."""
+        settings.QR_CODE_BULK_MAX_ITEMS = 1
+        items = [{'data': 'A', 'qr_type': 'text'}, {'data': 'B', 'qr_type': 'text'}]
+
+        response = client.post(
+            '/api/qrcodes/bulk', items, content_type='application/json', **auth_headers
+        )
+
+        assert response.status_code == 400
+        assert QRCode.objects.count() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestArchiveEndpoints:
+    """Test cases for the streaming ZIP archive of a user's QR codes."""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_WORKERS = 0
+        get_render_cache.cache_clear()
+        yield tmp_path
+        get_render_cache.cache_clear()
+
+    @pytest.fixture
+    def auth_headers(self, jwt_tokens):
+        return {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+
+    def _archive(self, response) -> zipfile.ZipFile:
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/zip'
+        return zipfile.ZipFile(io.BytesIO(b''.join(response)))
+
+    def test_archive_streams_images_and_manifest(self, client, auth_headers, user, media_root):
+        """Test that stored images are copied and missing ones rendered on the fly."""
+        stored = QRCode.objects.create(
+            name='Stored', content='A', created_by=user, qr_format='svg', image_file=''
+        )
+        stored.image_file = f'qrcodes/{stored.id}.svg'
+        stored.save()
+        (media_root / 'qrcodes').mkdir()
+        (media_root / stored.image_file).write_bytes(b'<svg/>')
+        lazy = QRCode.objects.create(name='Lazy', content='B', created_by=user, image_file='')
+        QRCode.objects.create(name='Deleted', content='C', created_by=user).soft_delete()
+
+        archive = self._archive(client.get('/api/qrcodes/archive', **auth_headers))
+
+        assert archive.testzip() is None
+        assert archive.read(f'{stored.id}.svg') == b'<svg/>'
+        assert archive.read(f'{lazy.id}.png').startswith(b'\x89PNG')
+        manifest = list(csv.DictReader(io.StringIO(archive.read('manifest.csv').decode())))
+        assert sorted(row['name'] for row in manifest) == ['Lazy', 'Stored']
+        assert {row['file'] for row in manifest} == {f'{stored.id}.svg', f'{lazy.id}.png'}
+
+    def test_archive_filters(self, client, auth_headers, user):
+        """Test filtering the archive by name search and format."""
+        QRCode.objects.create(name='Summer sale', content='A', created_by=user, qr_format='svg')
+        QRCode.objects.create(name='Summer menu', content='B', created_by=user, qr_format='png')
+        QRCode.objects.create(name='Winter sale', content='C', created_by=user, qr_format='svg')
+
+        response = client.get('/api/qrcodes/archive?q=summer&format=svg', **auth_headers)
+
+        manifest = self._archive(response).read('manifest.csv').decode()
+        assert 'Summer sale' in manifest
+        assert 'Summer menu' not in manifest
+        assert 'Winter sale' not in manifest
+
+    def test_dashboard_archive_uses_session(self, client, user):
+        """Test the session-authenticated download linked from the dashboard."""
+        QRCode.objects.create(name='Mine', content='A', created_by=user)
+        client.force_login(user)
+
+        archive = self._archive(client.get(reverse('dashboard-archive')))
+
+        assert len(archive.namelist()) == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestListPagination:
+    """Test cases for cursor pagination and streaming of the list endpoint."""
+
+    @pytest.fixture
+    def auth_headers(self, jwt_tokens):
+        return {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+
+    @pytest.fixture
+    def qrcodes(self, user):
+        created = [
+            QRCode.objects.create(name=f'Code {i}', content=f'{i}', created_by=user)
+            for i in range(5)
+        ]
+        # Two codes created in the same instant are ordered by id
+        QRCode.objects.filter(id=created[1].id).update(created_at=created[2].created_at)
+        return created
+
+    def _newest_first(self, user) -> list[str]:
+        return [
+            str(qr_id)
+            for qr_id in QRCode.objects.filter(created_by=user)
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+        ]
+
+    def test_pages_follow_next_links(self, client, auth_headers, user, qrcodes):
+        """Test that following the next links lists every code once, newest first."""
+        seen = []
+        url = '/api/qrcodes/?limit=2'
+        pages = 0
+        while url:
+            response = client.get(url, **auth_headers)
+            assert response.status_code == 200
+            seen.extend(item['id'] for item in response.json())
+            pages += 1
+            link = response.get('Link')
+            url = link[1 : link.index('>')] if link else None
+
+        assert pages == 3
+        assert seen == self._newest_first(user)
+
+    def test_default_page_size(self, client, auth_headers, settings, qrcodes):
+        """Test the default page size."""
+        settings.QR_CODE_LIST_PAGE_SIZE = 3
+
+        response = client.get('/api/qrcodes/', **auth_headers)
+
+        assert len(response.json()) == 3
+        assert 'limit=3' in response['Link']
+
+    def test_invalid_parameters(self, client, auth_headers, settings):
+        """Test rejecting malformed cursors and oversized limits."""
+        settings.QR_CODE_LIST_MAX_PAGE_SIZE = 10
+
+        assert client.get('/api/qrcodes/?cursor=bogus', **auth_headers).status_code == 400
+        assert client.get('/api/qrcodes/?limit=11', **auth_headers).status_code == 400
+
+    def test_stream_returns_all_codes(self, client, auth_headers, settings, user, qrcodes):
+        """Test that the streaming mode returns one JSON array of all codes."""
+        settings.QR_CODE_LIST_STREAM_CHUNK_SIZE = 2
+        QRCode.objects.filter(id=qrcodes[0].id).update(deleted_at=qrcodes[0].created_at)
+
+        response = client.get('/api/qrcodes/?stream=true', **auth_headers)
+
+        items = json.loads(b''.join(response))
+        assert [item['id'] for item in items] == self._newest_first(user)[:-1]
+        assert items[0]['image_url'] == reverse('qrcode-image', args=[items[0]['id']])
+
+    def test_stream_empty(self, client, auth_headers):
+        """Test streaming an empty listing."""
+        response = client.get('/api/qrcodes/?stream=true', **auth_headers)
+
+        assert json.loads(b''.join(response)) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestSearch:
+    """Test cases for full-text search of the list endpoint and the dashboard."""
+
+    @pytest.fixture
+    def auth_headers(self, jwt_tokens):
+        return {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+
+    @pytest.fixture
+    def qrcodes(self, user):
+        def create(name, url):
+            return QRCode.objects.create(
+                name=name, content=url, original_url=url, qr_type='url', created_by=user
+            )
+
+        deleted = create('Coffee archive', 'https://example.com/old')
+        deleted.soft_delete()
+        return [
+            create('Menu', 'https://coffee.example.com/menu'),
+            create('Coffee corner', 'https://example.com/corner'),
+            create('Café terrace', 'https://example.com/terrace'),
+            create('Tea room', 'https://example.com/tea'),
+        ]
+
+    def _names(self, response) -> list[str]:
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()]
+
+    def test_ranked_prefix_matches(self, client, auth_headers, qrcodes):
+        """Test that words match as prefixes of any field, names ranking first."""
+        response = client.get('/api/qrcodes/?search=coff', **auth_headers)
+
+        assert self._names(response) == ['Coffee corner', 'Menu']
+        assert self._names(client.get('/api/qrcodes/?search=cafe', **auth_headers)) == [
+            'Café terrace'
+        ]
+        assert self._names(client.get('/api/qrcodes/?search=tea+exam', **auth_headers)) == [
+            'Tea room'
+        ]
+        assert self._names(client.get('/api/qrcodes/?search=%22*', **auth_headers)) == []
+
+    def test_index_follows_writes(self, client, auth_headers, qrcodes):
+        """Test that renames, updates, soft deletes and restores are searchable at once."""
+        qrcodes[3].name = 'Espresso bar'
+        qrcodes[3].save(update_fields=['name'])
+        QRCode.objects.filter(pk=qrcodes[2].pk).update(name='Espresso terrace')
+        qrcodes[1].soft_delete()
+        QRCode.objects.filter(name='Coffee archive').update(deleted_at=None)
+
+        assert sorted(self._names(client.get('/api/qrcodes/?search=espresso', **auth_headers))) == [
+            'Espresso bar',
+            'Espresso terrace',
+        ]
+        assert self._names(client.get('/api/qrcodes/?search=coffee', **auth_headers)) == [
+            'Coffee archive',
+            'Menu',
+        ]
+
+    def test_other_users_codes_not_matched(self, client, auth_headers, qrcodes):
+        """Test that searches only match the user's own codes."""
+        other = User.objects.create_user(username='other@example.com', email='other@example.com')
+        QRCode.objects.create(
+            name='Coffee shop', content='https://example.com/shop', qr_type='url', created_by=other
+        )
+
+        response = client.get('/api/qrcodes/?search=coffee', **auth_headers)
+
+        assert self._names(response) == ['Coffee corner', 'Menu']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_index_survives_vacuum(self, client, auth_headers, qrcodes):
+        """Test that writes after a VACUUM, which may renumber rowids, update the right rows."""
+        from django.db import connection
+
+        QRCode.objects.filter(name='Coffee archive').delete()
+        qrcodes[0].delete()
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
+        qrcodes[3].name = 'Espresso bar'
+        qrcodes[3].save(update_fields=['name'])
+
+        assert self._names(client.get('/api/qrcodes/?search=espresso', **auth_headers)) == [
+            'Espresso bar'
+        ]
+        assert self._names(client.get('/api/qrcodes/?search=room', **auth_headers)) == []
+        assert self._names(client.get('/api/qrcodes/?search=coffee', **auth_headers)) == [
+            'Coffee corner'
+        ]
+
+    def test_index_availability_checks_table(self):
+        """Test that the search is only used where the table exists."""
+        from django.db import connection
+
+        from src.qr_code.services.search import (
+            drop_search_index,
+            search_index_available,
+        )
+
+        assert search_index_available()
+        drop_search_index(connection)
+        assert not search_index_available()
+
+    def test_search_pages(self, client, auth_headers, qrcodes):
+        """Test that ranked results are paginated with next links that keep the search."""
+        response = client.get('/api/qrcodes/?search=example&limit=3', **auth_headers)
+        link = response['Link']
+        next_page = client.get(link[link.index('/api/') : link.index('>')], **auth_headers)
+
+        assert len(self._names(response)) == 3
+        assert 'search=example' in link
+        assert len(self._names(next_page)) == 1
+        assert 'Link' not in next_page
+
+    def test_dashboard_search(self, client, user, qrcodes):
+        """Test that the dashboard ``q`` parameter uses the search."""
+        client.force_login(user)
+
+        response = client.get(reverse('dashboard'), {'q': 'coff'})
+
+        assert [qr.name for qr in response.context['qrcodes']] == ['Coffee corner', 'Menu']
+
+    def test_archive_follows_rank(self, client, auth_headers, qrcodes):
+        """Test that archived searches keep the ranked order, manifest and files alike."""
+        response = client.get('/api/qrcodes/archive?q=coff', **auth_headers)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response)))
+
+        manifest = list(csv.DictReader(io.StringIO(archive.read('manifest.csv').decode())))
+        assert [row['name'] for row in manifest] == ['Coffee corner', 'Menu']
+        assert [row['file'] for row in manifest] == archive.namelist()[:-1]
+
+    def test_fallback_without_index(self, client, auth_headers, monkeypatch, qrcodes):
+        """Test that searches fall back to substring matches without the search table."""
+        monkeypatch.setattr(
+            'src.qr_code.services.search.search_index_available', lambda alias='default': False
+        )
+
+        response = client.get('/api/qrcodes/?search=offee', **auth_headers)
+
+        assert self._names(response) == ['Coffee corner', 'Menu']
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestRedirectCache:
+    """Test cases for the cached resolution of short codes."""
+
+    @pytest.fixture(autouse=True)
+    def _clear_redirect_cache(self):
+        from django.core.cache import cache
+
+        from src.qr_code.services.redirect_cache import get_redirect_cache
+
+        get_redirect_cache().clear()
+        cache.clear()
+
+    def test_hot_code_needs_no_read(self, client, qr_code_with_shortening):
+        """Test that a repeated scan doesn't look the code up in the database."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = f'/api/go/{qr_code_with_shortening.short_code}'
+        client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+
+        assert response.status_code == 302
+        assert response.url == qr_code_with_shortening.original_url
+        assert not [q for q in queries if 'short_code' in q['sql']]
+        qr_code_with_shortening.refresh_from_db()
+        assert qr_code_with_shortening.scan_count == 2
+
+    def test_shared_cache_serves_other_processes(self, client, qr_code_with_shortening):
+        """Test that a code cached by another process is read from the shared cache."""
+        from src.qr_code.services.redirect_cache import get_redirect_cache
+
+        url = f'/api/go/{qr_code_with_shortening.short_code}'
+        client.get(url)
+        get_redirect_cache().clear()
+        stats = get_redirect_cache().stats()
+
+        client.get(url)
+
+        after = get_redirect_cache().stats()
+        assert after['shared_hits'] == stats['shared_hits'] + 1
+        assert after['misses'] == stats['misses']
+
+    def test_soft_delete_invalidates(self, client, qr_code_with_shortening):
+        """Test that a soft-deleted code stops redirecting to its target."""
+        url = f'/api/go/{qr_code_with_shortening.short_code}'
+        client.get(url)
+
+        qr_code_with_shortening.soft_delete()
+        response = client.get(url)
+
+        assert response.url == reverse('dashboard')
+
+    def test_target_update_invalidates(self, client, qr_code_with_shortening):
+        """Test that changing the target URL is picked up by the next scan."""
+        url = f'/api/go/{qr_code_with_shortening.short_code}'
+        client.get(url)
+
+        qr_code_with_shortening.original_url = 'https://example.org/new'
+        qr_code_with_shortening.save(update_fields=['original_url'])
+        response = client.get(url)
+
+        assert response.url == 'https://example.org/new'
+
+    def test_unknown_code(self, client):
+        """Test that unknown codes are not found and not cached."""
+        from src.qr_code.services.redirect_cache import get_redirect_cache
+
+        response = client.get('/api/go/missing')
+
+        assert response.status_code == 404
+        assert get_redirect_cache().stats()['entries'] == 0
+
+    def test_previews_and_repeats_are_not_scans(self, client, settings, qr_code_with_shortening):
+        """Test that previewers, HEAD requests and repeats are redirected without a scan."""
+        from src.qr_code.services.scan_classifier import get_scan_classifier
+
+        settings.QR_CODE_SCAN_DUPLICATE_WINDOW = 30
+        get_scan_classifier.cache_clear()
+        url = f'/api/go/{qr_code_with_shortening.short_code}'
+
+        responses = [
+            client.get(url, HTTP_USER_AGENT='Mozilla/5.0 Safari/604.1'),
+            client.get(url, HTTP_USER_AGENT='Mozilla/5.0 Safari/604.1'),
+            client.get(url, HTTP_USER_AGENT='Twitterbot/1.0'),
+            client.head(url, HTTP_USER_AGENT='Mozilla/5.0 Safari/604.1'),
+        ]
+
+        assert [response.status_code for response in responses] == [302] * 4
+        qr_code_with_shortening.refresh_from_db()
+        assert qr_code_with_shortening.scan_count == 1
+        assert get_scan_classifier().stats()['writes_avoided'] == 3
+
+    @pytest.fixture
+    def redirect_index(self, settings, tmp_path):
+        from src.qr_code.services.redirect_index import get_redirect_index
+
+        settings.QR_CODE_REDIRECT_INDEX_PATH = str(tmp_path / 'redirects.idx')
+        get_redirect_index.cache_clear()
+        yield settings.QR_CODE_REDIRECT_INDEX_PATH
+        get_redirect_index.cache_clear()
+
+    def test_index_serves_cold_workers(self, client, redirect_index, qr_code_with_shortening):
+        """Test that a compiled index answers redirects without the database."""
+        from django.core.cache import cache
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        call_command('compile_redirect_index', stdout=io.StringIO())
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/go/{qr_code_with_shortening.short_code}')
+
+        assert response.status_code == 302
+        assert response.url == qr_code_with_shortening.original_url
+        assert not [q for q in queries if 'short_code' in q['sql']]
+
+    def test_index_skips_changed_codes(self, client, redirect_index, qr_code_with_shortening):
+        """Test that codes saved after the index was compiled are read from the database."""
+        call_command('compile_redirect_index', stdout=io.StringIO())
+        qr_code_with_shortening.original_url = 'https://example.org/new'
+        qr_code_with_shortening.save(update_fields=['original_url'])
+
+        response = client.get(f'/api/go/{qr_code_with_shortening.short_code}')
+
+        assert response.url == 'https://example.org/new'
+
+    def test_filtered_code_needs_no_read(self, client, settings, qr_code_with_shortening):
+        """Test that codes ruled out by the short code filter are not looked up."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from src.qr_code.services.short_code_filter import get_short_code_filter
+
+        settings.QR_CODE_SHORT_CODE_FILTER_REBUILD = 3600
+        get_short_code_filter.cache_clear()
+        get_short_code_filter().build()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/go/zzzzzzzzz')
+
+        assert response.status_code == 404
+        assert not [q for q in queries if 'short_code' in q['sql']]
+        assert client.get(f'/api/go/{qr_code_with_shortening.short_code}').status_code == 302
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestScanAnalytics:
+    """Test cases for the scan analytics endpoint."""
+
+    def test_daily_series_from_rollups(self, client, qr_code_with_shortening, jwt_tokens):
+        """Test that scans are reported per day from the rollups."""
+        auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+        for _ in range(3):
+            client.get(f'/api/go/{qr_code_with_shortening.short_code}')
+
+        response = client.get(
+            f'/api/qrcodes/{qr_code_with_shortening.id}/scans?period=day', **auth_headers
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body['period'] == 'day'
+        assert body['total'] == 3
+        assert [bucket['count'] for bucket in body['buckets']] == [3]
+
+    def test_hourly_series_range(self, client, qr_code, jwt_tokens):
+        """Test hourly buckets within an explicit range."""
+        from datetime import datetime
+        from datetime import timezone as dt_timezone
+
+        from src.qr_code.services.scan_counter import get_scan_counter
+
+        auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+        for hour in (8, 8, 9, 12):
+            get_scan_counter().record(
+                qr_code.id, datetime(2026, 3, 1, hour, 15, tzinfo=dt_timezone.utc)
+            )
+
+        response = client.get(
+            f'/api/qrcodes/{qr_code.id}/scans?period=hour'
+            '&start=2026-03-01T08:30:00Z&end=2026-03-01T12:00:00Z',
+            **auth_headers,
+        )
+
+        body = response.json()
+        assert body['total'] == 3
+        assert [(b['bucket'][11:13], b['count']) for b in body['buckets']] == [('08', 2), ('09', 1)]
+
+    def test_invalid_range(self, client, qr_code, jwt_tokens):
+        """Test that empty and oversized ranges are rejected."""
+        auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+        url = f'/api/qrcodes/{qr_code.id}/scans'
+
+        reversed_range = client.get(
+            f'{url}?start=2026-03-02T00:00:00Z&end=2026-03-01T00:00:00Z', **auth_headers
+        )
+        too_long = client.get(
+            f'{url}?period=hour&start=2020-01-01T00:00:00Z&end=2026-01-01T00:00:00Z',
+            **auth_headers,
+        )
+
+        assert reversed_range.status_code == 400
+        assert too_long.status_code == 400
+
+    def test_other_users_code_not_found(self, client, qr_code, jwt_tokens):
+        """Test that analytics of another user's code are not exposed."""
+        other = User.objects.create_user(
+            username='other-scans@example.com', email='other-scans@example.com', password='pw'
+        )
+        qr_code.created_by = other
+        qr_code.save(update_fields=['created_by'])
+        auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {jwt_tokens["access"]}'}
+
+        response = client.get(f'/api/qrcodes/{qr_code.id}/scans', **auth_headers)
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestRedirectFastPath:
+    """Test cases for the ASGI fast path of short code redirects."""
+
+    @pytest.fixture(autouse=True)
+    def _isolate(self, settings):
+        from django.core import signals
+        from django.core.cache import cache
+        from django.db import close_old_connections
+
+        from src.qr_code.services.redirect_cache import get_redirect_cache
+
+        # As the test client does: connections must survive the test's transaction
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        get_redirect_cache().clear()
+        cache.clear()
+        yield
+        signals.request_started.connect(close_old_connections)
+        signals.request_finished.connect(close_old_connections)
+
+    @staticmethod
+    def _call(path: str, method: str = 'GET') -> tuple[dict, list[str]]:
+        """Run a request through the fast path; return the response start and inner app calls."""
+        from asgiref.sync import async_to_sync
+
+        from src.qr_code.asgi import RedirectFastPath
+
+        calls, messages = [], []
+
+        async def app(scope, receive, send):
+            calls.append(scope['path'])
+            await send({'type': 'http.response.start', 'status': 299, 'headers': []})
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'headers': [(b'user-agent', b'Scanner/1.0')],
+        }
+        async_to_sync(RedirectFastPath(app))(scope, receive, send)
+        start = messages[0]
+        return {**start, 'headers': dict(start['headers'])}, calls
+
+    def test_redirects_and_counts_scan(self, qr_code_with_shortening):
+        """Test that a redirect is answered without Django and its scan is recorded."""
+        from src.qr_code.models import ScanEvent
+
+        for _ in range(2):
+            start, calls = self._call(f'/api/go/{qr_code_with_shortening.short_code}')
+
+        assert start['status'] == 302
+        assert start['headers'][b'location'] == qr_code_with_shortening.original_url.encode()
+        assert calls == []
+        qr_code_with_shortening.refresh_from_db()
+        assert qr_code_with_shortening.scan_count == 2
+        assert ScanEvent.objects.filter(user_agent='Scanner/1.0').count() == 2
+
+    def test_head_is_not_a_scan(self, qr_code_with_shortening):
+        """Test that HEAD requests get the redirect without Django and without a scan."""
+        start, calls = self._call(f'/api/go/{qr_code_with_shortening.short_code}', 'HEAD')
+
+        assert start['status'] == 302
+        assert start['headers'][b'location'] == qr_code_with_shortening.original_url.encode()
+        assert calls == []
+        qr_code_with_shortening.refresh_from_db()
+        assert qr_code_with_shortening.scan_count == 0
+
+    def test_unknown_and_deleted_codes(self, qr_code_with_shortening):
+        """Test the not found and soft-deleted answers."""
+        missing, _ = self._call('/api/go/missing')
+        qr_code_with_shortening.soft_delete()
+        deleted, _ = self._call(f'/api/go/{qr_code_with_shortening.short_code}')
+
+        assert missing['status'] == 404
+        assert deleted['status'] == 302
+        assert deleted['headers'][b'location'] == reverse('dashboard').encode()
+
+    @pytest.mark.parametrize(
+        'path,method',
+        [('/api/qrcodes/', 'GET'), ('/api/go/abc', 'POST'), ('/api/go/abc/def', 'GET')],
+    )
+    def test_other_requests_go_to_django(self, path, method):
+        """Test that anything but a redirect is passed to the wrapped application."""
+        start, calls = self._call(path, method)
+
+        assert start['status'] == 299
+        assert calls == [path]
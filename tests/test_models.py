@@ -4,13 +4,7 @@ Unit tests for QRCode model.
 
 import pytest
 
-from src.qr_code.models import (
-    QRCode,
-    QRCodeErrorCorrection,
-    QRCodeFormat,
-    QRCodeType,
-    generate_short_code,
-)
+from src.qr_code.models import QRCode, QRCodeErrorCorrection, QRCodeFormat, QRCodeType
 
 
 @pytest.mark.django_db
@@ -73,7 +67,7 @@ class TestQRCodeModel:
 
         assert qr.use_url_shortening is True
         assert qr.short_code is not None
-        assert len(qr.short_code) == 8
+        assert len(qr.short_code) == 9
         assert qr.original_url == 'https://example.com'
 
     def test_short_code_uniqueness(self, user):
@@ -227,21 +221,3 @@ class TestQRCodeModel:
 
         assert qr.qr_type == QRCodeType.TEXT
         assert qr.content == 'https://example.com'
-
-
-@pytest.mark.unit
-def test_generate_short_code():
-    """Test the short code generation function."""
-    code = generate_short_code()
-
-    assert len(code) == 8
-    assert code.isalnum()
-
-
-@pytest.mark.unit
-def test_generate_short_code_custom_length():
-    """Test generating short codes with custom length."""
-    code = generate_short_code(12)
-
-    assert len(code) == 12
-    assert code.isalnum()
@@ -2,13 +2,33 @@
 Unit tests for QR code generation services.
 """
 
+import io
+import json
+import re
+import struct
+import zlib
+from dataclasses import replace
 from pathlib import Path
+from typing import Any
 
 import pytest
 from django.conf import settings
+from django.core.management import call_command
 
+from src.qr_code.common.png import PngOptions
+from src.qr_code.common.rendering import (
+    EncodedMatrix,
+    RenderSpec,
+    encode,
+    normalize_color,
+    rasterize,
+    render,
+)
 from src.qr_code.models import QRCode, QRCodeErrorCorrection, QRCodeFormat
 from src.qr_code.services import QRCodeGenerator
+from src.qr_code.services.matrix_cache import MatrixCache, get_matrix_cache
+from src.qr_code.services.render_cache import RenderCache, get_render_cache
+from src.qr_code.services.render_pool import run_in_render_pool, shutdown_render_pool
 
 
 @pytest.mark.django_db
@@ -168,6 +188,19 @@ class TestQRCodeGenerator:
             full_path = Path(settings.MEDIA_ROOT) / image_path
             assert full_path.exists()
 
+    @pytest.mark.asyncio
+    async def test_render_bytes_in_memory(self, settings, tmp_path):
+        """Test that preview rendering returns image bytes without writing any files."""
+        settings.MEDIA_ROOT = tmp_path
+        qr = QRCode(content='https://example.com', qr_format=QRCodeFormat.PNG)
+
+        image = await QRCodeGenerator.render_bytes(qr)
+
+        assert image.startswith(b'\x89PNG')
+        assert list(tmp_path.iterdir()) == []
+        data_uri = QRCodeGenerator.to_data_uri(image, qr.qr_format)
+        assert data_uri.startswith('data:image/png;base64,')
+
     @pytest.mark.unit
     def test_parse_color_transparent(self):
         """Test parsing transparent color."""
@@ -193,3 +226,1022 @@ class TestQRCodeGenerator:
         url = QRCodeGenerator.get_file_url(image_file)
 
         assert url == f'/media/{image_file}'
+
+
+def _spec(content: str = 'https://example.com', **overrides: Any) -> RenderSpec:
+    values: dict[str, Any] = {
+        'content': content,
+        'error': 'M',
+        'scale': 2,
+        'border': 4,
+        'dark': '#000000',
+        'light': '#ffffff',
+        'kind': 'png',
+    }
+    values.update(overrides)
+    return RenderSpec(**values)
+
+
+@pytest.mark.django_db
+class TestMediaLayout:
+    """Test cases for the sharded media layout and its migration command."""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_CACHE_MAX_BYTES = 0
+        return tmp_path
+
+    def _flat_code(self, user, media_root, qr_format='svg') -> QRCode:
+        qr = QRCode.objects.create(content='https://example.com', created_by=user)
+        qr.image_file = f'qrcodes/{qr.id}.{qr_format}'
+        qr.save(update_fields=['image_file'])
+        (media_root / 'qrcodes').mkdir(exist_ok=True)
+        (media_root / qr.image_file).write_bytes(b'image')
+        return qr
+
+    def test_relative_path(self):
+        """Test that sharded paths are derived from the leading hex digits of the id."""
+        qr_id = '0123abcd-0000-4000-8000-000000000000'
+
+        sharded = QRCodeGenerator.relative_path(qr_id, 'png', 'sharded')
+        flat = QRCodeGenerator.relative_path(qr_id, 'png', 'flat')
+
+        assert sharded == f'qrcodes/01/23/{qr_id}.png'
+        assert flat == f'qrcodes/{qr_id}.png'
+
+    @pytest.mark.asyncio
+    async def test_generate_uses_configured_layout(self, user, media_root):
+        """Test that new images are written to the sharded layout."""
+        qr = QRCode(content='https://example.com', created_by=user, image_file='')
+
+        image_path = await QRCodeGenerator.generate_qr_code(qr)
+
+        assert image_path == f'qrcodes/{qr.id.hex[:2]}/{qr.id.hex[2:4]}/{qr.id}.png'
+        assert (media_root / image_path).is_file()
+
+    def test_migrate_moves_files_and_rows(self, user, media_root):
+        """Test that the command moves files with their siblings and rewrites image_file."""
+        qr = self._flat_code(user, media_root)
+        (media_root / f'{qr.image_file}z').write_bytes(b'gzip')
+        old_path = media_root / qr.image_file
+
+        call_command('migrate_media_layout', batch_size=1, stdout=io.StringIO())
+
+        qr.refresh_from_db()
+        assert qr.image_file == QRCodeGenerator.relative_path(qr.id, 'svg')
+        assert (media_root / qr.image_file).read_bytes() == b'image'
+        assert (media_root / f'{qr.image_file}z').read_bytes() == b'gzip'
+        assert not old_path.exists()
+        assert not Path(f'{old_path}z').exists()
+
+    def test_migrate_resumes(self, user, media_root):
+        """Test that a rerun skips moved rows and cleans up files of an interrupted run."""
+        qr = self._flat_code(user, media_root)
+        old_path = media_root / qr.image_file
+        target = QRCodeGenerator.relative_path(qr.id, 'svg')
+        # Interrupted after the switch, before the old file was removed
+        RenderCache.link(old_path, media_root / target)
+        QRCode.objects.filter(pk=qr.pk).update(image_file=target)
+        out = io.StringIO()
+
+        call_command('migrate_media_layout', stdout=out)
+
+        assert 'Moved 0 file(s)' in out.getvalue()
+        assert (media_root / target).is_file()
+        assert not old_path.exists()
+
+    def test_migrate_dry_run(self, user, media_root):
+        """Test that a dry run only counts files."""
+        qr = self._flat_code(user, media_root)
+        out = io.StringIO()
+
+        call_command('migrate_media_layout', dry_run=True, stdout=out)
+
+        assert 'Would move 1 file(s)' in out.getvalue()
+        qr.refresh_from_db()
+        assert (media_root / qr.image_file).is_file()
+
+    def test_migrate_back_to_flat(self, user, media_root, settings):
+        """Test that the command also moves files back to the flat layout."""
+        qr = self._flat_code(user, media_root)
+        call_command('migrate_media_layout', stdout=io.StringIO())
+        settings.QR_CODE_MEDIA_LAYOUT = 'flat'
+
+        call_command('migrate_media_layout', stdout=io.StringIO())
+
+        qr.refresh_from_db()
+        assert qr.image_file == f'qrcodes/{qr.id}.svg'
+        assert (media_root / qr.image_file).read_bytes() == b'image'
+
+
+@pytest.mark.django_db
+class TestImportCommand:
+    """Test cases for the import_qrcodes management command."""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_CACHE_MAX_BYTES = 0
+        return tmp_path
+
+    def _import(self, path: Path, user, **options) -> str:
+        out = io.StringIO()
+        call_command(
+            'import_qrcodes', str(path), user=user.email, stdout=out, stderr=out, **options
+        )
+        return out.getvalue()
+
+    def test_import_csv(self, user, tmp_path):
+        """Test importing a CSV file, with invalid rows reported and skipped."""
+        path = tmp_path / 'codes.csv'
+        path.write_text(
+            'name,url,data,qr_type,size,use_url_shortening\n'
+            'First,https://example.com/1,,url,12,true\n'
+            'Broken,,,text,,\n'
+            '"Multi\nline",,Hello,text,,\n'
+        )
+
+        output = self._import(path, user, batch_size=2)
+
+        assert 'Row 2: Either url or data is required.' in output
+        assert 'rows/s' in output
+        first, multi = QRCode.objects.filter(created_by=user).order_by('name')
+        assert (first.name, first.size, first.original_url) == (
+            'First',
+            12,
+            'https://example.com/1',
+        )
+        assert first.content == first.get_redirect_url()
+        assert (multi.name, multi.content) == ('Multi\nline', 'Hello')
+
+    def test_import_resumes_from_checkpoint(self, user, tmp_path):
+        """Test that a rerun only imports rows after the checkpoint."""
+        path = tmp_path / 'codes.ndjson'
+        path.write_text(''.join(f'{{"data": "Row {i}", "qr_type": "text"}}\n' for i in range(3)))
+        self._import(path, user, batch_size=2)
+        with path.open('a') as f:
+            f.write('{"data": "Row 3", "qr_type": "text"}\n')
+
+        output = self._import(path, user, batch_size=2)
+
+        assert 'Resuming after row 3' in output
+        contents = sorted(QRCode.objects.values_list('content', flat=True))
+        assert contents == ['Row 0', 'Row 1', 'Row 2', 'Row 3']
+
+    def test_import_skips_rows_committed_before_checkpoint(self, user, tmp_path):
+        """Test that rows committed but not checkpointed are not inserted twice."""
+        path = tmp_path / 'codes.ndjson'
+        path.write_text('{"data": "A", "qr_type": "text"}\n{"data": "B", "qr_type": "text"}\n')
+        self._import(path, user)
+        checkpoint = tmp_path / 'codes.ndjson.checkpoint'
+        state = json.loads(checkpoint.read_text())
+        checkpoint.write_text(json.dumps({**state, 'offset': 0, 'rows': 0, 'created': 0}))
+
+        self._import(path, user)
+
+        assert QRCode.objects.count() == 2
+
+    def test_import_renders(self, user, tmp_path, media_root):
+        """Test rendering images during the import."""
+        path = tmp_path / 'codes.ndjson'
+        path.write_text('{"data": "A", "qr_type": "text", "qr_format": "svg"}\n')
+
+        self._import(path, user, render=True, workers=0)
+
+        qrcode = QRCode.objects.get()
+        assert qrcode.image_file.endswith('.svg')
+        assert (media_root / qrcode.image_file).is_file()
+
+
+@pytest.mark.unit
+class TestRenderCache:
+    """Test cases for the content-addressed render cache."""
+
+    def test_normalize_color_equivalent_spellings(self):
+        """Test that equivalent color spellings share a cache key."""
+        assert normalize_color('White') == normalize_color('#FFF') == '#ffffff'
+        assert normalize_color('transparent') is None
+        assert _spec(light=normalize_color('white')).cache_key == _spec().cache_key
+
+    def test_cache_key_depends_on_style(self):
+        """Test that any style change produces a different cache key."""
+        assert _spec().cache_key != _spec(scale=3).cache_key
+        assert _spec().cache_key != _spec(kind='svg').cache_key
+
+    def test_miss_then_hit(self, tmp_path):
+        """Test hit/miss counters on repeated lookups."""
+        cache = RenderCache(tmp_path, max_bytes=1024)
+        spec = _spec()
+
+        assert cache.get(spec) is None
+        path = cache.put(spec, b'data')
+
+        assert cache.get(spec) == path
+        assert path.read_bytes() == b'data'
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that the cache stays within its byte budget, evicting the LRU entry."""
+        cache = RenderCache(tmp_path, max_bytes=10)
+        first, second, third = _spec('a'), _spec('b'), _spec('c')
+
+        cache.put(first, b'12345')
+        cache.put(second, b'12345')
+        cache.get(first)
+        cache.put(third, b'12345')
+
+        assert cache.get(second) is None
+        assert cache.get(first) is not None
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['bytes'] == 10
+
+    def test_budget_shared_between_processes(self, tmp_path):
+        """Test that entries stored by another process count towards the byte budget."""
+        cache = RenderCache(tmp_path, max_bytes=10, rescan_interval=0)
+        other = RenderCache(tmp_path, max_bytes=10, rescan_interval=0)
+
+        cache.put(_spec('a'), b'12345')
+        other.put(_spec('b'), b'12345')
+        cache.put(_spec('c'), b'12345')
+
+        assert sum(f.stat().st_size for f in tmp_path.iterdir()) == 10
+        assert cache.stats()['bytes'] == 10
+
+    def test_link_survives_eviction(self, tmp_path):
+        """Test that a linked artifact stays readable after its cache entry is evicted."""
+        cache = RenderCache(tmp_path / 'cache', max_bytes=5)
+        source = cache.put(_spec('a'), b'12345')
+        target = tmp_path / 'qrcodes' / 'linked.png'
+
+        RenderCache.link(source, target)
+        cache.put(_spec('b'), b'67890')
+
+        assert not source.exists()
+        assert target.read_bytes() == b'12345'
+
+    def test_store_without_cache_keeps_linked_artifacts(self, settings, tmp_path):
+        """Test that rendering with the cache disabled doesn't write through a shared link."""
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_CACHE_MAX_BYTES = 0
+        get_render_cache.cache_clear()
+        cached = RenderCache(tmp_path / 'cache', max_bytes=1024).put(_spec('a'), b'12345')
+        target = tmp_path / 'qrcodes' / 'linked.png'
+        RenderCache.link(cached, target)
+
+        try:
+            QRCodeGenerator._store(_spec('b'), b'67890', target)
+        finally:
+            get_render_cache.cache_clear()
+
+        assert target.read_bytes() == b'67890'
+        assert cached.read_bytes() == b'12345'
+
+
+class TestRenderPool:
+    """Test cases for the render process pool."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    async def test_runs_in_thread_when_disabled(self, settings):
+        """Test that renders still work with the pool disabled."""
+        settings.QR_CODE_RENDER_WORKERS = 0
+
+        image = await run_in_render_pool(render, _spec())
+
+        assert image.startswith(b'\x89PNG')
+
+    @pytest.mark.asyncio
+    @pytest.mark.slow
+    async def test_renders_in_worker_process(self, settings):
+        """Test that the pool renders the same bytes as an in-process render."""
+        settings.QR_CODE_RENDER_WORKERS = 1
+        try:
+            image = await run_in_render_pool(render, _spec())
+        finally:
+            shutdown_render_pool()
+
+        assert image == render(_spec())
+
+    @pytest.mark.slow
+    def test_worker_count_overrides_settings(self, settings):
+        """Test that an explicit worker count starts a pool without changing settings."""
+        import os
+
+        from asgiref.sync import async_to_sync
+
+        from src.qr_code.common.rendering import worker_pid
+        from src.qr_code.services.render_pool import start_render_pool
+
+        settings.QR_CODE_RENDER_WORKERS = 0
+        try:
+            start_render_pool(1)
+            pid = async_to_sync(run_in_render_pool)(worker_pid)
+        finally:
+            shutdown_render_pool()
+
+        assert pid != os.getpid()
+        assert settings.QR_CODE_RENDER_WORKERS == 0
+
+
+@pytest.mark.unit
+class TestMatrixCache:
+    """Test cases for the encoded matrix cache."""
+
+    def test_bit_packing_round_trip(self):
+        """Test that packing and unpacking a matrix is lossless."""
+        import segno
+
+        qr = segno.make('https://example.com/some/path', error='H', micro=False)
+
+        packed = EncodedMatrix.from_matrix(qr.matrix)
+
+        assert packed.to_matrix() == tuple(qr.matrix)
+        assert len(packed.bits) == packed.height * ((packed.width + 7) // 8)
+
+    @pytest.mark.parametrize('kind', ['png', 'svg', 'pdf'])
+    def test_rasterize_matches_full_render(self, kind):
+        """Test that rasterizing a cached matrix produces the same bytes as a full render."""
+        spec = _spec(kind=kind, scale=5, dark='#336699', light=None)
+
+        assert rasterize(encode(spec.content, spec.error), spec) == render(spec)
+
+    def test_evicts_least_recently_used(self):
+        """Test LRU eviction and hit/miss counters."""
+        cache = MatrixCache(max_entries=2)
+        keys = [MatrixCache.key_for(content, 'M') for content in 'abc']
+        for key in keys[:2]:
+            cache.put(key, encode(key[0], 'M'))
+
+        cache.get(keys[0])
+        cache.put(keys[2], encode('c', 'M'))
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.stats()['entries'] == 2
+        assert cache.stats()['hits'] == 2
+        assert cache.stats()['misses'] == 1
+
+    @pytest.mark.asyncio
+    async def test_generate_formats_encodes_once(self, settings, tmp_path, user):
+        """Test that exporting several formats encodes the content only once."""
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_WORKERS = 0
+        qr = QRCode(content='https://example.com/multi', created_by=user, image_file='')
+        get_matrix_cache.cache_clear()
+        try:
+            artifacts = await QRCodeGenerator.generate_formats(qr, ['png', 'svg', 'pdf'])
+            stats = get_matrix_cache().stats()
+        finally:
+            get_matrix_cache.cache_clear()
+
+        # PDFs carry their creation time, which may differ between the two renders
+        def undated(image: bytes) -> bytes:
+            return re.sub(rb'/CreationDate *\(D:[^)]*\)', b'', image)
+
+        assert stats['misses'] == 1
+        for artifact, kind in zip(artifacts, ['png', 'svg', 'pdf']):
+            image = (tmp_path / artifact.path).read_bytes()
+            assert artifact.qr_format == kind
+            assert artifact.size == len(image)
+            expected = render(QRCodeGenerator.render_spec(qr, qr_format=kind))
+            assert undated(image) == undated(expected)
+
+    @pytest.mark.asyncio
+    async def test_restyle_reuses_matrix(self, settings):
+        """Test that rendering a new style of known content skips encoding."""
+        settings.QR_CODE_RENDER_WORKERS = 0
+        get_matrix_cache.cache_clear()
+        try:
+            await QRCodeGenerator.render(_spec('restyle'))
+            image = await QRCodeGenerator.render(_spec('restyle', scale=9, kind='svg'))
+            stats = get_matrix_cache().stats()
+        finally:
+            get_matrix_cache.cache_clear()
+
+        assert image == render(_spec('restyle', scale=9, kind='svg'))
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+
+
+def _decode_png(data: bytes) -> list[list[tuple[int, int, int, int]]]:
+    """Decode a greyscale or palette PNG (no interlacing) into rows of RGBA pixels."""
+    assert data.startswith(b'\x89PNG\r\n\x1a\n')
+    chunks: dict[bytes, bytes] = {}
+    pos = 8
+    while pos < len(data):
+        (length,) = struct.unpack('>I', data[pos : pos + 4])
+        name = data[pos + 4 : pos + 8]
+        chunks[name] = chunks.get(name, b'') + data[pos + 8 : pos + 8 + length]
+        pos += length + 12
+
+    width, height, depth, color_type = struct.unpack('>2I2B', chunks[b'IHDR'][:10])
+    stride = (width * depth + 7) // 8
+    raw = zlib.decompress(chunks[b'IDAT'])
+    previous = bytearray(stride)
+    rows = []
+    for y in range(height):
+        line = raw[y * (stride + 1) : (y + 1) * (stride + 1)]
+        kind, row = line[0], bytearray(line[1:])
+        if kind == 1:
+            for x in range(1, stride):
+                row[x] = (row[x] + row[x - 1]) & 0xFF
+        elif kind == 2:
+            row = bytearray((a + b) & 0xFF for a, b in zip(row, previous))
+        else:
+            assert kind == 0, f'Unsupported filter type {kind}'
+        previous = row
+        values = [
+            (row[x * depth // 8] >> (8 - depth - x * depth % 8)) & ((1 << depth) - 1)
+            for x in range(width)
+        ]
+        alpha = chunks.get(b'tRNS', b'')
+        if color_type == 3:
+            palette = chunks[b'PLTE']
+            pixels = [
+                (*palette[3 * v : 3 * v + 3], alpha[v] if v < len(alpha) else 255) for v in values
+            ]
+        else:
+            assert color_type == 0, f'Unsupported color type {color_type}'
+            grey = 255 // ((1 << depth) - 1)
+            transparent = struct.unpack('>H', alpha)[0] if alpha else None
+            pixels = [(v * grey,) * 3 + (0 if v == transparent else 255,) for v in values]
+        # The color of fully transparent pixels doesn't matter
+        rows.append([pixel if pixel[3] else (0, 0, 0, 0) for pixel in pixels])
+    return rows
+
+
+@pytest.mark.unit
+class TestNumpyPngWriter:
+    """Test cases for the vectorized PNG writer."""
+
+    @pytest.mark.parametrize(
+        'style',
+        [
+            {'scale': 1, 'border': 0},
+            {'scale': 3, 'border': 4},
+            {'scale': 7, 'border': 2, 'dark': '#336699', 'light': None},
+            {'scale': 2, 'border': 1, 'dark': None, 'light': '#ffcc00'},
+        ],
+    )
+    @pytest.mark.parametrize('one_bit', [True, False])
+    def test_pixels_match_segno(self, style, one_bit):
+        """Test that the numpy writer produces the same pixels as segno."""
+        spec = _spec('https://example.com/numpy', **style)
+        fast = replace(spec, png=PngOptions(compresslevel=6, one_bit=one_bit))
+        matrix = encode(spec.content, spec.error)
+
+        assert _decode_png(rasterize(matrix, fast)) == _decode_png(rasterize(matrix, spec))
+
+    def test_options_change_cache_key(self):
+        """Test that the PNG writer options are part of the cache key."""
+        assert _spec().cache_key != _spec(png=PngOptions()).cache_key
+        assert _spec(png=PngOptions()).cache_key != _spec(png=PngOptions(one_bit=False)).cache_key
+
+    def test_render_spec_uses_configured_backend(self, settings, user):
+        """Test that the numpy writer is only selected for PNGs when configured."""
+        settings.QR_CODE_PNG_BACKEND = 'numpy'
+        settings.QR_CODE_PNG_COMPRESSLEVEL = 3
+        png = QRCode(content='x', created_by=user, qr_format=QRCodeFormat.PNG)
+        svg = QRCode(content='x', created_by=user, qr_format=QRCodeFormat.SVG)
+
+        assert QRCodeGenerator.render_spec(png).png == PngOptions(compresslevel=3, one_bit=True)
+        assert QRCodeGenerator.render_spec(svg).png is None
+
+        settings.QR_CODE_PNG_BACKEND = 'segno'
+        assert QRCodeGenerator.render_spec(png).png is None
+
+
+@pytest.mark.unit
+class TestCompactSvg:
+    """Test cases for the compact SVG writer and its precompressed siblings."""
+
+    def test_path_data_draws_dark_modules(self):
+        """Test that replaying the path strokes reproduces the matrix."""
+        import re
+
+        from src.qr_code.common.svg import path_data
+
+        matrix = encode('https://example.com/svg', 'M').to_matrix()
+        border = 4
+
+        drawn = [bytearray(len(matrix[0])) for _ in matrix]
+        x = y = 0.0
+        for move, dx, dy, length in re.findall(
+            r'([mM])(-?[\d.]+) (-?[\d.]+)h(\d+)', path_data(matrix, border)
+        ):
+            x, y = (x + float(dx), y + float(dy)) if move == 'm' else (float(dx), float(dy))
+            row, start = int(y - 0.5) - border, int(x) - border
+            drawn[row][start : start + int(length)] = b'\x01' * int(length)
+            x += int(length)
+
+        assert tuple(drawn) == matrix
+
+    def test_compact_svg_writer(self):
+        """Test that the compact writer draws the same modules in fewer bytes than segno."""
+        from src.qr_code.common.svg import path_data
+
+        spec = _spec('https://example.com/compact', kind='svg', scale=10)
+        compact = replace(spec, compact_svg=True)
+        matrix = encode(spec.content, spec.error)
+
+        image = rasterize(matrix, compact)
+
+        assert image.startswith(b'<svg xmlns="http://www.w3.org/2000/svg" width="370"')
+        assert path_data(matrix.to_matrix(), spec.border).encode() in image
+        assert b'stroke="#000"' in image and b'fill="#fff"' in image
+        assert len(image) < len(rasterize(matrix, spec))
+
+    def test_cache_hit_keeps_siblings(self, settings, tmp_path):
+        """Test that siblings are only compressed again when the linked artifact changes."""
+        import gzip
+
+        from src.qr_code.common.compression import sibling_path
+
+        settings.QR_CODE_SVG_PRECOMPRESS = True
+        cache = RenderCache(tmp_path / 'cache', max_bytes=2**20)
+        spec, other = _spec(kind='svg'), _spec('https://example.com/other', kind='svg')
+        target = tmp_path / 'code.svg'
+        sibling = sibling_path(target, 'gzip')
+
+        QRCodeGenerator._expose_cached(spec, cache.put(spec, b'<svg>1</svg>'), target)
+        inode = sibling.stat().st_ino
+        QRCodeGenerator._expose_cached(spec, cache.path_for(spec), target)
+
+        assert sibling.stat().st_ino == inode
+
+        QRCodeGenerator._expose_cached(other, cache.put(other, b'<svg>2</svg>'), target)
+
+        assert gzip.decompress(sibling.read_bytes()) == b'<svg>2</svg>'
+
+    @pytest.mark.parametrize(
+        'header,expected',
+        [
+            ('gzip, deflate, br', ['br', 'gzip']),
+            ('gzip', ['gzip']),
+            ('br;q=0, gzip;q=0.5', ['gzip']),
+            ('*', ['br', 'gzip']),
+            ('identity', []),
+            ('', []),
+        ],
+    )
+    def test_accepted_encodings(self, header, expected):
+        """Test Accept-Encoding negotiation of precompressed siblings."""
+        from src.qr_code.common.compression import accepted_encodings
+
+        assert accepted_encodings(header) == expected
+
+
+class TestShortCodes:
+    """Test cases for the short code permutation and allocator."""
+
+    @pytest.mark.unit
+    def test_permutation_is_unique_and_base62(self):
+        """Test that consecutive numbers give distinct, fixed-length, unrelated codes."""
+        from src.qr_code.common.short_codes import (
+            ALPHABET,
+            DOMAIN,
+            ShortCodePermutation,
+        )
+
+        permutation = ShortCodePermutation(b'test key')
+        numbers = [*range(5000), DOMAIN - 1]
+
+        codes = [permutation.encode(number) for number in numbers]
+
+        assert len(set(codes)) == len(codes)
+        assert all(len(code) == 9 and set(code) <= set(ALPHABET) for code in codes)
+        assert codes[0][:4] != codes[1][:4]
+        assert ShortCodePermutation(b'other key').encode(0) != codes[0]
+        with pytest.raises(ValueError):
+            permutation.encode(DOMAIN)
+
+    @pytest.mark.unit
+    def test_decode_inverts_encode(self):
+        """Test that codes decode back to their sequence numbers, and other strings don't."""
+        from src.qr_code.common.short_codes import DOMAIN, ShortCodePermutation
+
+        permutation = ShortCodePermutation(b'test key')
+        numbers = [*range(1000), DOMAIN - 1]
+
+        assert [permutation.decode(permutation.encode(n)) for n in numbers] == numbers
+        assert permutation.decode('abcdefgh') is None
+        assert permutation.decode('abcd-efgh') is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_allocator_reserves_blocks(self, django_assert_num_queries):
+        """Test that codes are served from a reserved block without queries."""
+        from src.qr_code.models import ShortCodeSequence
+        from src.qr_code.services.short_codes import ShortCodeAllocator
+
+        allocator = ShortCodeAllocator(sequence='test', block_size=10)
+        first = allocator.allocate_one()
+        with django_assert_num_queries(0):
+            batch = allocator.allocate(9)
+        overflow = allocator.allocate(25)
+
+        codes = [first, *batch, *overflow]
+        assert len(set(codes)) == 35
+        assert ShortCodeSequence.objects.get(name='test').next_value == 35
+
+    @pytest.mark.django_db
+    def test_allocator_in_transaction_reserves_exactly(self):
+        """Test that allocations inside a transaction reserve only what they use."""
+        from src.qr_code.models import ShortCodeSequence
+        from src.qr_code.services.short_codes import ShortCodeAllocator
+
+        allocator = ShortCodeAllocator(sequence='test', block_size=1000)
+
+        codes = allocator.allocate(3) + allocator.allocate(2)
+
+        assert len(set(codes)) == 5
+        assert ShortCodeSequence.objects.get(name='test').next_value == 5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_allocator_drops_old_blocks(self):
+        """Test that what is left of a block is dropped once it is older than the maximum age."""
+        from src.qr_code.models import ShortCodeSequence
+        from src.qr_code.services.short_codes import ShortCodeAllocator
+
+        allocator = ShortCodeAllocator(sequence='test', block_size=10, max_block_age=3600)
+        allocator.allocate(2)
+        allocator.allocate(2)
+        assert ShortCodeSequence.objects.get(name='test').next_value == 10
+
+        allocator._reserved_at -= 3601
+        allocator.allocate_one()
+
+        assert ShortCodeSequence.objects.get(name='test').next_value == 20
+
+    @pytest.mark.django_db
+    def test_save_allocates_without_lookup(self, user):
+        """Test that saving a shortened code doesn't look up existing short codes."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        qr = QRCode(
+            created_by=user, qr_type='url', content='https://example.com', use_url_shortening=True
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            qr.save()
+
+        assert len(qr.short_code or '') == 9
+        assert not [
+            q for q in queries if q['sql'].startswith('SELECT') and 'qr_code_qrcode' in q['sql']
+        ]
+
+
+class TestShortCodeFilter:
+    """Test cases for the filter of existing short codes."""
+
+    @pytest.mark.unit
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test that added items are always found, and others rarely at the configured rate."""
+        from src.qr_code.common.bloom import BloomFilter
+
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        for index in range(10000):
+            bloom.add(f'in-{index}')
+
+        assert all(f'in-{index}' in bloom for index in range(10000))
+        false_positives = sum(f'out-{index}' in bloom for index in range(10000))
+        assert false_positives < 200
+        assert bloom.count == 10000
+
+    @pytest.mark.django_db
+    def test_rejects_unknown_codes(self, qr_code_with_shortening):
+        """Test that existing and newly allocated codes pass, and unknown ones are rejected."""
+        from src.qr_code.services.short_code_filter import ShortCodeFilter
+        from src.qr_code.services.short_codes import ShortCodeAllocator
+
+        short_code_filter = ShortCodeFilter(error_rate=0.01, rebuild_interval=3600)
+        assert short_code_filter.might_exist('zzzzzzzzz')
+
+        short_code_filter.build()
+        # Allocated by another process after the build
+        later = ShortCodeAllocator().allocate_one()
+
+        assert short_code_filter.might_exist(qr_code_with_shortening.short_code)
+        assert short_code_filter.might_exist(later)
+        assert not short_code_filter.might_exist('zzzzzzzzz')
+        assert not short_code_filter.might_exist('abcdefgh')
+        short_code_filter.add('abcdefgh')
+        assert short_code_filter.might_exist('abcdefgh')
+        assert short_code_filter.stats()['rejected'] == 2
+
+    def test_disabled_filter_lets_everything_through(self):
+        """Test that an interval of 0 disables the filter."""
+        from src.qr_code.services.short_code_filter import ShortCodeFilter
+
+        short_code_filter = ShortCodeFilter(error_rate=0.01, rebuild_interval=0)
+
+        assert short_code_filter.might_exist('zzzzzzzzz')
+
+
+class TestRedirectIndex:
+    """Test cases for the compiled redirect index."""
+
+    @pytest.mark.unit
+    def test_index_round_trip(self, tmp_path):
+        """Test that written targets are found by binary search, and others aren't."""
+        import uuid
+
+        from src.qr_code.common.redirect_index import Entry, RedirectIndex, write_index
+
+        ids = [uuid.uuid4() for _ in range(4)]
+        entries: dict[str, Entry] = {
+            f'code{n:05d}': (uuid.uuid4(), f'https://example.com/{n}', False) for n in range(500)
+        }
+        entries.update(
+            {
+                'deleted': (ids[0], 'https://example.com/d', True),
+                'nourl': (ids[1], None, False),
+                'unicode': (ids[2], 'https://example.com/\u00e9t\u00e9', False),
+                'x' * 17: (ids[3], 'https://example.com/long', False),
+            }
+        )
+
+        written = write_index(tmp_path / 'index', entries.items(), built_at=1000.0)
+        index = RedirectIndex(tmp_path / 'index')
+
+        assert written == len(index) == 503
+        assert index.built_at == 1000.0
+        assert all(index.get(code) == entry for code, entry in entries.items() if len(code) <= 16)
+        assert index.get('x' * 17) is None
+        assert index.get('code99999') is None
+        assert index.get('') is None
+        assert dict(index) == {code: e for code, e in entries.items() if len(code) <= 16}
+        index.close()
+
+    @pytest.mark.django_db
+    def test_incremental_compile(self, tmp_path, user):
+        """Test that a refresh picks up changed, new and deleted codes."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from src.qr_code.common.redirect_index import RedirectIndex
+        from src.qr_code.services.redirect_index import compile_redirect_index
+
+        path = tmp_path / 'index'
+        qrcodes = [
+            QRCode.objects.create(
+                created_by=user,
+                content=f'https://example.com/{n}',
+                original_url=f'https://example.com/{n}',
+                use_url_shortening=True,
+            )
+            for n in range(3)
+        ]
+        assert compile_redirect_index(path) == (3, 3)
+
+        qrcodes[0].original_url = 'https://example.org/new'
+        qrcodes[0].save(update_fields=['original_url'])
+        qrcodes[1].delete()
+        QRCode.objects.filter(pk=qrcodes[2].pk).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        new = QRCode.objects.create(
+            created_by=user,
+            content='x',
+            original_url='https://example.net',
+            use_url_shortening=True,
+        )
+        written, read = compile_redirect_index(path)
+
+        index = RedirectIndex(path)
+        assert (written, read) == (3, 2)
+        first, second, third = (qr.short_code or '' for qr in qrcodes)
+        assert index.get(first) == (qrcodes[0].id, 'https://example.org/new', False)
+        assert index.get(second) is None
+        assert index.get(third) == (qrcodes[2].id, 'https://example.com/2', False)
+        assert index.get(new.short_code or '') == (new.id, 'https://example.net', False)
+        index.close()
+
+    @pytest.mark.unit
+    def test_index_needs_a_shared_cache(self, settings):
+        """Test that the index and the shared level are reported with a per-process cache."""
+        from src.qr_code.checks import check_redirect_cache
+
+        settings.DEBUG = False
+        settings.QR_CODE_REDIRECT_INDEX_PATH = '/var/lib/qr_code/redirects.idx'
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        assert [check.id for check in check_redirect_cache()] == ['E030', 'W030']
+
+        settings.QR_CODE_REDIRECT_INDEX_PATH = ''
+        settings.QR_CODE_REDIRECT_SHARED_CACHE_TTL = 0
+        assert check_redirect_cache() == []
+
+        settings.QR_CODE_REDIRECT_INDEX_PATH = '/var/lib/qr_code/redirects.idx'
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                'LOCATION': 'redis://localhost:6379',
+            }
+        }
+        assert check_redirect_cache() == []
+
+
+class TestScanClassifier:
+    """Test cases for the classification of redirect requests."""
+
+    BROWSER = 'Mozilla/5.0 (iPhone; CPU iPhone OS 18_0 like Mac OS X) Mobile/15E148 Safari/604.1'
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        'user_agent',
+        [
+            'facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)',
+            'Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)',
+            'WhatsApp/2.23.20.0',
+            'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+            'TelegramBot (like TwitterBot)',
+            'curl/8.5.0',
+        ],
+    )
+    def test_previewers_are_not_scans(self, user_agent):
+        """Test that known previewers, crawlers and tools are skipped."""
+        from src.qr_code.services.scan_classifier import BOT, ScanClassifier
+
+        classifier = ScanClassifier(duplicate_window=30)
+
+        assert classifier.classify('abc', 'GET', user_agent, '10.0.0.1') == BOT
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        'user_agent',
+        [
+            'Mozilla/5.0 (Linux; Android 12; CUBOT KINGKONG 7) AppleWebKit/537.36 Mobile Safari',
+            'Mozilla/5.0 (Linux; Android 10; Cubot_NOTE_20) AppleWebKit/537.36 Mobile Safari',
+        ],
+    )
+    def test_phones_named_bot_are_scans(self, user_agent):
+        """Test that a phone model ending in `bot` isn't mistaken for a crawler."""
+        from src.qr_code.services.scan_classifier import ScanClassifier
+
+        classifier = ScanClassifier(duplicate_window=30)
+
+        assert classifier.classify('abc', 'GET', user_agent, '10.0.0.1') is None
+
+    @pytest.mark.unit
+    def test_client_behind_trusted_proxies(self):
+        """Test that the client address is read from X-Forwarded-For behind trusted proxies."""
+        from src.qr_code.services.scan_classifier import DUPLICATE, ScanClassifier
+
+        direct = ScanClassifier(duplicate_window=30)
+        assert direct.client('10.0.0.1', '203.0.113.7') == '10.0.0.1'
+
+        proxied = ScanClassifier(duplicate_window=30, trusted_proxy_hops=1)
+        assert proxied.client('10.0.0.1', '203.0.113.7') == '203.0.113.7'
+        # A client-supplied entry is ignored, as is a missing header
+        assert proxied.client('10.0.0.1', '1.2.3.4, 203.0.113.7') == '203.0.113.7'
+        assert proxied.client('10.0.0.1', '') == '10.0.0.1'
+        two_hops = ScanClassifier(duplicate_window=30, trusted_proxy_hops=2)
+        assert two_hops.client('10.0.0.1', '1.2.3.4, 203.0.113.7, 10.0.0.9') == '203.0.113.7'
+
+        # Different visitors behind the same proxy aren't duplicates of each other
+        assert proxied.classify('abc', 'GET', self.BROWSER, '10.0.0.1', '203.0.113.7') is None
+        assert proxied.classify('abc', 'GET', self.BROWSER, '10.0.0.1', '203.0.113.8') is None
+        assert proxied.classify('abc', 'GET', self.BROWSER, '10.0.0.1', '203.0.113.7') == DUPLICATE
+
+    @pytest.mark.unit
+    def test_head_and_duplicates_are_not_scans(self):
+        """Test that HEAD requests and repeats within the window are skipped and reported."""
+        from src.qr_code.services.scan_classifier import DUPLICATE, HEAD, ScanClassifier
+
+        classifier = ScanClassifier(duplicate_window=30)
+
+        assert classifier.classify('abc', 'HEAD', self.BROWSER, '10.0.0.1') == HEAD
+        assert classifier.classify('abc', 'GET', self.BROWSER, '10.0.0.1') is None
+        assert classifier.classify('abc', 'GET', self.BROWSER, '10.0.0.1') == DUPLICATE
+        assert classifier.classify('abc', 'GET', self.BROWSER, '10.0.0.2') is None
+        assert classifier.classify('xyz', 'GET', self.BROWSER, '10.0.0.1') is None
+
+        stats = classifier.stats()
+        assert stats['counted'] == 3
+        assert stats['head'] == stats['duplicate'] == 1
+        assert stats['writes_avoided'] == 2
+
+    @pytest.mark.unit
+    def test_repeats_after_window_are_scans(self):
+        """Test that a client is counted again once the window has passed, or with no window."""
+        from src.qr_code.services.scan_classifier import ScanClassifier
+
+        classifier = ScanClassifier(duplicate_window=30)
+        classifier.classify('abc', 'GET', self.BROWSER, '10.0.0.1')
+        key = ('abc', '10.0.0.1', self.BROWSER)
+        classifier._last_counted[key] -= 31
+
+        assert classifier.classify('abc', 'GET', self.BROWSER, '10.0.0.1') is None
+        disabled = ScanClassifier(duplicate_window=0)
+        assert disabled.classify('abc', 'GET', self.BROWSER, '10.0.0.1') is None
+        assert disabled.classify('abc', 'GET', self.BROWSER, '10.0.0.1') is None
+
+
+@pytest.mark.django_db
+class TestScanCounter:
+    """Test cases for the write-behind scan counter."""
+
+    def test_buffers_and_flushes_scans(self, qr_code):
+        """Test that scans are buffered, then written with their counts and rollups at once."""
+        from datetime import datetime, timedelta
+        from datetime import timezone as dt_timezone
+
+        from src.qr_code.models import ScanEvent, ScanRollup
+        from src.qr_code.services.scan_counter import ScanCounter
+
+        counter = ScanCounter(flush_interval=3600, max_pending=1000)
+        now = datetime(2026, 3, 1, 10, 30, tzinfo=dt_timezone.utc)
+        try:
+            for offset in (2, 0, 1, 60):
+                counter.record(qr_code.id, now + timedelta(minutes=offset), user_agent='Test')
+
+            qr_code.refresh_from_db()
+            assert qr_code.scan_count == 0
+            assert not ScanEvent.objects.exists()
+
+            assert counter.flush() == 4
+        finally:
+            counter.stop()
+
+        qr_code.refresh_from_db()
+        assert qr_code.scan_count == 4
+        assert qr_code.last_scanned_at == now + timedelta(minutes=60)
+        assert ScanEvent.objects.filter(qrcode=qr_code, user_agent='Test').count() == 4
+        rollups = set(ScanRollup.objects.values_list('period', 'bucket', 'count'))
+        assert rollups == {
+            ('hour', now.replace(minute=0), 3),
+            ('hour', now.replace(hour=11, minute=0), 1),
+            ('day', now.replace(hour=0, minute=0), 4),
+        }
+        assert counter.flush() == 0
+
+    def test_failed_flushes_keep_a_bounded_buffer(self, qr_code, monkeypatch):
+        """Test that scans kept by failed flushes are capped, dropping the oldest."""
+        from django.db import DatabaseError
+
+        from src.qr_code.services.scan_counter import ScanCounter
+
+        def unavailable(events):
+            raise DatabaseError('unavailable')
+
+        counter = ScanCounter(flush_interval=3600, max_pending=2, max_buffered=3)
+        monkeypatch.setattr(counter, '_write', unavailable)
+        try:
+            for _ in range(5):
+                counter.record(qr_code.id)
+                assert counter.flush() == 0
+        finally:
+            monkeypatch.undo()
+            counter.stop()
+
+        qr_code.refresh_from_db()
+        assert counter.dropped == 2
+        assert qr_code.scan_count == 3
+
+    def test_rollups_accumulate_across_flushes(self, qr_code):
+        """Test that later flushes add to existing rollup buckets."""
+        from src.qr_code.models import ScanRollup
+        from src.qr_code.services.scan_counter import ScanCounter
+
+        counter = ScanCounter(flush_interval=0, max_pending=1000)
+
+        counter.record(qr_code.id)
+        counter.record(qr_code.id)
+
+        assert ScanRollup.objects.get(qrcode=qr_code, period='day').count == 2
+
+    def test_prune_keeps_rollups(self, qr_code):
+        """Test that pruning old events leaves recent events and all rollups."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from src.qr_code.models import ScanEvent, ScanRollup
+        from src.qr_code.services.scan_counter import ScanCounter
+
+        counter = ScanCounter(flush_interval=0, max_pending=1000)
+        counter.record(qr_code.id, timezone.now() - timedelta(days=100))
+        counter.record(qr_code.id, timezone.now())
+        out = io.StringIO()
+
+        call_command('prune_scan_events', '--days', '90', '--batch-size', '1', stdout=out)
+
+        assert 'Deleted 1 scan event(s)' in out.getvalue()
+        assert ScanEvent.objects.count() == 1
+        assert sum(ScanRollup.objects.filter(period='day').values_list('count', flat=True)) == 2
+
+    def test_write_through(self, qr_code):
+        """Test that an interval of 0 writes each scan immediately."""
+        from src.qr_code.services.scan_counter import ScanCounter
+
+        counter = ScanCounter(flush_interval=0, max_pending=1000)
+
+        counter.record(qr_code.id)
+        counter.record(qr_code.id)
+
+        qr_code.refresh_from_db()
+        assert qr_code.scan_count == 2
+        assert qr_code.last_scanned_at is not None
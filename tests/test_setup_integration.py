@@ -5,6 +5,7 @@ Integration tests to verify setup and end-to-end functionality.
 import pytest
 from django.contrib.auth import get_user_model
 
+from src.qr_code.common.rendering import render
 from src.qr_code.models import QRCode, QRCodeErrorCorrection, QRCodeFormat
 from src.qr_code.services import QRCodeGenerator
 
@@ -73,7 +74,7 @@ class TestSetupIntegration:
         )
 
         assert qr.short_code is not None
-        assert len(qr.short_code) == 8
+        assert len(qr.short_code) == 9
 
         redirect_url = qr.get_redirect_url()
         assert redirect_url is not None
@@ -140,3 +141,305 @@ class TestSetupIntegration:
         assert 'data-full-src="/media/qrcodes/example.png"' in content
         # Ensure the modal container exists
         assert 'id="qr-modal-overlay"' in content
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestDashboardThumbnails:
+    """Test dashboard thumbnails and the per-page SVG sprite."""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_WORKERS = 0
+
+    @pytest.fixture
+    def qr(self, client, user):
+        client.force_login(user)
+        return QRCode.objects.create(
+            content='https://example.com/thumb', created_by=user, image_file=''
+        )
+
+    def test_dashboard_uses_one_sprite(self, client, qr, user):
+        """Test that all thumbnails of the page reference one versioned sprite."""
+        other = QRCode.objects.create(content='second', created_by=user, image_file='')
+
+        content = client.get('/dashboard/').content.decode('utf-8')
+
+        assert content.count('/dashboard/sprite.svg?') == 2
+        assert f'#qr-{qr.id}"' in content
+        assert f'#qr-{other.id}"' in content
+
+    def test_sprite_is_immutable_when_versioned(self, client, qr):
+        """Test that the sprite holds one symbol per code and is cached forever when versioned."""
+        from src.qr_code.services.thumbnails import sprite_version
+
+        version = sprite_version([qr])
+
+        current = client.get(f'/dashboard/sprite.svg?v={version}')
+        stale = client.get('/dashboard/sprite.svg?v=stale')
+
+        assert current['Content-Type'] == 'image/svg+xml'
+        assert current.content.decode('utf-8').count('<symbol ') == 1
+        assert f'id="qr-{qr.id}"' in current.content.decode('utf-8')
+        assert 'immutable' in current['Cache-Control']
+        assert 'immutable' not in stale['Cache-Control']
+
+    def test_sprite_version_changes_on_update(self, qr):
+        """Test that updating a code busts the sprite version."""
+        from src.qr_code.services.thumbnails import sprite_version
+
+        before = sprite_version([qr])
+        qr.name = 'Renamed'
+        qr.save()
+
+        assert sprite_version([qr]) != before
+
+    def test_thumbnail_fallback(self, client, qr, settings):
+        """Test per-code thumbnails when the sprite is disabled."""
+        settings.QR_CODE_DASHBOARD_SPRITE = False
+
+        content = client.get('/dashboard/').content.decode('utf-8')
+        url = f'/qrcodes/{qr.id}/thumbnail/?v={int(qr.updated_at.timestamp())}'
+        response = client.get(url)
+
+        assert url in content
+        assert response.status_code == 200
+        assert response.content.startswith(b'\x89PNG')
+        assert 'immutable' in response['Cache-Control']
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestDashboardPagination:
+    """Test dashboard batches and the rows fragment loaded on scroll."""
+
+    @pytest.fixture(autouse=True)
+    def page_size(self, settings):
+        settings.QR_CODE_DASHBOARD_PAGE_SIZE = 2
+
+    @pytest.fixture
+    def qrcodes(self, client, user):
+        client.force_login(user)
+        return [
+            QRCode.objects.create(
+                name=name, content=f'https://example.com/{name}', created_by=user, image_file=''
+            )
+            for name in ['delta', 'alpha', 'charlie', 'bravo', 'echo']
+        ]
+
+    def _scroll(self, client, url, params=None):
+        """Follow the fragment links from ``url``; return the listed names and the responses."""
+        response = client.get(url, params)
+        responses = [response]
+        while response.context['next_url']:
+            response = client.get(response.context['next_url'])
+            responses.append(response)
+        names = [qr.name for response in responses for qr in response.context['qrcodes']]
+        return names, responses
+
+    def test_first_batch_only(self, client, qrcodes):
+        """Test that the page renders the first batch and a placeholder for the next one."""
+        response = client.get('/dashboard/')
+        content = response.content.decode('utf-8')
+
+        assert [qr.name for qr in response.context['qrcodes']] == ['echo', 'bravo']
+        assert 'hx-get="/dashboard/rows/?' in content
+        assert 'hx-trigger="revealed"' in content
+
+    def test_scroll_lists_every_code_once(self, client, qrcodes):
+        """Test that the fragments list the remaining codes, newest first, then stop."""
+        names, responses = self._scroll(client, '/dashboard/')
+
+        assert names == ['echo', 'bravo', 'charlie', 'alpha', 'delta']
+        assert len(responses) == 3
+        assert '<html' not in responses[1].content.decode('utf-8')
+        assert 'hx-get' not in responses[-1].content.decode('utf-8')
+        assert 'No QR codes found' not in responses[-1].content.decode('utf-8')
+
+    def test_scroll_sorted_by_name(self, client, qrcodes):
+        """Test that sorting by name pages through names in order."""
+        names, _ = self._scroll(client, '/dashboard/', {'sort': 'name'})
+
+        assert names == ['alpha', 'bravo', 'charlie', 'delta', 'echo']
+
+    def test_scroll_search(self, client, qrcodes):
+        """Test that search results are paged too."""
+        names, _ = self._scroll(client, '/dashboard/', {'q': 'example'})
+
+        assert sorted(names) == ['alpha', 'bravo', 'charlie', 'delta', 'echo']
+
+    def test_sprite_per_batch(self, client, qrcodes):
+        """Test that each batch references a sprite with only its own codes."""
+        first = client.get('/dashboard/')
+        second = client.get(first.context['next_url'])
+
+        sprite = client.get(second.context['sprite_url']).content.decode('utf-8')
+
+        assert 'cursor=' in second.context['sprite_url']
+        assert sprite.count('<symbol ') == 2
+        assert all(f'id="qr-{qr.id}"' in sprite for qr in second.context['qrcodes'])
+
+    def test_invalid_cursor(self, client, qrcodes):
+        """Test that a malformed cursor is rejected."""
+        assert client.get('/dashboard/rows/', {'cursor': 'not-a-cursor'}).status_code == 400
+        assert client.get('/dashboard/sprite.svg', {'cursor': '!!!'}).status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestMediaServing:
+    """Test serving media files with precompressed siblings."""
+
+    @pytest.fixture
+    def svg_file(self, settings, tmp_path, user):
+        settings.MEDIA_ROOT = tmp_path
+        settings.QR_CODE_RENDER_CACHE_MAX_BYTES = 0
+        settings.QR_CODE_SVG_WRITER = 'compact'
+        qr = QRCode.objects.create(
+            content='https://example.com/svgz', created_by=user, qr_format=QRCodeFormat.SVG
+        )
+        spec = QRCodeGenerator.render_spec(qr)
+        image = render(spec)
+        QRCodeGenerator._store(spec, image, tmp_path / 'qrcodes' / f'{qr.id}.svg')
+        return f'/media/qrcodes/{qr.id}.svg', image
+
+    @pytest.mark.parametrize('accept,encoding', [('gzip, br', 'br'), ('gzip', 'gzip')])
+    def test_serves_precompressed_sibling(self, client, svg_file, accept, encoding):
+        """Test that an accepted encoding is served from the precompressed sibling."""
+        import gzip
+
+        import brotli
+
+        url, image = svg_file
+
+        response = client.get(url, HTTP_ACCEPT_ENCODING=accept)
+        body = response.content
+
+        assert response['Content-Type'] == 'image/svg+xml'
+        assert response['Content-Encoding'] == encoding
+        assert 'Accept-Encoding' in response['Vary']
+        decompress = brotli.decompress if encoding == 'br' else gzip.decompress
+        assert decompress(body) == image
+        assert len(body) < len(image)
+
+    def test_serves_identity_by_default(self, client, svg_file):
+        """Test that clients without Accept-Encoding get the plain SVG."""
+        url, image = svg_file
+
+        response = client.get(url)
+
+        assert 'Content-Encoding' not in response
+        assert response.content == image
+
+    @pytest.fixture
+    def png_file(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        (tmp_path / 'qrcodes').mkdir(parents=True)
+        data = bytes(range(256)) * 4
+        (tmp_path / 'qrcodes' / 'code.png').write_bytes(data)
+        return data
+
+    def test_strong_etag_and_not_modified(self, client, png_file):
+        """Test that the ETag is a content hash and revalidation returns 304."""
+        response = client.get('/media/qrcodes/code.png')
+        revalidated = client.get('/media/qrcodes/code.png', HTTP_IF_NONE_MATCH=response['ETag'])
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'image/png'
+        assert response.content == png_file
+        assert response['ETag'].startswith('"') and not response['ETag'].startswith('W/')
+        assert 'immutable' not in response['Cache-Control']
+        assert revalidated.status_code == 304
+        assert revalidated['ETag'] == response['ETag']
+
+    def test_immutable_when_versioned(self, client, png_file):
+        """Test that URLs versioned with the current ETag are cacheable forever."""
+        etag = client.get('/media/qrcodes/code.png')['ETag'].strip('"')
+
+        current = client.get('/media/qrcodes/code.png', {'v': etag})
+        stale = client.get('/media/qrcodes/code.png', {'v': 'stale'})
+
+        assert current['Cache-Control'] == 'public, max-age=31536000, immutable'
+        assert stale['Cache-Control'] == 'public, max-age=3600'
+
+    def test_render_cache_is_immutable(self, client, settings, tmp_path):
+        """Test that content-addressed render cache files are cacheable forever."""
+        settings.MEDIA_ROOT = tmp_path
+        (tmp_path / 'qrcodes' / 'cache').mkdir(parents=True)
+        name = f'{"ab" * 32}.png'
+        (tmp_path / 'qrcodes' / 'cache' / name).write_bytes(b'png')
+
+        response = client.get(f'/media/qrcodes/cache/{name}')
+
+        assert response.status_code == 200
+        assert 'immutable' in response['Cache-Control']
+
+    def test_serves_sibling_by_name(self, client, svg_file):
+        """Test that a sibling requested by name is labeled with its encoding."""
+        import gzip
+
+        url, image = svg_file
+
+        response = client.get(f'{url}z')
+
+        assert response['Content-Type'] == 'image/svg+xml'
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.content) == image
+
+    @pytest.mark.parametrize(
+        'header,status,expected',
+        [
+            ('bytes=0-9', 206, slice(0, 10)),
+            ('bytes=1000-', 206, slice(1000, 1024)),
+            ('bytes=-4', 206, slice(1020, 1024)),
+            ('bytes=0-1,5-6', 200, slice(0, 1024)),
+        ],
+    )
+    def test_range_requests(self, client, png_file, header, status, expected):
+        """Test single byte ranges; multiple ranges fall back to the whole file."""
+        response = client.get('/media/qrcodes/code.png', HTTP_RANGE=header)
+
+        assert response.status_code == status
+        assert response.content == png_file[expected]
+        if status == 206:
+            assert response['Content-Range'].endswith('/1024')
+
+    def test_unsatisfiable_range(self, client, png_file):
+        """Test that a range past the end of the file is rejected."""
+        response = client.get('/media/qrcodes/code.png', HTTP_RANGE='bytes=2000-')
+
+        assert response.status_code == 416
+        assert response['Content-Range'] == 'bytes */1024'
+
+    def test_stale_if_range_sends_whole_file(self, client, png_file):
+        """Test that a Range with an outdated If-Range gets the whole file."""
+        response = client.get(
+            '/media/qrcodes/code.png', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"'
+        )
+
+        assert response.status_code == 200
+        assert response.content == png_file
+
+    @pytest.mark.parametrize(
+        'accel,header,value',
+        [
+            ('nginx', 'X-Accel-Redirect', '/protected-media/qrcodes/code.png'),
+            ('sendfile', 'X-Sendfile', 'qrcodes/code.png'),
+        ],
+    )
+    def test_proxy_offloading(self, client, png_file, settings, accel, header, value):
+        """Test that with offloading only headers are sent and the proxy serves the file."""
+        settings.QR_CODE_MEDIA_ACCEL = accel
+
+        response = client.get('/media/qrcodes/code.png')
+
+        assert response[header].endswith(value)
+        assert response.content == b''
+        assert response['Content-Type'] == 'image/png'
+
+    def test_missing_and_outside_files(self, client, png_file):
+        """Test that missing files and paths outside MEDIA_ROOT are not served."""
+        assert client.get('/media/qrcodes/missing.png').status_code == 404
+        assert client.get('/media/qrcodes/').status_code == 404
+        assert client.get('/media/../pyproject.toml').status_code in (400, 404)